@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Consulta
+from .models import Consulta, CorreoPendiente, Inscripcion
 
 class ConsultaAdmin(admin.ModelAdmin):
     # campos que se mostraran en la vista de lista de consultas
@@ -17,4 +17,21 @@ class ConsultaAdmin(admin.ModelAdmin):
     # permite editar campos directamente desde el listado
     list_editable = ('perfil_obtenido',)
 
-admin.site.register(Consulta, ConsultaAdmin)
\ No newline at end of file
+admin.site.register(Consulta, ConsultaAdmin)
+
+
+class CorreoPendienteAdmin(admin.ModelAdmin):
+    # estado de la bandeja de salida, incluidos los correos fallidos
+    list_display = ('id', 'asunto', 'estado', 'intentos', 'proximo_intento', 'enviado_en')
+    list_filter = ('estado',)
+    search_fields = ('asunto',)
+
+admin.site.register(CorreoPendiente, CorreoPendienteAdmin)
+
+class InscripcionAdmin(admin.ModelAdmin):
+    # inscripciones a cursos escritas por lotes desde /inscribir/
+    list_display = ('id', 'nombre', 'correo', 'consulta', 'creada')
+    search_fields = ('nombre', 'correo')
+    raw_id_fields = ('consulta',)
+
+admin.site.register(Inscripcion, InscripcionAdmin)
@@ -4,3 +4,12 @@ from django.apps import AppConfig
 class MiAppConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'landing'
+
+    def ready(self):
+        # conecta las señales que mantienen EstadisticaDiaria y VersionTabla, y
+        # el wrapper de queries de las metricas
+        from . import estadisticas, metricas, versiones  # noqa: F401
+
+        # precalcula la tabla de resultados una sola vez al iniciar
+        from .resultados import tabla_resultados
+        tabla_resultados()
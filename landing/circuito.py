@@ -0,0 +1,108 @@
+import threading
+import time
+from collections import deque
+
+CERRADO = 'cerrado'
+ABIERTO = 'abierto'
+SEMIABIERTO = 'semiabierto'
+
+
+class CircuitoAbierto(Exception):
+    # la llamada no se hizo porque el circuito esta abierto
+    pass
+
+
+class Circuito:
+    # circuit breaker por tasa de fallos sobre las ultimas `ventana` llamadas.
+    # cerrado: todo pasa; abierto: falla enseguida durante `espera` segundos;
+    # semiabierto: deja pasar una prueba, que lo cierra o lo vuelve a abrir
+
+    def __init__(self, ventana=20, minimo=5, umbral=0.5, espera=30, reloj=time.monotonic):
+        self.ventana = ventana
+        self.minimo = minimo
+        self.umbral = umbral
+        self.espera = espera
+        self._reloj = reloj
+
+        self._lock = threading.Lock()
+        self._resultados = deque(maxlen=ventana)  # True = exito
+        self._estado = CERRADO
+        self._abierto_desde = 0.0
+        self._prueba_en_curso = False
+        self.stats = {'exitos': 0, 'fallos': 0, 'rechazadas': 0, 'aperturas': 0}
+
+    def _actualizar(self):
+        # abierto -> semiabierto cuando vence la espera (con el lock tomado)
+        if self._estado == ABIERTO and self._reloj() - self._abierto_desde >= self.espera:
+            self._estado = SEMIABIERTO
+            self._prueba_en_curso = False
+
+    @property
+    def estado(self):
+        with self._lock:
+            self._actualizar()
+            return self._estado
+
+    def abierto(self):
+        # true si una llamada ahora fallaria sin intentarse
+        with self._lock:
+            self._actualizar()
+            return self._estado == ABIERTO or (self._estado == SEMIABIERTO and self._prueba_en_curso)
+
+    def permitir(self):
+        with self._lock:
+            self._actualizar()
+            if self._estado == CERRADO:
+                return True
+            if self._estado == SEMIABIERTO and not self._prueba_en_curso:
+                self._prueba_en_curso = True
+                return True
+            self.stats['rechazadas'] += 1
+            return False
+
+    def _abrir(self):
+        self._estado = ABIERTO
+        self._abierto_desde = self._reloj()
+        self._prueba_en_curso = False
+        self._resultados.clear()
+        self.stats['aperturas'] += 1
+
+    def registrar(self, exito):
+        with self._lock:
+            self.stats['exitos' if exito else 'fallos'] += 1
+            if self._estado == SEMIABIERTO:
+                if exito:
+                    self._estado = CERRADO
+                    self._resultados.clear()
+                else:
+                    self._abrir()
+                return
+            if self._estado != CERRADO:
+                return
+            self._resultados.append(exito)
+            if len(self._resultados) >= self.minimo:
+                tasa = self._resultados.count(False) / len(self._resultados)
+                if tasa >= self.umbral:
+                    self._abrir()
+
+    def llamar(self, funcion, *args, **kwargs):
+        # una respuesta None cuenta como fallo, igual que una excepcion
+        if not self.permitir():
+            raise CircuitoAbierto()
+        try:
+            resultado = funcion(*args, **kwargs)
+        except Exception:
+            self.registrar(False)
+            raise
+        self.registrar(resultado is not None)
+        return resultado
+
+    def resumen(self):
+        with self._lock:
+            self._actualizar()
+            fallos = self._resultados.count(False)
+            return {
+                'estado': self._estado,
+                'tasa_fallos': round(fallos / len(self._resultados), 3) if self._resultados else 0.0,
+                **self.stats,
+            }
@@ -0,0 +1,117 @@
+import random
+import threading
+import time
+from collections import deque
+
+import requests
+from django.conf import settings
+from requests.adapters import HTTPAdapter
+
+from .metricas import observar_externo
+
+# respuestas que vale la pena reintentar (el servidor pide esperar o esta caido)
+CODIGOS_REINTENTABLES = frozenset({429, 500, 502, 503, 504})
+METODOS_IDEMPOTENTES = frozenset({'GET', 'HEAD', 'OPTIONS'})
+
+
+class ClienteHTTP:
+    # cliente para las llamadas salientes: una sesion por proceso con
+    # conexiones keep-alive reutilizables, plazos separados de conexion y
+    # lectura, reintentos con jitter y tiempos de cada llamada
+
+    def __init__(self, pool=10, timeout_conexion=3.05, timeout_lectura=5, reintentos=2,
+                 backoff=0.2, backoff_max=2.0, muestras=1000):
+        self.timeout = (timeout_conexion, timeout_lectura)
+        self.reintentos = reintentos
+        self.backoff = backoff
+        self.backoff_max = backoff_max
+
+        # los reintentos se hacen aca y no en urllib3 para poder medirlos
+        adaptador = HTTPAdapter(pool_connections=pool, pool_maxsize=pool, max_retries=0)
+        self.sesion = requests.Session()
+        self.sesion.mount('http://', adaptador)
+        self.sesion.mount('https://', adaptador)
+
+        self._lock = threading.Lock()
+        self._duraciones = deque(maxlen=muestras)
+        self.reset_stats()
+
+    def reset_stats(self):
+        with self._lock:
+            self._duraciones.clear()
+            self.stats = {'llamadas': 0, 'errores': 0, 'reintentos': 0, 'segundos': 0.0}
+
+    def _espera(self, intento):
+        # backoff exponencial con jitter completo
+        return random.uniform(0, min(self.backoff_max, self.backoff * 2 ** intento))
+
+    def _registrar(self, duracion, error, reintentos):
+        observar_externo('http', duracion, error)
+        with self._lock:
+            self._duraciones.append(duracion)
+            self.stats['llamadas'] += 1
+            self.stats['errores'] += error
+            self.stats['reintentos'] += reintentos
+            self.stats['segundos'] += duracion
+
+    def pedir(self, metodo, url, **kwargs):
+        # solo se reintentan metodos idempotentes, errores de conexion y los
+        # codigos de CODIGOS_REINTENTABLES; un plazo de lectura vencido no se
+        # reintenta porque ya consumio el tiempo de quien espera la respuesta
+        kwargs.setdefault('timeout', self.timeout)
+        reintentar = metodo.upper() in METODOS_IDEMPOTENTES
+        inicio = time.perf_counter()
+        intento = 0
+        error = True
+        try:
+            while True:
+                ultimo = not reintentar or intento >= self.reintentos
+                try:
+                    respuesta = self.sesion.request(metodo, url, **kwargs)
+                except requests.exceptions.ReadTimeout:
+                    raise
+                except requests.exceptions.ConnectionError:
+                    if ultimo:
+                        raise
+                else:
+                    if ultimo or respuesta.status_code not in CODIGOS_REINTENTABLES:
+                        error = respuesta.status_code >= 500
+                        return respuesta
+                    respuesta.close()
+                time.sleep(self._espera(intento))
+                intento += 1
+        finally:
+            self._registrar(time.perf_counter() - inicio, error, intento)
+
+    def get(self, url, **kwargs):
+        return self.pedir('GET', url, **kwargs)
+
+    def resumen(self):
+        with self._lock:
+            duraciones = sorted(self._duraciones)
+            stats = dict(self.stats)
+
+        def percentil(p):
+            if not duraciones:
+                return 0.0
+            return round(duraciones[int(p * (len(duraciones) - 1))] * 1000, 2)
+
+        llamadas = stats['llamadas']
+        return {
+            **stats,
+            'segundos': round(stats['segundos'], 3),
+            'promedio_ms': round(stats['segundos'] / llamadas * 1000, 2) if llamadas else 0.0,
+            'p50_ms': percentil(0.5),
+            'p95_ms': percentil(0.95),
+            'max_ms': percentil(1),
+        }
+
+
+cliente_http = ClienteHTTP(
+    pool=getattr(settings, 'HTTP_POOL_MAX', 10),
+    timeout_conexion=getattr(settings, 'HTTP_TIMEOUT_CONEXION', 3.05),
+    timeout_lectura=getattr(settings, 'HTTP_TIMEOUT_LECTURA', 5),
+    reintentos=getattr(settings, 'HTTP_REINTENTOS', 2),
+    backoff=getattr(settings, 'HTTP_BACKOFF', 0.2),
+    backoff_max=getattr(settings, 'HTTP_BACKOFF_MAX', 2.0),
+)
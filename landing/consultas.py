@@ -0,0 +1,95 @@
+import hashlib
+from datetime import datetime, time, timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+
+from .models import Consulta
+
+# columnas que muestra el listado (sin q1..q5 ni cursos_interes)
+COLUMNAS_LISTADO = ('id', 'fecha_consulta', 'nombre', 'correo', 'perfil_obtenido')
+
+
+def _fecha(valor):
+    try:
+        return parse_date(valor or '')
+    except ValueError:
+        return None
+
+
+def _inicio_del_dia(fecha):
+    return timezone.make_aware(datetime.combine(fecha, time.min))
+
+
+def filtros_consultas(params):
+    # arma los filtros del orm a partir de los parametros get; las fechas se
+    # convierten en rangos sobre la columna para poder usar el indice
+    filtros = {}
+    perfil = params.get('perfil')
+    if perfil:
+        filtros['perfil_obtenido'] = perfil
+    nivel = params.get('nivel')
+    if nivel:
+        filtros['nivel'] = nivel
+
+    desde = _fecha(params.get('desde'))
+    if desde:
+        filtros['fecha_consulta__gte'] = _inicio_del_dia(desde)
+    hasta = _fecha(params.get('hasta'))
+    if hasta:
+        filtros['fecha_consulta__lt'] = _inicio_del_dia(hasta + timedelta(days=1))
+    return filtros
+
+
+def _conteo_estimado():
+    # estimacion de postgres a partir de las estadisticas de la tabla
+    if connection.vendor != 'postgresql':
+        return None
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass",
+            [Consulta._meta.db_table],
+        )
+        fila = cursor.fetchone()
+    return fila[0] if fila and fila[0] > 0 else None
+
+
+def contar_consultas(filtros):
+    # devuelve (total, es_estimado); el resultado se cachea unos segundos
+    firma = "|".join(f"{k}={v}" for k, v in sorted(filtros.items()))
+    clave = "consultas:conteo:" + hashlib.md5(firma.encode("utf-8")).hexdigest()
+    conteo = cache.get(clave)
+    if conteo is not None:
+        return conteo
+
+    conteo = None
+    if not filtros:
+        estimado = _conteo_estimado()
+        if estimado is not None and estimado > getattr(settings, 'LISTADO_CONTEO_EXACTO_HASTA', 10000):
+            conteo = (estimado, True)
+    if conteo is None:
+        conteo = (Consulta.objects.filter(**filtros).count(), False)
+
+    cache.set(clave, conteo, getattr(settings, 'LISTADO_CONTEO_TTL', 60))
+    return conteo
+
+
+def pagina_consultas(filtros, tamano, antes=None, despues=None):
+    # paginacion por clave (id descendente): antes=<id> pide la pagina
+    # siguiente y despues=<id> la anterior; devuelve (filas, hay_anterior, hay_siguiente)
+    qs = Consulta.objects.filter(**filtros).values(*COLUMNAS_LISTADO)
+
+    if despues is not None:
+        filas = list(qs.filter(id__gt=despues).order_by('id')[:tamano + 1])
+        hay_anterior = len(filas) > tamano
+        filas = filas[:tamano][::-1]
+        return filas, hay_anterior, True
+
+    if antes is not None:
+        qs = qs.filter(id__lt=antes)
+    filas = list(qs.order_by('-id')[:tamano + 1])
+    hay_siguiente = len(filas) > tamano
+    return filas[:tamano], antes is not None, hay_siguiente
@@ -0,0 +1,155 @@
+import time
+import uuid
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import EmailMultiAlternatives, get_connection
+from django.core.mail.backends.base import BaseEmailBackend
+from django.utils import timezone
+from django.utils.html import strip_tags
+
+from .metricas import observar_externo
+from .models import CorreoPendiente
+
+
+def encolar_correo(asunto, destinatarios, cuerpo_html=None, cuerpo=None, remitente=None):
+    # guarda el correo en la bandeja de salida; si hay una transaccion abierta
+    # el correo queda confirmado junto con ella
+    if cuerpo is None:
+        cuerpo = strip_tags(cuerpo_html or "")
+    return CorreoPendiente.objects.create(
+        asunto=asunto,
+        cuerpo=cuerpo,
+        cuerpo_html=cuerpo_html,
+        remitente=remitente or settings.DEFAULT_FROM_EMAIL,
+        destinatarios=list(destinatarios),
+    )
+
+
+def encolar_correos(mensajes):
+    # mensajes: [(asunto, destinatarios, cuerpo_html)]; todos en un solo INSERT
+    remitente = settings.DEFAULT_FROM_EMAIL
+    return CorreoPendiente.objects.bulk_create([
+        CorreoPendiente(
+            asunto=asunto, cuerpo=strip_tags(cuerpo_html), cuerpo_html=cuerpo_html,
+            remitente=remitente, destinatarios=list(destinatarios),
+        )
+        for asunto, destinatarios, cuerpo_html in mensajes
+    ])
+
+
+def _armar_mensaje(correo, connection):
+    msg = EmailMultiAlternatives(
+        correo.asunto, correo.cuerpo, correo.remitente, correo.destinatarios, connection=connection
+    )
+    if correo.cuerpo_html:
+        msg.attach_alternative(correo.cuerpo_html, "text/html")
+    return msg
+
+
+def _registrar_fallo(correo, error, ahora):
+    # reintento con espera exponencial; al agotar los intentos queda como fallido
+    correo.intentos += 1
+    correo.ultimo_error = str(error)
+    max_intentos = getattr(settings, 'CORREO_MAX_INTENTOS', 5)
+    if correo.intentos >= max_intentos:
+        correo.estado = CorreoPendiente.FALLIDO
+    else:
+        correo.estado = CorreoPendiente.PENDIENTE
+        espera = getattr(settings, 'CORREO_BACKOFF_BASE', 30) * 2 ** (correo.intentos - 1)
+        espera = min(espera, getattr(settings, 'CORREO_BACKOFF_MAX', 3600))
+        correo.proximo_intento = ahora + timedelta(seconds=espera)
+
+
+def _reservar(lote, filtros, ahora):
+    # toma hasta `lote` correos con un UPDATE condicional (sin transaccion
+    # abierta durante el envio): pasan a "enviando" con una reserva propia que
+    # vence, para que otro worker los retome si este se cae a mitad del lote.
+    # La condicion se repite afuera de la subconsulta: si dos workers eligen los
+    # mismos ids, solo el primero que escribe se queda con cada fila
+    reserva = uuid.uuid4().hex
+    vence = ahora + timedelta(seconds=getattr(settings, 'CORREO_RESERVA', 300))
+    disponibles = CorreoPendiente.objects.filter(
+        estado__in=(CorreoPendiente.PENDIENTE, CorreoPendiente.ENVIANDO),
+        proximo_intento__lte=ahora,
+        **(filtros or {}),
+    )
+    tomados = disponibles.filter(
+        id__in=disponibles.order_by('id').values('id')[:lote]
+    ).update(estado=CorreoPendiente.ENVIANDO, reserva=reserva, proximo_intento=vence)
+    if not tomados:
+        return reserva, []
+    return reserva, list(CorreoPendiente.objects.filter(reserva=reserva).order_by('id'))
+
+
+def _guardar_resultados(correos, reserva):
+    # solo se escriben las filas que siguen reservadas por este worker
+    for correo in correos:
+        correo.reserva = None
+    CorreoPendiente.objects.filter(reserva=reserva).bulk_update(
+        correos, ['estado', 'intentos', 'proximo_intento', 'ultimo_error', 'enviado_en', 'reserva']
+    )
+
+
+class BackendDemora(BaseEmailBackend):
+    # servidor de correo local para benchmarks: no envia nada, solo tarda
+    # `demora` segundos por mensaje como un smtp real
+
+    def __init__(self, demora=0.0, **kwargs):
+        super().__init__(**kwargs)
+        self.demora = demora
+        self.enviados = 0
+
+    def send_messages(self, email_messages):
+        for _ in email_messages:
+            if self.demora:
+                time.sleep(self.demora)
+            self.enviados += 1
+        return len(email_messages)
+
+
+def enviar_pendientes(lote=50, connection=None, filtros=None):
+    # envia un lote de correos pendientes por una sola conexion smtp
+    # (`filtros` restringe la bandeja, por ejemplo a los correos de un benchmark).
+    # La reserva, el envio y el registro de resultados son pasos separados: la
+    # conexion smtp nunca se usa con una transaccion o un lock de la db abiertos.
+    # devuelve (enviados, fallidos)
+    enviados = fallidos = 0
+    ahora = timezone.now()
+
+    reserva, correos = _reservar(lote, filtros, ahora)
+    if not correos:
+        return 0, 0
+
+    connection = connection or get_connection(fail_silently=False)
+    try:
+        connection.open()
+    except Exception as e:
+        print(f"Error al conectar con el servidor de correo: {e}")
+        for correo in correos:
+            _registrar_fallo(correo, e, ahora)
+        _guardar_resultados(correos, reserva)
+        return 0, len(correos)
+
+    try:
+        for correo in correos:
+            inicio = time.perf_counter()
+            try:
+                connection.send_messages([_armar_mensaje(correo, connection)])
+            except Exception as e:
+                observar_externo('smtp', time.perf_counter() - inicio, error=True)
+                print(f"Error al enviar el correo {correo.id}: {e}")
+                _registrar_fallo(correo, e, ahora)
+                fallidos += 1
+            else:
+                observar_externo('smtp', time.perf_counter() - inicio)
+                correo.estado = CorreoPendiente.ENVIADO
+                correo.intentos += 1
+                correo.ultimo_error = None
+                correo.enviado_en = timezone.now()
+                enviados += 1
+    finally:
+        connection.close()
+
+    _guardar_resultados(correos, reserva)
+    return enviados, fallidos
@@ -0,0 +1,129 @@
+import re
+from collections import namedtuple
+
+from django import forms
+from django.core.exceptions import ValidationError
+from django.db import transaction
+
+from .forms import EDAD_MINIMA, ERROR_EDAD, ERROR_NOMBRE, NOMBRE_VALIDO, TestForm
+from .models import Consulta
+
+# envio del test por /api/test/: json validado con un esquema que se arma una
+# sola vez a partir de los campos de TestForm (mismos requeridos, opciones,
+# validadores y mensajes), sin instanciar el ModelForm en cada pedido
+
+VACIOS = (None, '', [], (), {})
+# como forms.IntegerField: acepta "20" y "20.0"
+_DECIMAL = re.compile(r'\.0*\s*$')
+
+Regla = namedtuple('Regla', 'campo tipo requerido opciones validadores modelo extra mensajes mensajes_modelo')
+
+
+def _extra_nombre(valor):
+    return None if NOMBRE_VALIDO.match(valor) else ERROR_NOMBRE
+
+
+def _extra_edad(valor):
+    return None if valor >= EDAD_MINIMA else ERROR_EDAD
+
+
+# las validaciones de clean_<campo> de TestForm
+EXTRAS = {'nombre': _extra_nombre, 'edad': _extra_edad}
+
+
+def compilar_esquema(form_class=TestForm):
+    reglas = []
+    modelo = form_class._meta.model
+    for campo, field in form_class.base_fields.items():
+        field_modelo = modelo._meta.get_field(campo)
+        if isinstance(field, forms.ChoiceField):
+            tipo = 'opcion'
+        elif isinstance(field, forms.IntegerField):
+            tipo = 'entero'
+        else:
+            tipo = 'texto'
+        opciones = None
+        if tipo == 'opcion':
+            opciones = frozenset(str(valor) for valor, _ in field.choices if valor not in VACIOS)
+        reglas.append(Regla(
+            campo=campo,
+            tipo=tipo,
+            requerido=field.required,
+            opciones=opciones,
+            validadores=tuple(field.validators),
+            # como _post_clean del ModelForm: los del modelo corren si el campo paso
+            modelo=tuple(field_modelo.validators),
+            extra=EXTRAS.get(campo),
+            mensajes=field.error_messages,
+            mensajes_modelo=field_modelo.error_messages,
+        ))
+    return tuple(reglas)
+
+
+ESQUEMA_TEST = compilar_esquema()
+
+
+def _convertir(regla, valor):
+    # devuelve (valor limpio, codigo de error o None)
+    if regla.tipo == 'entero':
+        if valor in VACIOS:
+            return None, None
+        try:
+            return int(_DECIMAL.sub('', str(valor).strip())), None
+        except ValueError:
+            return None, 'invalid'
+    if valor in VACIOS:
+        return '', None
+    valor = str(valor)
+    if regla.tipo == 'texto':
+        valor = valor.strip()
+    elif valor not in regla.opciones:
+        return valor, 'invalid_choice'
+    return valor, None
+
+
+def _validar(validadores, mensajes, valor, errores):
+    # como Field.run_validators: el mensaje propio del campo reemplaza al del validador
+    for validador in validadores:
+        try:
+            validador(valor)
+        except ValidationError as e:
+            if getattr(e, 'code', None) in mensajes:
+                e.message = mensajes[e.code]
+            errores.extend(e.messages)
+
+
+def validar_envio(datos, esquema=ESQUEMA_TEST):
+    # devuelve (limpios, errores) con errores como form.errors: {campo: [mensajes]}
+    if not isinstance(datos, dict):
+        return None, {'__all__': ["Se esperaba un objeto JSON."]}
+    limpios = {}
+    errores = {}
+    for regla in esquema:
+        valor, codigo = _convertir(regla, datos.get(regla.campo))
+        if codigo is None and valor in VACIOS and regla.requerido:
+            codigo = 'required'
+        if codigo is not None:
+            errores[regla.campo] = [str(regla.mensajes[codigo]) % {'value': valor}]
+            continue
+        mensajes = []
+        _validar(regla.validadores, regla.mensajes, valor, mensajes)
+        if not mensajes and regla.extra is not None:
+            mensaje = regla.extra(valor)
+            if mensaje:
+                mensajes.append(mensaje)
+        if not mensajes:
+            _validar(regla.modelo, regla.mensajes_modelo, valor, mensajes)
+        if mensajes:
+            errores[regla.campo] = mensajes
+        else:
+            limpios[regla.campo] = valor
+    return limpios, errores
+
+
+def guardar_envio(limpios, perfil):
+    # guarda por el camino normal (save): las señales de estadisticas.py y
+    # versiones.py ajustan EstadisticaDiaria y la version de la api. Dentro de
+    # otra transaccion (la de los correos) no abre un savepoint propio
+    with transaction.atomic(savepoint=False):
+        return Consulta.objects.create(**limpios, perfil_obtenido=perfil)
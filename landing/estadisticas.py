@@ -0,0 +1,136 @@
+from collections import Counter
+from datetime import timedelta
+
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, Max, Sum
+from django.db.models.functions import TruncDate
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+from .models import Consulta, EstadisticaDiaria
+
+
+def clave_estadistica(fecha, perfil, nivel):
+    # el dia se toma en la zona horaria del sitio
+    return timezone.localdate(fecha), perfil, nivel
+
+
+def aplicar_deltas(deltas):
+    # deltas: {(dia, perfil, nivel): +n / -n}; suma sobre la fila existente o la crea
+    ahora = timezone.now()
+    with transaction.atomic():
+        for (dia, perfil, nivel), delta in sorted(deltas.items()):
+            if not delta:
+                continue
+            filtro = EstadisticaDiaria.objects.filter(dia=dia, perfil=perfil, nivel=nivel)
+            if filtro.update(cantidad=F('cantidad') + delta, actualizado=ahora):
+                continue
+            try:
+                with transaction.atomic():
+                    EstadisticaDiaria.objects.create(
+                        dia=dia, perfil=perfil, nivel=nivel, cantidad=delta, actualizado=ahora
+                    )
+            except IntegrityError:
+                # otro worker creo la fila al mismo tiempo
+                filtro.update(cantidad=F('cantidad') + delta, actualizado=ahora)
+
+
+def sumar_consultas(consultas, signo=1):
+    # agrega varias consultas de una vez (por ejemplo despues de un bulk_create)
+    deltas = Counter()
+    for c in consultas:
+        deltas[clave_estadistica(c.fecha_consulta, c.perfil_obtenido, c.nivel)] += signo
+    aplicar_deltas(deltas)
+
+
+@receiver(pre_save, sender=Consulta)
+def _recordar_original(sender, instance, raw=False, **kwargs):
+    # lo que cuenta hoy en las estadisticas es la fila guardada, no lo que la
+    # instancia cargo en su momento (pudo cambiar despues, cargarse con only()
+    # o refrescarse): se lee por pk antes de cada UPDATE
+    instance._estadistica_original = None
+    if instance.pk is not None and not raw:
+        instance._estadistica_original = (
+            Consulta.objects.filter(pk=instance.pk)
+            .values_list('fecha_consulta', 'perfil_obtenido', 'nivel')
+            .first()
+        )
+
+
+@receiver(post_save, sender=Consulta)
+def _actualizar_al_guardar(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    actual = (instance.fecha_consulta, instance.perfil_obtenido, instance.nivel)
+    original = None if created else instance._estadistica_original
+
+    if original != actual:
+        deltas = Counter()
+        deltas[clave_estadistica(*actual)] += 1
+        if original is not None:
+            deltas[clave_estadistica(*original)] -= 1
+        aplicar_deltas(deltas)
+
+
+@receiver(post_delete, sender=Consulta)
+def _actualizar_al_borrar(sender, instance, **kwargs):
+    aplicar_deltas({clave_estadistica(instance.fecha_consulta, instance.perfil_obtenido, instance.nivel): -1})
+
+
+def reconstruir():
+    # recalcula toda la tabla a partir de Consulta (backfill o correccion)
+    filas = (
+        Consulta.objects
+        .annotate(dia=TruncDate('fecha_consulta', tzinfo=timezone.get_current_timezone()))
+        .values('dia', 'perfil_obtenido', 'nivel')
+        .annotate(cantidad=Count('id'))
+        .order_by()
+    )
+    ahora = timezone.now()
+    with transaction.atomic():
+        EstadisticaDiaria.objects.all().delete()
+        EstadisticaDiaria.objects.bulk_create(
+            (
+                EstadisticaDiaria(
+                    dia=f['dia'], perfil=f['perfil_obtenido'], nivel=f['nivel'],
+                    cantidad=f['cantidad'], actualizado=ahora,
+                )
+                for f in filas.iterator()
+            ),
+            batch_size=1000,
+        )
+    return EstadisticaDiaria.objects.count()
+
+
+def ultima_actualizacion():
+    return EstadisticaDiaria.objects.aggregate(ultima=Max('actualizado'))['ultima']
+
+
+def resumen(dias=30):
+    # totales para el dashboard; solo lee la tabla de estadisticas
+    qs = EstadisticaDiaria.objects.filter(cantidad__gt=0)
+
+    por_perfil = list(qs.values('perfil').annotate(total=Sum('cantidad')).order_by('-total', 'perfil'))
+    por_nivel = list(qs.values('nivel').annotate(total=Sum('cantidad')).order_by('-total', 'nivel'))
+    total = sum(p['total'] for p in por_perfil)
+
+    desde = timezone.localdate() - timedelta(days=dias - 1)
+    por_dia = list(
+        qs.filter(dia__gte=desde).values('dia').annotate(total=Sum('cantidad')).order_by('dia')
+    )
+
+    # porcentajes para las barras del dashboard
+    for fila in por_perfil + por_nivel:
+        fila['porcentaje'] = round(100 * fila['total'] / total, 1) if total else 0
+    maximo_dia = max((d['total'] for d in por_dia), default=0)
+    for fila in por_dia:
+        fila['porcentaje'] = round(100 * fila['total'] / maximo_dia, 1) if maximo_dia else 0
+
+    return {
+        'total': total,
+        'por_perfil': por_perfil,
+        'por_nivel': por_nivel,
+        'por_dia': por_dia,
+        'dias': dias,
+    }
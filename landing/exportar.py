@@ -0,0 +1,92 @@
+import csv
+import io
+import json
+import time
+import zlib
+
+from asgiref.sync import sync_to_async
+
+from .models import Consulta
+
+COLUMNAS_EXPORTACION = (
+    'id', 'fecha_consulta', 'nombre', 'edad', 'correo', 'nivel',
+    'q1', 'q2', 'q3', 'q4', 'q5', 'perfil_obtenido', 'cursos_interes',
+)
+FORMATOS = ('csv', 'ndjson')
+
+
+def _filas(filtros, lote):
+    # cursor del lado del servidor: solo hay `lote` filas en memoria a la vez
+    return (
+        Consulta.objects
+        .filter(**filtros)
+        .order_by('id')
+        .values_list(*COLUMNAS_EXPORTACION)
+        .iterator(chunk_size=lote)
+    )
+
+
+def _bloques_csv(filas, lote):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(COLUMNAS_EXPORTACION)
+    pendientes = 0
+    for fila in filas:
+        writer.writerow((fila[0], fila[1].isoformat(), *fila[2:]))
+        pendientes += 1
+        if pendientes >= lote:
+            yield buffer.getvalue(), pendientes
+            buffer.seek(0)
+            buffer.truncate()
+            pendientes = 0
+    yield buffer.getvalue(), pendientes
+
+
+def _bloques_ndjson(filas, lote):
+    partes = []
+    for fila in filas:
+        registro = dict(zip(COLUMNAS_EXPORTACION, fila))
+        registro['fecha_consulta'] = fila[1].isoformat()
+        partes.append(json.dumps(registro, ensure_ascii=False))
+        if len(partes) >= lote:
+            yield "\n".join(partes) + "\n", len(partes)
+            partes = []
+    yield "\n".join(partes) + ("\n" if partes else ""), len(partes)
+
+
+def generar_exportacion(filtros, formato='csv', comprimir=False, lote=2000, metricas=None):
+    # genera la exportacion en bloques de bytes; con comprimir=True sale en gzip.
+    # `metricas` (dict opcional) recibe filas, bytes y segundos al terminar
+    if formato not in FORMATOS:
+        raise ValueError(f"Formato desconocido: {formato}")
+    bloques = _bloques_csv if formato == 'csv' else _bloques_ndjson
+    compresor = zlib.compressobj(6, zlib.DEFLATED, 31) if comprimir else None
+
+    inicio = time.perf_counter()
+    total_filas = total_bytes = 0
+    for texto, cantidad in bloques(_filas(filtros, lote), lote):
+        total_filas += cantidad
+        datos = texto.encode('utf-8')
+        if compresor:
+            datos = compresor.compress(datos)
+        if datos:
+            total_bytes += len(datos)
+            yield datos
+    if compresor:
+        datos = compresor.flush()
+        total_bytes += len(datos)
+        yield datos
+
+    if metricas is not None:
+        metricas.update(filas=total_filas, bytes=total_bytes, segundos=time.perf_counter() - inicio)
+
+
+async def aiterar(bloques):
+    # bajo asgi django junta en memoria un iterador sincronico antes de mandarlo;
+    # este lo recorre de a un bloque por vez en el hilo de la vista
+    # (thread_sensitive: el cursor del lado del servidor queda en la misma conexion)
+    siguiente = sync_to_async(next, thread_sensitive=True)
+    bloques = iter(bloques)
+    fin = object()
+    while (bloque := await siguiente(bloques, fin)) is not fin:
+        yield bloque
@@ -3,6 +3,12 @@ from django.core.exceptions import ValidationError
 import re
 from .models import Consulta
 
+# reglas propias del test; el esquema de /api/test/ (landing/envio.py) usa las mismas
+NOMBRE_VALIDO = re.compile(r'^[A-Za-zÁÉÍÓÚáéíóúÑñ\s]+$')
+EDAD_MINIMA = 16
+ERROR_NOMBRE = 'El nombre solo debe contener letras y espacios.'
+ERROR_EDAD = f'Debes tener al menos {EDAD_MINIMA} años para realizar el test.'
+
 NIVELES = [
     ('Primario', 'Primario'),
     ('Secundario', 'Secundario'),
@@ -118,15 +124,14 @@ class TestForm(forms.ModelForm):
 
     def clean_nombre(self):
         nombre = self.cleaned_data.get('nombre')
-        patron = re.compile(r'^[A-Za-zÁÉÍÓÚáéíóúÑñ\s]+$')
-        if nombre and not patron.match(nombre):
-            raise forms.ValidationError('El nombre solo debe contener letras y espacios.')
+        if nombre and not NOMBRE_VALIDO.match(nombre):
+            raise forms.ValidationError(ERROR_NOMBRE)
         return nombre
 
     def clean_edad(self):
         edad = self.cleaned_data.get('edad')
-        if edad is not None and edad < 16:
-            raise forms.ValidationError('Debes tener al menos 16 años para realizar el test.')
+        if edad is not None and edad < EDAD_MINIMA:
+            raise forms.ValidationError(ERROR_EDAD)
         return edad
 
 
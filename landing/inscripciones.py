@@ -0,0 +1,392 @@
+import atexit
+import glob
+import json
+import logging
+import os
+import threading
+import time
+import uuid
+
+from django.conf import settings
+from django.core import signing
+from django.db import connection, transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from .models import Consulta, Inscripcion
+from .versiones import incrementar_version
+
+try:
+    import fcntl
+except ImportError:  # windows: sin diario (no hay flock)
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+SALT_CONSULTA = 'landing.inscripcion.consulta'
+
+
+def firmar_consulta(consulta_id):
+    # el resultado del test lleva el id firmado; /inscribir/ lo usa para
+    # vincular la inscripcion sin consultar la db
+    return signing.dumps(consulta_id, salt=SALT_CONSULTA)
+
+
+def consulta_firmada(token):
+    if not token:
+        return None
+    try:
+        return int(signing.loads(
+            token, salt=SALT_CONSULTA,
+            max_age=getattr(settings, 'INSCRIPCION_CONSULTA_MAX_EDAD', 60 * 60 * 24),
+        ))
+    except (signing.BadSignature, TypeError, ValueError):
+        return None
+
+
+def nuevo_registro(nombre, correo, cursos, consulta_id=None):
+    # lo que se guarda en el buffer y en el diario: solo tipos json
+    return {
+        'clave': uuid.uuid4().hex,
+        'consulta_id': consulta_id,
+        'nombre': (nombre or '')[:100],
+        'correo': (correo or '')[:254],
+        'cursos': list(cursos),
+        'creada': timezone.now().isoformat(),
+    }
+
+
+def escribir(registros):
+    # escribe un lote en una transaccion: las inscripciones y los cursos_interes
+    # de sus consultas. Es idempotente (clave unica), asi que un lote repetido
+    # despues de una caida no duplica filas
+    if not registros:
+        return 0
+    registros = sorted(registros, key=lambda r: r['creada'])
+    ids = {r['consulta_id'] for r in registros if r['consulta_id']}
+
+    with transaction.atomic():
+        # una consulta borrada mientras tanto deja la inscripcion sin vincular
+        existentes = set(Consulta.objects.filter(id__in=ids).values_list('id', flat=True)) if ids else set()
+        Inscripcion.objects.bulk_create(
+            [
+                Inscripcion(
+                    clave=uuid.UUID(r['clave']),
+                    consulta_id=r['consulta_id'] if r['consulta_id'] in existentes else None,
+                    nombre=r['nombre'],
+                    correo=r['correo'],
+                    cursos=r['cursos'],
+                    creada=parse_datetime(r['creada']),
+                )
+                for r in registros
+            ],
+            batch_size=500,
+            ignore_conflicts=True,
+        )
+
+        # la ultima inscripcion de cada consulta define sus cursos de interes
+        cursos = {
+            r['consulta_id']: ", ".join(r['cursos'])
+            for r in registros if r['consulta_id'] in existentes and r['cursos']
+        }
+        if cursos:
+            # bulk_update no dispara señales: la version de la api se sube a mano
+            Consulta.objects.bulk_update(
+                [Consulta(id=id_, cursos_interes=texto) for id_, texto in cursos.items()],
+                ['cursos_interes'],
+                batch_size=500,
+            )
+            incrementar_version()
+    return len(registros)
+
+
+class BufferInscripciones:
+    # write-behind de inscripciones: la request agrega el registro a memoria (y
+    # al diario en disco) y un hilo lo escribe con bulk_create cuando se juntan
+    # `lote` registros o el mas viejo lleva `intervalo` segundos esperando.
+    #
+    # Ante una caida del proceso, lo que estaba en memoria sigue en el diario:
+    # cada proceso escribe en <directorio>/<id>.<n>.diario y tiene tomado
+    # <id>.lock con flock; el proceso que arranca despues toma los diarios cuyo
+    # lock quedo libre y los vuelve a encolar. Si el buffer esta lleno, el hilo
+    # no corre o el diario falla, la inscripcion se escribe en el momento.
+
+    def __init__(self, lote=50, intervalo=0.5, maximo=5000, directorio=None,
+                 fsync=True, reintento=1.0):
+        self.lote = lote
+        self.intervalo = intervalo
+        self.maximo = maximo
+        self.directorio = directorio if fcntl else None
+        self.fsync = fsync
+        self.reintento = reintento
+
+        self._cond = threading.Condition()
+        self._pendientes = []
+        self._desde = None
+        self._hilo = None
+        self._cerrado = False
+
+        # diario de este proceso: segmento abierto y segmentos ya rotados cuyos
+        # registros siguen pendientes
+        self._id = f"{os.getpid()}-{uuid.uuid4().hex[:8]}"
+        self._lock = None
+        self._archivo = None
+        self._segmento = 0
+        self._cerrados = []
+
+        self.stats = {
+            'encoladas': 0, 'sincronicas': 0, 'escritas': 0, 'lotes': 0,
+            'errores': 0, 'recuperadas': 0,
+        }
+
+    # --- diario ---
+
+    def _ruta(self, segmento):
+        return os.path.join(self.directorio, f"{self._id}.{segmento}.diario")
+
+    def _abrir_diario(self):
+        if not self.directorio:
+            return
+        os.makedirs(self.directorio, exist_ok=True)
+        if self._lock is None:
+            self._lock = open(os.path.join(self.directorio, f"{self._id}.lock"), 'w')
+            fcntl.flock(self._lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        self._segmento += 1
+        self._archivo = open(self._ruta(self._segmento), 'a', encoding='utf-8')
+
+    def _anotar(self, registro):
+        # se llama con self._cond tomado; devuelve un duplicado del descriptor
+        # para hacer el fsync despues de soltar el lock (None si no hace falta)
+        if self._archivo is None:
+            return None
+        self._archivo.write(json.dumps(registro, ensure_ascii=False) + "\n")
+        self._archivo.flush()
+        return os.dup(self._archivo.fileno()) if self.fsync else None
+
+    @staticmethod
+    def _sincronizar(fd):
+        # fsync sin el lock: las otras requests siguen anotando mientras el disco
+        # confirma. El duplicado sigue valido aunque el segmento se rote o se borre
+        if fd is None:
+            return
+        try:
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+
+    def _rotar(self):
+        # cierra el segmento actual (sus registros pasan al lote) y abre otro
+        if self._archivo is None:
+            return []
+        self._archivo.close()
+        cerrado = self._archivo.name
+        self._archivo = None
+        self._abrir_diario()
+        return [cerrado]
+
+    @staticmethod
+    def _leer(ruta):
+        registros = []
+        try:
+            with open(ruta, encoding='utf-8') as f:
+                for linea in f:
+                    try:
+                        registros.append(json.loads(linea))
+                    except ValueError:
+                        # ultima linea cortada por la caida
+                        logger.warning("Línea inválida en %s: %r", ruta, linea[:80])
+        except FileNotFoundError:
+            pass
+        return registros
+
+    def _recuperar(self):
+        # encola los diarios de procesos que ya no estan (su lock quedo libre)
+        if not self.directorio:
+            return
+        for ruta_lock in glob.glob(os.path.join(self.directorio, '*.lock')):
+            propio = os.path.basename(ruta_lock)[:-len('.lock')]
+            if propio == self._id:
+                continue
+            try:
+                with open(ruta_lock, 'a') as lock:
+                    fcntl.flock(lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                    for ruta in sorted(glob.glob(os.path.join(self.directorio, f"{propio}.*.diario"))):
+                        registros = self._leer(ruta)
+                        self._pendientes.extend(registros)
+                        self._cerrados.append(ruta)
+                        self.stats['recuperadas'] += len(registros)
+                    os.remove(ruta_lock)
+            except (BlockingIOError, FileNotFoundError):
+                # el proceso sigue vivo u otro proceso ya lo recupero
+                continue
+        if self._pendientes:
+            self._desde = time.monotonic()
+            logger.warning("Recuperadas %d inscripciones de diarios anteriores.", len(self._pendientes))
+
+    # --- hilo ---
+
+    def _iniciar(self):
+        # se llama con self._cond tomado
+        if self._hilo is not None and self._hilo.is_alive():
+            return True
+        if self._cerrado:
+            return False
+        if self._hilo is None:
+            try:
+                self._abrir_diario()
+                self._recuperar()
+            except OSError as e:
+                logger.warning("Diario de inscripciones deshabilitado: %s", e)
+                self._archivo = None
+                self.directorio = None
+            atexit.register(self.cerrar)
+        self._hilo = threading.Thread(target=self._bucle, name='inscripciones', daemon=True)
+        self._hilo.start()
+        return True
+
+    def _esperar_lote(self):
+        # devuelve False cuando el buffer se cierra
+        with self._cond:
+            while not self._cerrado:
+                if len(self._pendientes) >= self.lote:
+                    return True
+                if self._pendientes:
+                    restante = self._desde + self.intervalo - time.monotonic()
+                    if restante <= 0:
+                        return True
+                    self._cond.wait(restante)
+                else:
+                    self._cond.wait()
+            return False
+
+    def _bucle(self):
+        while self._esperar_lote():
+            try:
+                self.vaciar()
+            except Exception:
+                # los registros volvieron al buffer; se reintenta despues de una pausa
+                logger.exception("Error al escribir inscripciones; se reintenta")
+                time.sleep(self.reintento)
+            finally:
+                # la conexion de este hilo no se reutiliza entre lotes
+                connection.close()
+
+    # --- api ---
+
+    def iniciar(self):
+        # al cargar la aplicacion: abre el diario y recupera los de procesos
+        # caidos sin esperar a la primera inscripcion
+        with self._cond:
+            return self._iniciar()
+
+    def agregar(self, nombre, correo, cursos, consulta_id=None):
+        # devuelve True si quedo en el buffer y False si se escribio en el momento
+        registro = nuevo_registro(nombre, correo, cursos, consulta_id)
+        encolado = False
+        with self._cond:
+            if len(self._pendientes) < self.maximo and self._iniciar():
+                try:
+                    fd = self._anotar(registro)
+                except OSError as e:
+                    logger.warning("No se pudo anotar la inscripción en el diario: %s", e)
+                else:
+                    if not self._pendientes:
+                        self._desde = time.monotonic()
+                    self._pendientes.append(registro)
+                    self.stats['encoladas'] += 1
+                    if len(self._pendientes) >= self.lote:
+                        self._cond.notify()
+                    encolado = True
+            if not encolado:
+                self.stats['sincronicas'] += 1
+        if encolado:
+            try:
+                self._sincronizar(fd)
+            except OSError as e:
+                # sigue en el buffer y se escribe igual; solo no sobreviviria a una caida
+                logger.warning("No se pudo confirmar el diario de inscripciones: %s", e)
+            return True
+        escribir([registro])
+        return False
+
+    def vaciar(self):
+        # escribe todo lo pendiente; si falla, los registros vuelven al buffer
+        # y sus segmentos del diario se conservan
+        with self._cond:
+            registros, self._pendientes = self._pendientes, []
+            self._desde = None
+            cerrados = []
+            if registros:
+                cerrados, self._cerrados = self._cerrados + self._rotar(), []
+        if not registros:
+            return 0
+        try:
+            escribir(registros)
+        except Exception:
+            with self._cond:
+                self._pendientes[:0] = registros
+                self._desde = time.monotonic()
+                self._cerrados[:0] = cerrados
+                self.stats['errores'] += 1
+            raise
+        for ruta in cerrados:
+            try:
+                os.remove(ruta)
+            except FileNotFoundError:
+                pass
+        with self._cond:
+            self.stats['escritas'] += len(registros)
+            self.stats['lotes'] += 1
+        return len(registros)
+
+    def cerrar(self, timeout=10):
+        # al terminar el proceso: detiene el hilo y escribe lo que quede
+        with self._cond:
+            self._cerrado = True
+            self._cond.notify_all()
+            hilo = self._hilo
+        if hilo is not None and hilo is not threading.current_thread():
+            hilo.join(timeout)
+        try:
+            self.vaciar()
+        except Exception:
+            logger.exception("Inscripciones sin escribir al cerrar; quedan en el diario")
+            return
+        with self._cond:
+            if self._archivo is not None:
+                self._archivo.close()
+                os.remove(self._archivo.name)
+                self._archivo = None
+            if self._lock is not None:
+                os.remove(self._lock.name)
+                self._lock.close()
+                self._lock = None
+
+    def resumen(self):
+        with self._cond:
+            return dict(self.stats, pendientes=len(self._pendientes))
+
+
+buffer_inscripciones = BufferInscripciones(
+    lote=getattr(settings, 'INSCRIPCIONES_LOTE', 50),
+    intervalo=getattr(settings, 'INSCRIPCIONES_INTERVALO_MS', 500) / 1000,
+    maximo=getattr(settings, 'INSCRIPCIONES_BUFFER_MAX', 5000),
+    directorio=getattr(settings, 'INSCRIPCIONES_DIARIO', None),
+    fsync=getattr(settings, 'INSCRIPCIONES_FSYNC', True),
+)
+
+
+def iniciar():
+    # lo llaman asgi.py y wsgi.py al cargar la aplicacion: un proceso nuevo
+    # (reinicio o deploy) escribe enseguida lo que quedo en el diario
+    if getattr(settings, 'INSCRIPCIONES_WRITE_BEHIND', True):
+        buffer_inscripciones.iniciar()
+
+
+def registrar_inscripcion(nombre, correo, cursos, consulta_id=None):
+    # con INSCRIPCIONES_WRITE_BEHIND=False (o fuera de un servidor) se escribe
+    # en el momento, como una alta comun
+    if getattr(settings, 'INSCRIPCIONES_WRITE_BEHIND', True):
+        return buffer_inscripciones.agregar(nombre, correo, cursos, consulta_id)
+    escribir([nuevo_registro(nombre, correo, cursos, consulta_id)])
+    return False
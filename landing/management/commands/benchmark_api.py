@@ -0,0 +1,109 @@
+import random
+import statistics
+import time
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.test import Client
+from rest_framework.renderers import JSONRenderer
+
+from landing.models import Consulta
+from landing.puntaje import PERFILES
+from landing.serializers import ConsultaSerializer
+
+
+class _Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = (
+        "Mide la latencia de GET /api/consultas/ sobre una tabla sintética. "
+        "Las filas se insertan en una transacción que se descarta al terminar."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--filas', type=int, default=100_000)
+        parser.add_argument('--repeticiones', type=int, default=30)
+        parser.add_argument('--page-size', type=int, default=100)
+        parser.add_argument('--sin-anterior', action='store_true',
+                            help="No mide el listado completo sin paginar (lento con muchas filas).")
+
+    def handle(self, *args, **options):
+        try:
+            with transaction.atomic():
+                self._sembrar(options['filas'])
+                self._medir(options)
+                raise _Rollback
+        except _Rollback:
+            pass
+
+    def _sembrar(self, cantidad):
+        inicio = time.perf_counter()
+        rng = random.Random(0)
+        Consulta.objects.bulk_create(
+            (
+                Consulta(
+                    nombre=f"Bench {i}", edad=rng.randint(15, 60), correo=f"bench{i}@example.com",
+                    nivel="Universitario", q1=rng.choice(PERFILES), q2=rng.choice(PERFILES),
+                    q3=rng.choice(PERFILES), q4=rng.choice(PERFILES), q5=rng.choice(PERFILES),
+                    perfil_obtenido=rng.choice(PERFILES),
+                )
+                for i in range(cantidad)
+            ),
+            batch_size=5000,
+        )
+        self.stdout.write(f"{cantidad} filas sembradas en {time.perf_counter() - inicio:.1f}s")
+
+    def _tiempos(self, funcion, repeticiones):
+        muestras = []
+        for _ in range(repeticiones):
+            inicio = time.perf_counter()
+            funcion()
+            muestras.append((time.perf_counter() - inicio) * 1000)
+        muestras.sort()
+        return statistics.median(muestras), muestras[int(0.95 * (len(muestras) - 1))]
+
+    def _reportar(self, nombre, tiempos):
+        p50, p95 = tiempos
+        self.stdout.write(f"  {nombre:<42} p50 {p50:8.2f} ms   p95 {p95:8.2f} ms")
+
+    def _medir(self, options):
+        # la api es solo para staff; el usuario se descarta con el resto de la transaccion
+        cliente = Client(HTTP_HOST='localhost')
+        cliente.force_login(User.objects.create_user('bench-api', is_staff=True))
+        repeticiones = options['repeticiones']
+        url = f"/api/consultas/?page_size={options['page_size']}"
+
+        if not options['sin_anterior']:
+            # lo que hacia el listado antes: todas las filas por ModelSerializer
+            def anterior():
+                qs = Consulta.objects.order_by('-fecha_consulta')
+                JSONRenderer().render(ConsultaSerializer(qs, many=True).data)
+            self._reportar("anterior (sin paginar, ModelSerializer)", self._tiempos(anterior, 3))
+
+        # misma pagina armada con el serializer completo, para aislar el camino rapido
+        def pagina_serializer():
+            qs = Consulta.objects.order_by('-fecha_consulta', '-id')[:options['page_size']]
+            JSONRenderer().render(ConsultaSerializer(qs, many=True).data)
+        self._reportar("página con ModelSerializer", self._tiempos(pagina_serializer, repeticiones))
+
+        self._reportar("primera página", self._tiempos(lambda: cliente.get(url), repeticiones))
+
+        # una pagina profunda: el cursor filtra por fecha, no hace OFFSET
+        siguiente = url
+        for _ in range(50):
+            siguiente = cliente.get(siguiente).json()['next']
+        self._reportar("página 51 (cursor)", self._tiempos(lambda: cliente.get(siguiente), repeticiones))
+
+        campos = url + "&fields=id,nombre,perfil_obtenido"
+        self._reportar("primera página con ?fields=", self._tiempos(lambda: cliente.get(campos), repeticiones))
+
+        etag = cliente.get(url)['ETag']
+        respuesta = cliente.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert respuesta.status_code == 304, respuesta.status_code
+        self._reportar(
+            "revalidación con If-None-Match (304)",
+            self._tiempos(lambda: cliente.get(url, HTTP_IF_NONE_MATCH=etag), repeticiones),
+        )
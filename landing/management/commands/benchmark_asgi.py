@@ -0,0 +1,73 @@
+import asyncio
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand
+from django.test import AsyncClient, Client
+
+from landing.models import TraduccionCache
+from landing.traduccion import TraductorStub, cache_traducciones, traductor_actual, usar_traductor
+
+URL = "/api/traducir/"
+
+
+class Command(BaseCommand):
+    help = (
+        "Compara el throughput de pedidos concurrentes a /api/traducir/ servidos por el "
+        "handler WSGI (un hilo por pedido, como gunicorn) y por el handler ASGI (un event loop). "
+        "El traductor se reemplaza por un stub con demora para simular la api externa."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--pedidos', type=int, default=64)
+        parser.add_argument('--concurrencia', type=int, default=32,
+                            help="Pedidos simultáneos del lado del cliente.")
+        parser.add_argument('--hilos-wsgi', type=int, default=1,
+                            help="Hilos del worker WSGI (gunicorn --workers 1 usa uno).")
+        parser.add_argument('--demora', type=float, default=0.2,
+                            help="Latencia simulada del traductor, en segundos.")
+
+    def handle(self, *args, **options):
+        anterior = traductor_actual()
+        usar_traductor(TraductorStub(demora=options['demora']))
+        prefijo = f"bench-{uuid.uuid4().hex[:8]}"
+        try:
+            wsgi = self._wsgi(options, f"{prefijo}-wsgi")
+            asgi = asyncio.run(self._asgi(options, f"{prefijo}-asgi"))
+        finally:
+            usar_traductor(anterior)
+            cache_traducciones.limpiar_memoria()
+            TraduccionCache.objects.filter(texto__startswith=prefijo).delete()
+
+        for nombre, (segundos, codigos) in (("WSGI", wsgi), ("ASGI", asgi)):
+            self.stdout.write(
+                f"{nombre}: {options['pedidos']} pedidos en {segundos:.2f}s "
+                f"({options['pedidos'] / segundos:.1f} pedidos/s), códigos {sorted(set(codigos))}"
+            )
+        self.stdout.write(f"ASGI/WSGI: {wsgi[0] / asgi[0]:.1f}x")
+
+    def _wsgi(self, options, prefijo):
+        # limita los pedidos en curso a los hilos del worker, como un servidor WSGI
+        cliente = Client(HTTP_HOST='localhost')
+
+        def pedir(i):
+            return cliente.get(URL, {'texto': f"{prefijo} {i}"}).status_code
+
+        inicio = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=min(options['hilos_wsgi'], options['concurrencia'])) as pool:
+            codigos = list(pool.map(pedir, range(options['pedidos'])))
+        return time.perf_counter() - inicio, codigos
+
+    async def _asgi(self, options, prefijo):
+        cliente = AsyncClient(headers={'host': 'localhost'})
+        limite = asyncio.Semaphore(options['concurrencia'])
+
+        async def pedir(i):
+            async with limite:
+                respuesta = await cliente.get(URL, {'texto': f"{prefijo} {i}"})
+                return respuesta.status_code
+
+        inicio = time.perf_counter()
+        codigos = await asyncio.gather(*(pedir(i) for i in range(options['pedidos'])))
+        return time.perf_counter() - inicio, codigos
@@ -0,0 +1,300 @@
+import asyncio
+import json
+import os
+import platform
+import random
+import string
+import subprocess
+import threading
+import time
+from collections import Counter
+
+import django
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DatabaseError, connection
+from django.test import AsyncClient
+from django.utils import timezone
+
+from landing.correos import BackendDemora, enviar_pendientes
+from landing.forms import NIVELES, PREGUNTA1, PREGUNTA2, PREGUNTA3, PREGUNTA4, PREGUNTA5
+from landing.inscripciones import buffer_inscripciones
+from landing.models import Consulta, CorreoPendiente, Inscripcion, TraduccionCache
+from landing.resultados import CURSOS
+from landing.traduccion import TraductorStub, cache_traducciones, traductor_actual, usar_traductor
+
+ESCENARIOS = ('index', 'test_json', 'index_html', 'inscribir', 'contacto', 'api', 'traducir')
+AJAX = {'x-requested-with': 'XMLHttpRequest'}
+# las traducciones del stub se reconocen (y se borran) por este prefijo
+FORMATO_TRADUCCION = "[bench:{idioma}] {texto}"
+
+
+def _commit():
+    if settings.VERSION_DESPLIEGUE != 'dev':
+        return settings.VERSION_DESPLIEGUE
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short=12', 'HEAD'], capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return 'dev'
+
+
+def _percentiles(duraciones):
+    orden = sorted(duraciones)
+
+    def p(q):
+        return round(orden[round(q * (len(orden) - 1))] * 1000, 2) if orden else 0.0
+
+    return {
+        'p50': p(0.5), 'p95': p(0.95), 'p99': p(0.99), 'max': p(1),
+        'promedio': round(sum(orden) / len(orden) * 1000, 2) if orden else 0.0,
+    }
+
+
+class Command(BaseCommand):
+    help = (
+        "Prueba de carga del envío del test y sus vecinos (index ajax y html, /api/test/, inscribir, "
+        "contacto, api) a la concurrencia pedida, sobre el handler ASGI en el proceso. "
+        "El traductor y el servidor de correo se reemplazan por versiones locales con "
+        "demora configurable. Deja un JSON con throughput, p50/p95/p99 y errores para "
+        "comparar entre commits; los datos creados se borran al terminar."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--escenarios', default=",".join(ESCENARIOS),
+                            help=f"Separados por coma, entre: {', '.join(ESCENARIOS)}.")
+        parser.add_argument('--pedidos', type=int, default=200, help="Pedidos medidos por escenario.")
+        parser.add_argument('--concurrencia', type=int, default=16, help="Clientes simultáneos.")
+        parser.add_argument('--calentamiento', type=int, default=10,
+                            help="Pedidos sin medir antes de cada escenario.")
+        parser.add_argument('--traduccion-demora', type=float, default=0.2,
+                            help="Latencia del traductor local, en segundos.")
+        parser.add_argument('--smtp-demora', type=float, default=0.05,
+                            help="Latencia por mensaje del servidor de correo local, en segundos.")
+        parser.add_argument('--semilla', type=int, default=1)
+        parser.add_argument('--salida', default=None,
+                            help="Archivo JSON del resultado (por defecto carga-<commit>.json).")
+        parser.add_argument('--comparar', default=None,
+                            help="JSON de una corrida anterior para mostrar las diferencias.")
+
+    def handle(self, *args, **options):
+        escenarios = [e.strip() for e in options['escenarios'].split(",") if e.strip()]
+        desconocidos = set(escenarios) - set(ESCENARIOS)
+        if desconocidos:
+            raise CommandError(f"Escenarios desconocidos: {', '.join(sorted(desconocidos))}")
+        anterior = None
+        if options['comparar']:
+            with open(options['comparar'], encoding='utf-8') as f:
+                anterior = json.load(f)
+
+        # nombre solo con letras (lo exige el formulario) que marca lo creado por esta corrida
+        rng = random.Random(options['semilla'])
+        marca = "Bench " + "".join(random.choice(string.ascii_letters) for _ in range(10))
+
+        traductor_anterior = traductor_actual()
+        usar_traductor(TraductorStub(demora=options['traduccion_demora'], formato=FORMATO_TRADUCCION))
+        cache_traducciones.limpiar_memoria()
+        # la bandeja se vacia durante la carga, como con el worker en produccion
+        correo = _VaciadoCorreos(marca, options['smtp_demora'])
+        correo.start()
+
+        # /api/consultas/ es solo para staff: ese escenario pide con un usuario de la corrida
+        staff = User.objects.create_user(marca.replace(" ", "-"), is_staff=True)
+
+        resultados = {}
+        try:
+            for nombre in escenarios:
+                pedir, datos = self._escenario(nombre, marca, rng, options['pedidos'] + options['calentamiento'])
+                usuario = staff if nombre == 'api' else None
+                resultados[nombre] = asyncio.run(self._correr(pedir, datos, options, usuario))
+                self._mostrar(nombre, resultados[nombre], anterior)
+        finally:
+            correo.detener()
+            usar_traductor(traductor_anterior)
+            cache_traducciones.limpiar_memoria()
+            self._limpiar(marca)
+
+        commit = _commit()
+        informe = {
+            'meta': {
+                'commit': commit,
+                'fecha': timezone.now().isoformat(),
+                'python': platform.python_version(),
+                'django': django.get_version(),
+                'db': connection.vendor,
+                'cpus': os.cpu_count(),
+            },
+            'parametros': {
+                k: options[k] for k in (
+                    'pedidos', 'concurrencia', 'calentamiento', 'traduccion_demora', 'smtp_demora', 'semilla',
+                )
+            },
+            'escenarios': resultados,
+            'correos': correo.resumen(),
+        }
+        salida = options['salida'] or f"carga-{commit}.json"
+        with open(salida, 'w', encoding='utf-8') as f:
+            json.dump(informe, f, ensure_ascii=False, indent=2)
+        self.stdout.write(
+            f"Correos vaciados por el servidor local: {informe['correos']['enviados']} "
+            f"({informe['correos']['por_segundo']}/s)"
+        )
+        self.stdout.write(self.style.SUCCESS(f"Resultado en {salida}"))
+
+    def _escenario(self, nombre, marca, rng, cantidad):
+        # devuelve (funcion que hace el pedido i, datos de cada pedido); los datos
+        # se generan antes de medir para que la corrida sea reproducible
+        preguntas = [[valor for valor, _ in p] for p in (PREGUNTA1, PREGUNTA2, PREGUNTA3, PREGUNTA4, PREGUNTA5)]
+        cursos = sorted({c for lista in CURSOS.values() for c in lista})
+
+        def correo(i):
+            return f"bench.{i}@example.com"
+
+        def test(i):
+            return {
+                'nombre': marca, 'edad': rng.randint(16, 60), 'correo': correo(i),
+                'nivel': rng.choice(NIVELES)[0],
+                **{f"q{n}": rng.choice(opciones) for n, opciones in enumerate(preguntas, 1)},
+            }
+
+        if nombre in ('index', 'index_html'):
+            datos = [test(i) for i in range(cantidad)]
+            headers = AJAX if nombre == 'index' else {}
+            return (lambda c, d: c.post('/', d, headers=headers)), datos
+        if nombre == 'test_json':
+            datos = [test(i) for i in range(cantidad)]
+            return (lambda c, d: c.post('/api/test/', d, content_type='application/json')), datos
+        if nombre == 'inscribir':
+            datos = [
+                {'nombre': marca, 'correo': correo(i), 'cursos': rng.sample(cursos, 2)} for i in range(cantidad)
+            ]
+            return (lambda c, d: c.post('/inscribir/', d, headers=AJAX)), datos
+        if nombre == 'contacto':
+            datos = [
+                {'nombre': marca, 'correo': correo(i), 'mensaje': "Mensaje de la prueba de carga."}
+                for i in range(cantidad)
+            ]
+            return (lambda c, d: c.post('/contacto/', d)), datos
+        if nombre == 'api':
+            datos = [{'page_size': 50}] * cantidad
+            return (lambda c, d: c.get('/api/consultas/', d)), datos
+        # traducir: la mitad de los textos se repite (hits del cache)
+        datos = [{'texto': f"{marca} texto {rng.randrange(cantidad // 2 or 1)}"} for _ in range(cantidad)]
+        return (lambda c, d: c.get('/api/traducir/', d)), datos
+
+    async def _correr(self, pedir, datos, options, usuario=None):
+        # `concurrencia` clientes piden uno detras de otro hasta agotar los datos
+        cliente = AsyncClient(headers={'host': 'localhost'})
+        if usuario is not None:
+            await cliente.aforce_login(usuario)
+        calentamiento = options['calentamiento']
+        for d in datos[:calentamiento]:
+            await pedir(cliente, d)
+
+        pendientes = iter(datos[calentamiento:])
+        duraciones = []
+        codigos = Counter()
+
+        async def trabajador():
+            for d in pendientes:
+                inicio = time.perf_counter()
+                try:
+                    codigo = (await pedir(cliente, d)).status_code
+                except Exception:
+                    codigo = 'excepcion'
+                duraciones.append(time.perf_counter() - inicio)
+                codigos[codigo] += 1
+
+        inicio = time.perf_counter()
+        # cpu de todo el proceso (event loop, hilos de sync_to_async y el de los correos)
+        cpu = time.process_time()
+        await asyncio.gather(*(trabajador() for _ in range(options['concurrencia'])))
+        cpu = time.process_time() - cpu
+        segundos = time.perf_counter() - inicio
+        if usuario is not None:
+            # borra la sesion de la corrida
+            await cliente.alogout()
+
+        errores = sum(n for codigo, n in codigos.items() if codigo == 'excepcion' or codigo >= 400)
+        return {
+            'pedidos': len(duraciones),
+            'segundos': round(segundos, 3),
+            'pedidos_por_segundo': round(len(duraciones) / segundos, 1) if segundos else 0.0,
+            'errores': errores,
+            'tasa_errores': round(errores / len(duraciones), 4) if duraciones else 0.0,
+            'codigos': {str(codigo): n for codigo, n in sorted(codigos.items(), key=str)},
+            'latencia_ms': _percentiles(duraciones),
+            'cpu_ms_por_pedido': round(cpu / len(duraciones) * 1000, 3) if duraciones else 0.0,
+        }
+
+    def _mostrar(self, nombre, r, anterior):
+        lat = r['latencia_ms']
+        linea = (
+            f"{nombre:<11} {r['pedidos_por_segundo']:8.1f} pedidos/s   p50 {lat['p50']:8.2f}  "
+            f"p95 {lat['p95']:8.2f}  p99 {lat['p99']:8.2f} ms   cpu {r['cpu_ms_por_pedido']:6.2f} ms/pedido"
+            f"   errores {r['tasa_errores']:.2%}"
+        )
+        previo = (anterior or {}).get('escenarios', {}).get(nombre)
+        if previo:
+            def delta(actual, antes):
+                return f"{(actual - antes) / antes:+.1%}" if antes else "n/a"
+            linea += (
+                f"   vs {anterior['meta']['commit']}: throughput {delta(r['pedidos_por_segundo'], previo['pedidos_por_segundo'])}"
+                f", p95 {delta(lat['p95'], previo['latencia_ms']['p95'])}"
+            )
+        self.stdout.write(linea)
+
+    def _limpiar(self, marca):
+        buffer_inscripciones.vaciar()
+        Inscripcion.objects.filter(nombre=marca).delete()
+        CorreoPendiente.objects.filter(asunto__contains=marca).delete()
+        TraduccionCache.objects.filter(traduccion__startswith="[bench:").delete()
+        # con señales: las estadisticas diarias se descuentan
+        Consulta.objects.filter(nombre=marca).delete()
+        User.objects.filter(username=marca.replace(" ", "-")).delete()
+
+
+class _VaciadoCorreos(threading.Thread):
+    # hace de `enviar_correos --continuo` con un servidor de correo local,
+    # solo sobre los correos de esta corrida
+
+    def __init__(self, marca, demora):
+        super().__init__(name='bench-correos', daemon=True)
+        self.marca = marca
+        self.conexion = BackendDemora(demora=demora)
+        self._fin = threading.Event()
+        self.enviados = self.errores = 0
+        self.segundos = 0.0
+
+    def run(self):
+        inicio = time.perf_counter()
+        try:
+            while True:
+                try:
+                    enviados, _ = enviar_pendientes(
+                        lote=20, connection=self.conexion, filtros={'asunto__contains': self.marca},
+                    )
+                except DatabaseError:
+                    # se cuenta y se reintenta: un error del worker no corta la medicion
+                    self.errores += 1
+                    enviados = 0
+                self.enviados += enviados
+                if not enviados and self._fin.wait(0.1):
+                    break
+        finally:
+            self.segundos = time.perf_counter() - inicio
+            connection.close()
+
+    def detener(self):
+        self._fin.set()
+        if self.ident is not None:
+            self.join()
+
+    def resumen(self):
+        return {
+            'enviados': self.enviados,
+            'errores_db': self.errores,
+            'por_segundo': round(self.enviados / self.segundos, 1) if self.segundos else 0.0,
+        }
@@ -0,0 +1,62 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test import Client, override_settings
+from django.test.utils import CaptureQueriesContext
+
+
+class _Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = (
+        "Compara el traspaso de datos de /inscribir/ (POST ajax + GET) con sesión en la db "
+        "y con cookie firmada: consultas a la db y tiempo por inscripción. "
+        "La inscripción se escribe en el momento (INSCRIPCIONES_WRITE_BEHIND=False) para que "
+        "sus INSERT se cuenten y queden en la transacción, que se descarta al terminar."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--inscripciones', type=int, default=50)
+
+    def handle(self, *args, **options):
+        casos = (
+            ("sesión (db)", 'sesion', 3),
+            ("cookie firmada", 'cookie', 3),
+            ("cookie + cache (contenido grande)", 'cookie', 400),
+        )
+        self.stdout.write("Escritura de inscripciones: sincrónica (INSCRIPCIONES_WRITE_BEHIND=False)")
+        for nombre, modo, cursos in casos:
+            # con el buffer los INSERT saldrian del hilo de escritura, fuera de la
+            # transaccion y de las consultas medidas, y quedarian en la db
+            with override_settings(INSCRIPCION_TRASPASO=modo, INSCRIPCIONES_WRITE_BEHIND=False):
+                consultas, sesion, segundos = self._medir(options['inscripciones'], cursos)
+            n = options['inscripciones']
+            self.stdout.write(
+                f"{nombre:<36} {consultas / n:5.1f} consultas/inscripción "
+                f"({sesion / n:.1f} a django_session)   {segundos / n * 1000:7.2f} ms"
+            )
+
+    def _medir(self, cantidad, cursos):
+        cliente = Client(HTTP_HOST='localhost')
+        datos = {
+            'nombre': "Bench", 'correo': "bench@example.com",
+            'cursos': [f"Curso de prueba número {i}" for i in range(cursos)],
+        }
+        try:
+            with transaction.atomic(), CaptureQueriesContext(connection) as capturadas:
+                inicio = time.perf_counter()
+                for _ in range(cantidad):
+                    cliente.post('/inscribir/', datos, HTTP_X_REQUESTED_WITH='XMLHttpRequest')
+                    respuesta = cliente.get('/inscribir/')
+                    assert b"Curso de prueba" in respuesta.content
+                segundos = time.perf_counter() - inicio
+                raise _Rollback
+        except _Rollback:
+            pass
+        # los correos encolados cuestan lo mismo en los dos modos
+        propias = [q['sql'] for q in capturadas.captured_queries if 'SAVEPOINT' not in q['sql']]
+        sesion = sum('django_session' in sql for sql in propias)
+        return len(propias), sesion, segundos
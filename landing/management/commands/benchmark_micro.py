@@ -0,0 +1,258 @@
+import gc
+import json
+import platform
+import random
+import re
+import statistics
+import time
+import tracemalloc
+
+import django
+from django.core.management.base import BaseCommand, CommandError
+from django.http import JsonResponse
+from django.utils import timezone
+
+from landing.envio import validar_envio
+from landing.forms import NIVELES, PREGUNTA1, PREGUNTA2, PREGUNTA3, PREGUNTA4, PREGUNTA5, TestForm
+from landing.management.commands.benchmark_carga import _commit
+from landing.resultados import armar_resultado, calcular_perfil, resolver_resultado, tabla_resultados
+from landing.views import cuerpos_confirmacion, cuerpos_inscripcion
+
+# el patron de TestForm.clean_nombre, para medir la compilacion por llamada
+PATRON_NOMBRE = r'^[A-Za-zÁÉÍÓÚáéíóúÑñ\s]+$'
+# con --numero 0 cada repeticion dura al menos esto
+DURACION_MINIMA = 0.02
+
+
+class Command(BaseCommand):
+    help = (
+        "Microbenchmarks de las etapas de CPU de un envío del test: validación de TestForm "
+        "y del esquema de /api/test/, regex del nombre, calcular_perfil, armado del resultado, "
+        "respuesta json y html de los correos. Cada etapa tiene calentamiento, repeticiones con estadísticas por "
+        "llamada y una pasada con tracemalloc; el resultado queda en micro-<commit>.json."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--etapas', default=None,
+                            help="Separadas por coma (por defecto todas).")
+        parser.add_argument('--repeticiones', type=int, default=20)
+        parser.add_argument('--numero', type=int, default=0,
+                            help="Llamadas por repetición (0: se calibra).")
+        parser.add_argument('--calentamiento', type=int, default=200,
+                            help="Llamadas sin medir antes de cada etapa.")
+        parser.add_argument('--memoria', type=int, default=200,
+                            help="Llamadas medidas con tracemalloc (0: no mide memoria).")
+        parser.add_argument('--semilla', type=int, default=1)
+        parser.add_argument('--salida', default=None,
+                            help="Archivo JSON del resultado (por defecto micro-<commit>.json).")
+        parser.add_argument('--historial', default=None,
+                            help="Archivo JSONL al que se agrega una línea por corrida.")
+        parser.add_argument('--comparar', default=None,
+                            help="JSON de una corrida anterior para mostrar las diferencias.")
+
+    def handle(self, *args, **options):
+        etapas = self._etapas(random.Random(options['semilla']))
+        if options['etapas']:
+            pedidas = [e.strip() for e in options['etapas'].split(",") if e.strip()]
+            desconocidas = set(pedidas) - set(etapas)
+            if desconocidas:
+                raise CommandError(f"Etapas desconocidas: {', '.join(sorted(desconocidas))}")
+            etapas = {nombre: etapas[nombre] for nombre in pedidas}
+        anterior = None
+        if options['comparar']:
+            with open(options['comparar'], encoding='utf-8') as f:
+                anterior = json.load(f)
+
+        # la tabla de resultados se arma una vez por proceso; no es parte de la medicion
+        tabla_resultados()
+
+        resultados = {}
+        for nombre, funcion in etapas.items():
+            resultados[nombre] = self._medir(funcion, options)
+            self._mostrar(nombre, resultados[nombre], anterior)
+
+        commit = _commit()
+        informe = {
+            'meta': {
+                'commit': commit,
+                'fecha': timezone.now().isoformat(),
+                'python': platform.python_version(),
+                'django': django.get_version(),
+            },
+            'parametros': {
+                k: options[k] for k in ('repeticiones', 'numero', 'calentamiento', 'memoria', 'semilla')
+            },
+            'etapas': resultados,
+        }
+        salida = options['salida'] or f"micro-{commit}.json"
+        with open(salida, 'w', encoding='utf-8') as f:
+            json.dump(informe, f, ensure_ascii=False, indent=2)
+        if options['historial']:
+            with open(options['historial'], 'a', encoding='utf-8') as f:
+                f.write(json.dumps(informe, ensure_ascii=False) + "\n")
+        self.stdout.write(self.style.SUCCESS(f"Resultado en {salida}"))
+
+    def _etapas(self, rng):
+        # {nombre: funcion sin argumentos}; cada llamada toma el siguiente envio
+        # de una lista pregenerada para no medir siempre los mismos datos
+        preguntas = [[valor for valor, _ in p] for p in (PREGUNTA1, PREGUNTA2, PREGUNTA3, PREGUNTA4, PREGUNTA5)]
+        nombres = ["Ana María Pérez", "José Núñez", "Lucía Gómez", "Martín Fernández"]
+        envios = [
+            {
+                'nombre': rng.choice(nombres), 'edad': str(rng.randint(16, 60)),
+                'correo': f"usuario{i}@example.com", 'nivel': rng.choice(NIVELES)[0],
+                **{f"q{n}": rng.choice(opciones) for n, opciones in enumerate(preguntas, 1)},
+            }
+            for i in range(256)
+        ]
+        invalidos = [dict(e, nombre=f"{e['nombre']} 2", edad="15") for e in envios]
+        validados = []
+        for envio in envios:
+            form = TestForm(envio)
+            form.is_valid()
+            validados.append(form.cleaned_data)
+        resultados = [resolver_resultado(d) for d in validados]
+
+        def ciclo(lista):
+            i = 0
+            n = len(lista)
+
+            def siguiente():
+                nonlocal i
+                i = (i + 1) % n
+                return lista[i]
+            return siguiente
+
+        envio, invalido, validado, resultado = ciclo(envios), ciclo(invalidos), ciclo(validados), ciclo(resultados)
+
+        def regex_por_llamada():
+            # lo que hace clean_nombre: re.compile (cache interno de re) y match
+            return re.compile(PATRON_NOMBRE).match(envio()['nombre'])
+
+        patron = re.compile(PATRON_NOMBRE)
+
+        def regex_precompilado():
+            return patron.match(envio()['nombre'])
+
+        def respuesta_json():
+            r = resultado()
+            traducciones = r.traducciones()
+            return JsonResponse({
+                'success': True,
+                'perfil': r.perfil,
+                'descripcion': r.descripcion,
+                'traduccion_descripcion': traducciones.get(r.descripcion),
+                'cursos': [{'nombre': c, 'traduccion': traducciones.get(c)} for c in r.cursos],
+                'nombre': "Ana María Pérez",
+                'correo': "usuario@example.com",
+                'user_message': "¡Test completado!",
+                'status_class': "success",
+            })
+
+        def correo_confirmacion():
+            r = resultado()
+            return cuerpos_confirmacion("Ana María Pérez", "usuario@example.com", r.perfil, r.descripcion, r.cursos)
+
+        def correo_inscripcion():
+            return cuerpos_inscripcion("Ana María Pérez", "usuario@example.com", resultado().cursos[:2])
+
+        return {
+            'form_valido': lambda: TestForm(envio()).is_valid(),
+            'form_invalido': lambda: TestForm(invalido()).is_valid(),
+            # lo mismo con el esquema precompilado de /api/test/
+            'esquema_valido': lambda: validar_envio(envio()),
+            'esquema_invalido': lambda: validar_envio(invalido()),
+            'regex_nombre': regex_por_llamada,
+            'regex_nombre_precompilado': regex_precompilado,
+            'calcular_perfil': lambda: calcular_perfil(validado()),
+            'armar_resultado': lambda: armar_resultado(resultado().perfil),
+            'resolver_resultado': lambda: resolver_resultado(validado()),
+            'respuesta_json': respuesta_json,
+            'correo_confirmacion': correo_confirmacion,
+            'correo_inscripcion': correo_inscripcion,
+        }
+
+    def _calibrar(self, funcion):
+        # como timeit.autorange: 1, 2, 5, 10, 20... hasta superar DURACION_MINIMA
+        numero = 1
+        while True:
+            for factor in (1, 2, 5):
+                n = numero * factor
+                inicio = time.perf_counter()
+                for _ in range(n):
+                    funcion()
+                if time.perf_counter() - inicio >= DURACION_MINIMA:
+                    return n
+            numero *= 10
+
+    def _medir(self, funcion, options):
+        for _ in range(options['calentamiento']):
+            funcion()
+        numero = options['numero'] or self._calibrar(funcion)
+
+        # tiempo por llamada (us) de cada repeticion, sin el gc de por medio
+        muestras = []
+        gc_activo = gc.isenabled()
+        gc.disable()
+        try:
+            for _ in range(options['repeticiones']):
+                inicio = time.perf_counter()
+                for _ in range(numero):
+                    funcion()
+                muestras.append((time.perf_counter() - inicio) / numero * 1e6)
+        finally:
+            if gc_activo:
+                gc.enable()
+        orden = sorted(muestras)
+        resultado = {
+            'numero': numero,
+            'repeticiones': len(muestras),
+            'us': {
+                'min': round(orden[0], 3),
+                'mediana': round(statistics.median(orden), 3),
+                'promedio': round(statistics.fmean(orden), 3),
+                'desvio': round(statistics.stdev(orden), 3) if len(orden) > 1 else 0.0,
+                'p95': round(orden[round(0.95 * (len(orden) - 1))], 3),
+                'max': round(orden[-1], 3),
+            },
+            'llamadas_por_segundo': round(1e6 / statistics.median(orden)) if orden[0] else None,
+        }
+        if options['memoria']:
+            resultado['memoria'] = self._memoria(funcion, options['memoria'])
+        return resultado
+
+    def _memoria(self, funcion, llamadas):
+        # por llamada: pico de memoria asignada por encima de lo que habia antes
+        # y bytes y bloques que quedan vivos al terminar
+        picos = []
+        tracemalloc.start()
+        try:
+            base = tracemalloc.take_snapshot()
+            antes, _ = tracemalloc.get_traced_memory()
+            for _ in range(llamadas):
+                actual, _ = tracemalloc.get_traced_memory()
+                tracemalloc.reset_peak()
+                funcion()
+                _, pico = tracemalloc.get_traced_memory()
+                picos.append(pico - actual)
+            despues, _ = tracemalloc.get_traced_memory()
+            diferencias = tracemalloc.take_snapshot().compare_to(base, 'filename')
+        finally:
+            tracemalloc.stop()
+        return {
+            'pico_bytes': round(statistics.median(picos)),
+            'pico_max_bytes': max(picos),
+            'retenidos_bytes': round((despues - antes) / llamadas, 1),
+            'bloques_retenidos': round(sum(max(d.count_diff, 0) for d in diferencias) / llamadas, 2),
+        }
+
+    def _mostrar(self, nombre, r, anterior):
+        us = r['us']
+        linea = f"{nombre:<26} mediana {us['mediana']:10.2f} us  ±{us['desvio']:8.2f}  p95 {us['p95']:10.2f} us"
+        if 'memoria' in r:
+            linea += f"   pico {r['memoria']['pico_bytes']:8d} B"
+        previo = (anterior or {}).get('etapas', {}).get(nombre)
+        if previo:
+            antes = previo['us']['mediana']
+            linea += f"   vs {anterior['meta']['commit']}: {(us['mediana'] - antes) / antes:+.1%}" if antes else ""
+        self.stdout.write(linea)
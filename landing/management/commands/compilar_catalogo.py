@@ -0,0 +1,63 @@
+from itertools import combinations
+
+from django.core.management.base import BaseCommand, CommandError
+
+from landing.traduccion import CacheTraducciones, catalogo_traducciones, version_catalogo
+from landing.resultados import CURSOS, DESCRIPCIONES
+
+
+def textos_a_traducir():
+    # todo lo que index puede enviar al traductor: cursos, descripciones y
+    # las descripciones unidas con " / " para cualquier empate de perfiles
+    perfiles = list(DESCRIPCIONES)
+    textos = []
+    for n in range(1, len(perfiles) + 1):
+        for grupo in combinations(perfiles, n):
+            textos.append(" / ".join(DESCRIPCIONES[p] for p in grupo))
+    for p in perfiles:
+        textos.extend(CURSOS.get(p, []))
+    return list(dict.fromkeys(textos))
+
+
+class Command(BaseCommand):
+    help = "Traduce todos los textos fijos del test y escribe el catálogo de traducciones."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--idioma', action='append', dest='idiomas',
+                            help="Idioma destino (se puede repetir). Por defecto: en.")
+        parser.add_argument('--timeout', type=float, default=60,
+                            help="Plazo total en segundos para cada idioma.")
+        parser.add_argument('--estricto', action='store_true',
+                            help="Falla si algún texto no se pudo traducir.")
+
+    def handle(self, *args, **options):
+        idiomas = options['idiomas'] or ['en']
+        textos = textos_a_traducir()
+        version = version_catalogo(textos, idiomas)
+
+        if catalogo_traducciones.version == version:
+            self.stdout.write(f"El catálogo {version} ya está actualizado.")
+            return
+
+        # sin catalogo para no reutilizar una version vieja; el cache de la db si se reutiliza
+        cache = CacheTraducciones(catalogo=None)
+        resultado = {}
+        faltantes = []
+        for idioma in idiomas:
+            traducciones = cache.obtener_lote(textos, idioma, timeout=options['timeout'])
+            resultado[idioma] = {t: tr for t, tr in traducciones.items() if tr is not None}
+            faltantes += [(idioma, t) for t, tr in traducciones.items() if tr is None]
+
+        if faltantes:
+            for idioma, texto in faltantes:
+                self.stderr.write(f"Sin traducción ({idioma}): {texto}")
+            if options['estricto']:
+                raise CommandError(f"{len(faltantes)} textos sin traducir.")
+            # un catalogo parcial se vuelve a intentar en el proximo build
+            version = f"{version}-parcial"
+
+        catalogo_traducciones.escribir(resultado, version)
+        total = sum(len(t) for t in resultado.values())
+        self.stdout.write(self.style.SUCCESS(
+            f"Catálogo {version} escrito en {catalogo_traducciones.ruta} ({total} traducciones)."
+        ))
@@ -0,0 +1,40 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from landing.correos import enviar_pendientes
+
+
+class Command(BaseCommand):
+    help = "Envía los correos pendientes de la bandeja de salida."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--lote', type=int, default=50,
+                            help="Cantidad máxima de correos por conexión SMTP.")
+        parser.add_argument('--continuo', action='store_true',
+                            help="Sigue corriendo y revisa la bandeja cada --intervalo segundos.")
+        parser.add_argument('--intervalo', type=float, default=5,
+                            help="Segundos de espera cuando no hay correos pendientes.")
+
+    def handle(self, *args, **options):
+        total_enviados = total_fallidos = 0
+        try:
+            while True:
+                enviados, fallidos = enviar_pendientes(lote=options['lote'])
+                total_enviados += enviados
+                total_fallidos += fallidos
+                if enviados or fallidos:
+                    self.stdout.write(f"Lote: {enviados} enviados, {fallidos} con error.")
+
+                # un lote completo indica que puede haber mas pendientes
+                if enviados + fallidos >= options['lote']:
+                    continue
+                if not options['continuo']:
+                    break
+                time.sleep(options['intervalo'])
+        except KeyboardInterrupt:
+            pass
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Total: {total_enviados} enviados, {total_fallidos} con error."
+        ))
@@ -0,0 +1,43 @@
+import sys
+
+from django.core.management.base import BaseCommand
+
+from landing.consultas import filtros_consultas
+from landing.exportar import FORMATOS, generar_exportacion
+
+
+class Command(BaseCommand):
+    help = "Exporta las consultas en CSV o NDJSON, por bloques y con memoria constante."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--formato', choices=FORMATOS, default='csv')
+        parser.add_argument('--gzip', action='store_true', help="Comprime la salida en gzip.")
+        parser.add_argument('--salida', default='-', help="Archivo de salida ('-' para stdout).")
+        parser.add_argument('--lote', type=int, default=2000, help="Filas por bloque.")
+        parser.add_argument('--perfil')
+        parser.add_argument('--nivel')
+        parser.add_argument('--desde', help="Fecha AAAA-MM-DD (inclusive).")
+        parser.add_argument('--hasta', help="Fecha AAAA-MM-DD (inclusive).")
+
+    def handle(self, *args, **options):
+        filtros = filtros_consultas(options)
+        metricas = {}
+        bloques = generar_exportacion(
+            filtros, options['formato'], options['gzip'], lote=options['lote'], metricas=metricas
+        )
+
+        if options['salida'] == '-':
+            destino = sys.stdout.buffer
+            for datos in bloques:
+                destino.write(datos)
+            destino.flush()
+        else:
+            with open(options['salida'], 'wb') as destino:
+                for datos in bloques:
+                    destino.write(datos)
+
+        # el resumen va a stderr para no mezclarse con la exportacion
+        self.stderr.write(
+            f"{metricas['filas']} filas, {metricas['bytes']} bytes en {metricas['segundos']:.2f}s "
+            f"({metricas['filas'] / max(metricas['segundos'], 1e-6):.0f} filas/s)"
+        )
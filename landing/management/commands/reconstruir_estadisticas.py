@@ -0,0 +1,16 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from landing.estadisticas import reconstruir
+
+
+class Command(BaseCommand):
+    help = "Recalcula la tabla EstadisticaDiaria a partir de todas las consultas."
+
+    def handle(self, *args, **options):
+        inicio = time.perf_counter()
+        filas = reconstruir()
+        self.stdout.write(self.style.SUCCESS(
+            f"Estadísticas reconstruidas: {filas} filas en {time.perf_counter() - inicio:.2f}s."
+        ))
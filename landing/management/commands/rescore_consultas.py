@@ -0,0 +1,122 @@
+import os
+import time
+from collections import Counter
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from landing.estadisticas import aplicar_deltas, clave_estadistica
+from landing.models import Consulta
+from landing.puntaje import cuestionario
+from landing.versiones import incrementar_version
+
+CAMPOS = [p.campo for p in cuestionario.preguntas]
+
+
+class Command(BaseCommand):
+    help = "Recalcula perfil_obtenido de todas las consultas por lotes de clave primaria."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--lote', type=int, default=2000,
+                            help="Filas por lote (una transacción por lote).")
+        parser.add_argument('--dry-run', action='store_true',
+                            help="No escribe nada; muestra las diferencias.")
+        parser.add_argument('--mostrar', type=int, default=20,
+                            help="Máximo de diferencias a mostrar en --dry-run.")
+        parser.add_argument('--desde-id', type=int, default=None,
+                            help="Empieza después de este id.")
+        parser.add_argument('--checkpoint', default='.rescore_consultas.checkpoint',
+                            help="Archivo donde se guarda el último id confirmado para poder retomar.")
+        parser.add_argument('--reiniciar', action='store_true',
+                            help="Ignora el checkpoint existente y empieza desde el principio.")
+
+    def _leer_checkpoint(self, ruta):
+        try:
+            with open(ruta) as f:
+                return int(f.read().strip())
+        except FileNotFoundError:
+            return None
+        except ValueError:
+            raise CommandError(f"Checkpoint inválido en {ruta}; usá --reiniciar.")
+
+    def _escribir_checkpoint(self, ruta, ultimo_id):
+        tmp = f"{ruta}.tmp"
+        with open(tmp, "w") as f:
+            f.write(str(ultimo_id))
+        os.replace(tmp, ruta)
+
+    def handle(self, *args, **options):
+        lote = options['lote']
+        dry_run = options['dry_run']
+        checkpoint = None if dry_run else options['checkpoint']
+
+        ultimo_id = options['desde_id']
+        if ultimo_id is None and checkpoint and not options['reiniciar']:
+            ultimo_id = self._leer_checkpoint(checkpoint)
+            if ultimo_id is not None:
+                self.stdout.write(f"Retomando después del id {ultimo_id}.")
+        ultimo_id = ultimo_id or 0
+
+        leidas = cambiadas = mostradas = 0
+        inicio = time.perf_counter()
+
+        while True:
+            # cada lote es una consulta acotada por id (keyset) que se trae entera:
+            # la memoria la limita --lote, no un cursor del lado del servidor
+            filas = list(
+                Consulta.objects
+                .filter(id__gt=ultimo_id)
+                .order_by('id')
+                .values_list('id', 'perfil_obtenido', 'fecha_consulta', 'nivel', *CAMPOS)[:lote]
+            )
+            if not filas:
+                break
+
+            respuestas = [dict(zip(CAMPOS, fila[4:])) for fila in filas]
+            perfiles = cuestionario.puntuar_lote(respuestas)
+
+            cambios = [
+                (fila[0], fila[1], nuevo, fila[2], fila[3])
+                for fila, nuevo in zip(filas, perfiles)
+                if fila[1] != nuevo
+            ]
+
+            if dry_run:
+                for id_, anterior, nuevo, _, _ in cambios:
+                    if mostradas < options['mostrar']:
+                        self.stdout.write(f"  #{id_}: {anterior!r} -> {nuevo!r}")
+                        mostradas += 1
+            elif cambios:
+                # bulk_update no dispara señales: las estadisticas se ajustan en la misma transaccion
+                deltas = Counter()
+                for _, anterior, nuevo, fecha, nivel in cambios:
+                    deltas[clave_estadistica(fecha, anterior, nivel)] -= 1
+                    deltas[clave_estadistica(fecha, nuevo, nivel)] += 1
+                with transaction.atomic():
+                    Consulta.objects.bulk_update(
+                        [Consulta(id=id_, perfil_obtenido=nuevo) for id_, _, nuevo, _, _ in cambios],
+                        ['perfil_obtenido'],
+                    )
+                    aplicar_deltas(deltas)
+                    incrementar_version()
+
+            ultimo_id = filas[-1][0]
+            if checkpoint:
+                self._escribir_checkpoint(checkpoint, ultimo_id)
+
+            leidas += len(filas)
+            cambiadas += len(cambios)
+            duracion = time.perf_counter() - inicio
+            self.stdout.write(
+                f"{leidas} filas leídas, {cambiadas} con cambios, hasta id {ultimo_id} "
+                f"({leidas / duracion:.0f} filas/s)"
+            )
+
+        if checkpoint and os.path.exists(checkpoint):
+            os.remove(checkpoint)
+
+        duracion = time.perf_counter() - inicio
+        accion = "a cambiar (dry-run)" if dry_run else "actualizadas"
+        self.stdout.write(self.style.SUCCESS(
+            f"Listo: {leidas} filas en {duracion:.2f}s, {cambiadas} {accion}."
+        ))
@@ -0,0 +1,375 @@
+import atexit
+import glob
+import hmac
+import json
+import logging
+import os
+import threading
+import time
+from contextvars import ContextVar
+from functools import wraps
+
+from asgiref.sync import iscoroutinefunction
+from django.conf import settings
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+
+logger = logging.getLogger(__name__)
+
+BUCKETS_SEGUNDOS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+BUCKETS_QUERIES = (0, 1, 2, 5, 10, 20, 50, 100)
+BUCKETS_BYTES = (256, 1024, 4096, 16384, 65536, 262144, 1048576)
+
+# familia: (tipo, ayuda, buckets)
+FAMILIAS = {
+    'landing_vista_segundos': ('histogram', "Duración de la request por vista.", BUCKETS_SEGUNDOS),
+    'landing_vista_respuestas_total': ('counter', "Respuestas por vista, método y código.", None),
+    'landing_vista_lentas_total': ('counter', "Requests más lentas que METRICAS_LENTA_MS.", None),
+    'landing_vista_queries': ('histogram', "Queries a la db por request.", BUCKETS_QUERIES),
+    'landing_vista_db_segundos_total': ('counter', "Tiempo en la db por vista.", None),
+    'landing_vista_externo_segundos_total': (
+        'counter', "Tiempo esperando servicios externos por vista y servicio.", None,
+    ),
+    'landing_vista_respuesta_bytes': ('histogram', "Tamaño del cuerpo de la respuesta.", BUCKETS_BYTES),
+    'landing_vista_pedido_bytes_total': ('counter', "Bytes recibidos en el cuerpo de las requests.", None),
+    'landing_externo_segundos': (
+        'histogram', "Duración de las llamadas externas (traducción, correo, smtp, http).", BUCKETS_SEGUNDOS,
+    ),
+    'landing_externo_errores_total': ('counter', "Llamadas externas que terminaron en error.", None),
+
+    # contadores que ya llevan los modulos (ver _estado_modulos)
+    'landing_paginas_cache_total': ('counter', "Páginas públicas servidas por resultado del cache.", None),
+    'landing_traduccion_cache_total': ('counter', "Eventos del cache de traducciones.", None),
+    'landing_traduccion_circuito_total': ('counter', "Eventos del circuit breaker de traducción.", None),
+    'landing_traduccion_circuito_abierto': ('gauge', "1 si el circuito de traducción no está cerrado.", None),
+    'landing_http_total': ('counter', "Llamadas del cliente http compartido.", None),
+    'landing_http_segundos_total': ('counter', "Tiempo total del cliente http compartido.", None),
+    'landing_inscripciones_total': ('counter', "Eventos del buffer de inscripciones.", None),
+    'landing_inscripciones_pendientes': ('gauge', "Inscripciones en el buffer sin escribir.", None),
+}
+
+_lock = threading.Lock()
+_contadores = {}   # (familia, labels) -> valor
+_histogramas = {}  # (familia, labels) -> [cuenta por bucket..., +Inf, suma]
+
+
+def _clave(familia, labels):
+    return familia, tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+def contar(familia, valor=1, **labels):
+    clave = _clave(familia, labels)
+    with _lock:
+        _contadores[clave] = _contadores.get(clave, 0) + valor
+
+
+def observar(familia, valor, **labels):
+    buckets = FAMILIAS[familia][2]
+    clave = _clave(familia, labels)
+    with _lock:
+        datos = _histogramas.get(clave)
+        if datos is None:
+            datos = _histogramas[clave] = [0] * (len(buckets) + 2)
+        indice = next((i for i, limite in enumerate(buckets) if valor <= limite), len(buckets))
+        datos[indice] += 1
+        datos[-1] += valor
+
+
+def reset():
+    with _lock:
+        _contadores.clear()
+        _histogramas.clear()
+
+
+# --- medicion por request ---
+
+class Medicion:
+    # lo que acumula una request; llega a los hilos de sync_to_async por el contexto
+
+    __slots__ = ('queries', 'db_segundos', 'externo')
+
+    def __init__(self):
+        self.queries = 0
+        self.db_segundos = 0.0
+        self.externo = {}
+
+
+_medicion = ContextVar('medicion', default=None)
+
+
+def _medir_query(execute, sql, params, many, context):
+    medicion = _medicion.get()
+    if medicion is None:
+        return execute(sql, params, many, context)
+    inicio = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        medicion.queries += 1
+        medicion.db_segundos += time.perf_counter() - inicio
+
+
+@receiver(connection_created)
+def _instalar_wrapper(sender, connection, **kwargs):
+    # cada hilo tiene su conexion: el wrapper se agrega a todas al abrirse, asi
+    # tambien cuenta las queries de las vistas async (que corren en otro hilo)
+    if _medir_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(_medir_query)
+
+
+def observar_externo(servicio, segundos, error=False):
+    observar('landing_externo_segundos', segundos, servicio=servicio)
+    if error:
+        contar('landing_externo_errores_total', servicio=servicio)
+    medicion = _medicion.get()
+    if medicion is not None:
+        medicion.externo[servicio] = medicion.externo.get(servicio, 0.0) + segundos
+
+
+def medir_externo(servicio):
+    # decorador para funciones sync o async que esperan a un servicio externo
+    def decorador(func):
+        if iscoroutinefunction(func):
+            @wraps(func)
+            async def envoltura(*args, **kwargs):
+                inicio = time.perf_counter()
+                error = True
+                try:
+                    resultado = await func(*args, **kwargs)
+                    error = False
+                    return resultado
+                finally:
+                    observar_externo(servicio, time.perf_counter() - inicio, error)
+        else:
+            @wraps(func)
+            def envoltura(*args, **kwargs):
+                inicio = time.perf_counter()
+                error = True
+                try:
+                    resultado = func(*args, **kwargs)
+                    error = False
+                    return resultado
+                finally:
+                    observar_externo(servicio, time.perf_counter() - inicio, error)
+        return envoltura
+    return decorador
+
+
+def iniciar():
+    _asegurar_volcado()
+    medicion = Medicion()
+    return medicion, _medicion.set(medicion), time.perf_counter()
+
+
+def terminar(request, respuesta, medicion, token, inicio):
+    duracion = time.perf_counter() - inicio
+    _medicion.reset(token)
+
+    match = getattr(request, 'resolver_match', None)
+    vista = match.view_name if match else 'sin_ruta'
+    metodo = request.method
+    codigo = respuesta.status_code
+    tamano = None if respuesta.streaming else len(respuesta.content)
+    try:
+        pedido = int(request.META.get('CONTENT_LENGTH') or 0)
+    except ValueError:
+        pedido = 0
+
+    observar('landing_vista_segundos', duracion, vista=vista, metodo=metodo)
+    contar('landing_vista_respuestas_total', vista=vista, metodo=metodo, codigo=codigo)
+    observar('landing_vista_queries', medicion.queries, vista=vista)
+    contar('landing_vista_db_segundos_total', medicion.db_segundos, vista=vista)
+    for servicio, segundos in medicion.externo.items():
+        contar('landing_vista_externo_segundos_total', segundos, vista=vista, servicio=servicio)
+    if tamano is not None:
+        observar('landing_vista_respuesta_bytes', tamano, vista=vista)
+    if pedido:
+        contar('landing_vista_pedido_bytes_total', pedido, vista=vista)
+
+    if duracion * 1000 >= getattr(settings, 'METRICAS_LENTA_MS', 1000):
+        contar('landing_vista_lentas_total', vista=vista)
+        # una linea json por request lenta, facil de filtrar en los logs
+        logger.warning(json.dumps({
+            'evento': 'request_lenta',
+            'vista': vista,
+            'metodo': metodo,
+            'ruta': request.path,
+            'codigo': codigo,
+            'ms': round(duracion * 1000, 1),
+            'queries': medicion.queries,
+            'db_ms': round(medicion.db_segundos * 1000, 1),
+            'externo_ms': {s: round(v * 1000, 1) for s, v in medicion.externo.items()},
+            'bytes': tamano,
+        }, ensure_ascii=False))
+
+
+# --- muestras y exposicion ---
+
+def _estado_modulos():
+    # los modulos ya cuentan sus eventos; se leen al exportar
+    from . import paginas
+    from .circuito import CERRADO
+    from .cliente_http import cliente_http
+    from .inscripciones import buffer_inscripciones
+    from .traduccion import cache_traducciones, circuito_traduccion
+
+    def eventos(familia, datos, label):
+        return [
+            (familia, familia, ((label, clave),), valor)
+            for clave, valor in datos.items() if isinstance(valor, (int, float))
+        ]
+
+    paginas_stats = paginas.resumen()
+    http = cliente_http.resumen()
+    circuito = circuito_traduccion.resumen()
+    inscripciones = buffer_inscripciones.resumen()
+    return [
+        *eventos('landing_paginas_cache_total',
+                 {k: paginas_stats[k] for k in ('hits', 'misses', 'salteadas')}, 'resultado'),
+        *eventos('landing_traduccion_cache_total', dict(cache_traducciones.stats), 'evento'),
+        *eventos('landing_traduccion_circuito_total',
+                 {k: circuito[k] for k in ('exitos', 'fallos', 'rechazadas', 'aperturas')}, 'evento'),
+        ('landing_traduccion_circuito_abierto', 'landing_traduccion_circuito_abierto', (),
+         int(circuito['estado'] != CERRADO)),
+        *eventos('landing_http_total', {k: http[k] for k in ('llamadas', 'errores', 'reintentos')}, 'evento'),
+        ('landing_http_segundos_total', 'landing_http_segundos_total', (), http['segundos']),
+        *eventos('landing_inscripciones_total',
+                 {k: v for k, v in inscripciones.items() if k != 'pendientes'}, 'evento'),
+        ('landing_inscripciones_pendientes', 'landing_inscripciones_pendientes', (),
+         inscripciones['pendientes']),
+    ]
+
+
+def muestras():
+    # muestras de este proceso: (familia, nombre, labels, valor)
+    with _lock:
+        contadores = list(_contadores.items())
+        histogramas = [(clave, list(datos)) for clave, datos in _histogramas.items()]
+
+    salida = [(familia, familia, labels, valor) for (familia, labels), valor in contadores]
+    for (familia, labels), datos in histogramas:
+        buckets = FAMILIAS[familia][2]
+        acumulado = 0
+        for limite, cuenta in zip((*buckets, '+Inf'), datos):
+            acumulado += cuenta
+            salida.append((familia, f"{familia}_bucket", labels + (('le', str(limite)),), acumulado))
+        salida.append((familia, f"{familia}_count", labels, acumulado))
+        salida.append((familia, f"{familia}_sum", labels, datos[-1]))
+    return salida + _estado_modulos()
+
+
+def _directorio():
+    return getattr(settings, 'METRICAS_DIRECTORIO', None)
+
+
+def volcar():
+    # deja las muestras de este worker en <directorio>/<pid>.json (reemplazo atomico)
+    directorio = _directorio()
+    if not directorio:
+        return
+    os.makedirs(directorio, exist_ok=True)
+    ruta = os.path.join(directorio, f"{os.getpid()}.json")
+    datos = {'pid': os.getpid(), 'muestras': [[f, n, list(map(list, l)), v] for f, n, l, v in muestras()]}
+    tmp = f"{ruta}.tmp"
+    with open(tmp, 'w', encoding='utf-8') as f:
+        json.dump(datos, f)
+    os.replace(tmp, ruta)
+
+
+def _vivo(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except (PermissionError, OSError):
+        pass
+    return True
+
+
+def muestras_agregadas():
+    # suma las muestras de todos los workers; los gauges de procesos que ya no
+    # existen se descartan y sus contadores se conservan METRICAS_RETENCION
+    # segundos (despues prometheus lo ve como un reinicio del contador)
+    directorio = _directorio()
+    if not directorio:
+        return muestras()
+    volcar()
+    retencion = getattr(settings, 'METRICAS_RETENCION', 60 * 60)
+    total = {}
+    for ruta in glob.glob(os.path.join(directorio, '*.json')):
+        try:
+            with open(ruta, encoding='utf-8') as f:
+                datos = json.load(f)
+            vivo = _vivo(datos['pid'])
+            if not vivo and time.time() - os.path.getmtime(ruta) > retencion:
+                os.remove(ruta)
+                continue
+        except (OSError, ValueError):
+            continue
+        for familia, nombre, labels, valor in datos['muestras']:
+            if not vivo and FAMILIAS[familia][0] == 'gauge':
+                continue
+            clave = (familia, nombre, tuple(map(tuple, labels)))
+            total[clave] = total.get(clave, 0) + valor
+    return [(f, n, l, v) for (f, n, l), v in total.items()]
+
+
+def _escapar(valor):
+    return str(valor).replace('\\', r'\\').replace('"', r'\"').replace('\n', r'\n')
+
+
+def exposicion():
+    # formato de texto de prometheus (version 0.0.4)
+    por_familia = {}
+    for familia, nombre, labels, valor in muestras_agregadas():
+        por_familia.setdefault(familia, []).append((nombre, labels, valor))
+
+    lineas = []
+    for familia, filas in sorted(por_familia.items()):
+        tipo, ayuda, _ = FAMILIAS[familia]
+        lineas.append(f"# HELP {familia} {ayuda}")
+        lineas.append(f"# TYPE {familia} {tipo}")
+        for nombre, labels, valor in sorted(filas, key=_orden_muestra):
+            texto = ",".join(f'{k}="{_escapar(v)}"' for k, v in labels)
+            lineas.append(f"{nombre}{{{texto}}} {valor!r}" if texto else f"{nombre} {valor!r}")
+    return "\n".join(lineas) + "\n"
+
+
+def _orden_muestra(fila):
+    # buckets en orden numerico (+Inf al final), luego _count y _sum
+    nombre, labels, _ = fila
+    sin_le = tuple(par for par in labels if par[0] != 'le')
+    le = next((float(v) for k, v in labels if k == 'le'), 0.0)
+    return sin_le, nombre, le
+
+
+def token_valido(request):
+    # los scrapers se autentican con "Authorization: Bearer <METRICAS_TOKEN>"
+    token = getattr(settings, 'METRICAS_TOKEN', None)
+    encabezado = request.headers.get('Authorization', '')
+    return bool(token) and hmac.compare_digest(encabezado, f"Bearer {token}")
+
+
+# --- volcado periodico ---
+
+_volcado = {'hilo': None}
+
+
+def _bucle_volcado():
+    while True:
+        time.sleep(getattr(settings, 'METRICAS_VOLCADO', 5))
+        try:
+            volcar()
+        except OSError as e:
+            logger.warning("No se pudieron volcar las métricas: %s", e)
+
+
+def _asegurar_volcado():
+    if _volcado['hilo'] is not None or not _directorio():
+        return
+    with _lock:
+        if _volcado['hilo'] is not None:
+            return
+        _volcado['hilo'] = threading.Thread(target=_bucle_volcado, name='metricas', daemon=True)
+        _volcado['hilo'].start()
+    atexit.register(volcar)
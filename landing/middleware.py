@@ -0,0 +1,62 @@
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from whitenoise.middleware import WhiteNoiseMiddleware
+
+from . import metricas
+
+
+class WhiteNoiseAsyncMiddleware(WhiteNoiseMiddleware):
+    # whitenoise solo es sync: con el middleware original django corre toda la
+    # cadena interna (y las vistas async) dentro de un unico hilo. esta version
+    # sirve los estaticos igual y deja pasar el resto sin salir del event loop
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response=None, *args, **kwargs):
+        super().__init__(get_response, *args, **kwargs)
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        return super().__call__(request)
+
+    def _archivo(self, request):
+        if self.autorefresh:
+            return self.find_file(request.path_info)
+        return self.files.get(request.path_info)
+
+    async def __acall__(self, request):
+        if self.autorefresh:
+            # find_file toca el disco
+            static_file = await sync_to_async(self._archivo, thread_sensitive=False)(request)
+        else:
+            static_file = self.files.get(request.path_info)
+        if static_file is not None:
+            return await sync_to_async(self.serve, thread_sensitive=False)(static_file, request)
+        return await self.get_response(request)
+
+
+class MetricasMiddleware:
+    # latencia, queries, llamadas externas y tamaños por vista (landing/metricas.py)
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        medicion, token, inicio = metricas.iniciar()
+        respuesta = self.get_response(request)
+        metricas.terminar(request, respuesta, medicion, token, inicio)
+        return respuesta
+
+    async def __acall__(self, request):
+        medicion, token, inicio = metricas.iniciar()
+        respuesta = await self.get_response(request)
+        metricas.terminar(request, respuesta, medicion, token, inicio)
+        return respuesta
@@ -0,0 +1,29 @@
+# Generated by Django 5.2.6 on 2026-10-18 10:32
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('landing', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TraduccionCache',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('clave', models.CharField(max_length=64, unique=True)),
+                ('texto', models.TextField()),
+                ('idioma', models.CharField(max_length=10)),
+                ('traduccion', models.TextField(blank=True, null=True)),
+                ('expira', models.DateTimeField(db_index=True)),
+                ('actualizado', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Traducción cacheada',
+                'verbose_name_plural': 'Traducciones cacheadas',
+            },
+        ),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 5.2.6 on 2026-10-18 10:38
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('landing', '0003_correopendiente'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='consulta',
+            index=models.Index(fields=['perfil_obtenido', '-id'], name='landing_con_perfil__f0fb7e_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='consulta',
+            index=models.Index(fields=['nivel', '-id'], name='landing_con_nivel_b6a8a2_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='consulta',
+            index=models.Index(fields=['fecha_consulta'], name='landing_con_fecha_c_c6c7c0_idx'),
+        ),
+    ]
@@ -0,0 +1,46 @@
+# Generated by Django 5.2.6 on 2026-10-18 10:38
+
+import django.db.models.functions.text
+from django.db import migrations, models
+
+# indices trigram para los icontains del admin (search_fields); django los
+# traduce a UPPER(col::text) LIKE UPPER('%...%'), por eso el indice es sobre UPPER
+INDICES_TRIGRAM = [
+    ('consulta_nombre_trgm_idx', 'nombre'),
+    ('consulta_correo_trgm_idx', 'correo'),
+    ('consulta_perfil_trgm_idx', 'perfil_obtenido'),
+]
+
+
+def crear_indices_trigram(apps, schema_editor):
+    # solo postgres tiene pg_trgm; en otros motores no se crea nada
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    for nombre, columna in INDICES_TRIGRAM:
+        schema_editor.execute(
+            f'CREATE INDEX IF NOT EXISTS {nombre} ON landing_consulta '
+            f'USING gin ((UPPER("{columna}"::text)) gin_trgm_ops)'
+        )
+
+
+def borrar_indices_trigram(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    for nombre, _ in INDICES_TRIGRAM:
+        schema_editor.execute(f'DROP INDEX IF EXISTS {nombre}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('landing', '0004_indices_listado'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='consulta',
+            index=models.Index(django.db.models.functions.text.Upper('correo'), name='consulta_correo_upper_idx'),
+        ),
+        migrations.RunPython(crear_indices_trigram, borrar_indices_trigram),
+    ]
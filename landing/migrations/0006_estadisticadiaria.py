@@ -0,0 +1,30 @@
+# Generated by Django 5.2.6 on 2026-10-18 10:40
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('landing', '0005_indices_busqueda'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EstadisticaDiaria',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('dia', models.DateField()),
+                ('perfil', models.CharField(max_length=100)),
+                ('nivel', models.CharField(max_length=50)),
+                ('cantidad', models.IntegerField(default=0)),
+                ('actualizado', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+            options={
+                'verbose_name': 'Estadística diaria',
+                'verbose_name_plural': 'Estadísticas diarias',
+                'constraints': [models.UniqueConstraint(fields=('dia', 'perfil', 'nivel'), name='estadistica_dia_perfil_nivel')],
+            },
+        ),
+    ]
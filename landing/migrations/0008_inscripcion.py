@@ -0,0 +1,32 @@
+# Generated by Django 5.2.6 on 2026-10-18 10:59
+
+import django.db.models.deletion
+import django.utils.timezone
+import uuid
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('landing', '0007_versiontabla'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Inscripcion',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('clave', models.UUIDField(default=uuid.uuid4, editable=False, unique=True)),
+                ('nombre', models.CharField(max_length=100)),
+                ('correo', models.EmailField(max_length=254)),
+                ('cursos', models.JSONField(default=list)),
+                ('creada', models.DateTimeField(db_index=True, default=django.utils.timezone.now)),
+                ('consulta', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='inscripciones', to='landing.consulta')),
+            ],
+            options={
+                'verbose_name': 'Inscripción',
+                'verbose_name_plural': 'Inscripciones',
+            },
+        ),
+    ]
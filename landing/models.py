@@ -1,4 +1,8 @@
+import uuid
+
 from django.db import models
+from django.db.models.functions import Upper
+from django.utils import timezone
 
 
 class Consulta(models.Model):
@@ -23,6 +27,131 @@ class Consulta(models.Model):
     class Meta:
         verbose_name = "Consulta"
         verbose_name_plural = "Consultas"
+        indexes = [
+            # filtros del listado, que pagina por id descendente
+            models.Index(fields=['perfil_obtenido', '-id']),
+            models.Index(fields=['nivel', '-id']),
+            models.Index(fields=['fecha_consulta']),
+            # busquedas sin distinguir mayusculas por correo (iexact)
+            models.Index(Upper('correo'), name='consulta_correo_upper_idx'),
+        ]
 
     def _str_(self):
-        return f"Consulta de {self.nombre} - {self.perfil_obtenido}"
\ No newline at end of file
+        return f"Consulta de {self.nombre} - {self.perfil_obtenido}"
+
+
+class TraduccionCache(models.Model):
+    # segundo nivel del cache de traducciones, compartido entre workers
+    clave = models.CharField(max_length=64, unique=True)
+    texto = models.TextField()
+    idioma = models.CharField(max_length=10)
+
+    # null indica un fallo cacheado (cache negativo)
+    traduccion = models.TextField(blank=True, null=True)
+    expira = models.DateTimeField(db_index=True)
+    actualizado = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = "Traducción cacheada"
+        verbose_name_plural = "Traducciones cacheadas"
+
+    def __str__(self):
+        return f"{self.idioma}: {self.texto[:40]}"
+
+
+class CorreoPendiente(models.Model):
+    # bandeja de salida: los correos se encolan en la request y los envia
+    # el comando enviar_correos
+    PENDIENTE = 'pendiente'
+    ENVIANDO = 'enviando'
+    ENVIADO = 'enviado'
+    FALLIDO = 'fallido'
+    ESTADOS = [
+        (PENDIENTE, 'Pendiente'),
+        (ENVIANDO, 'Enviando'),
+        (ENVIADO, 'Enviado'),
+        (FALLIDO, 'Fallido'),
+    ]
+
+    asunto = models.CharField(max_length=255)
+    cuerpo = models.TextField()
+    cuerpo_html = models.TextField(blank=True, null=True)
+    remitente = models.CharField(max_length=254)
+    destinatarios = models.JSONField()
+
+    estado = models.CharField(max_length=10, choices=ESTADOS, default=PENDIENTE)
+    intentos = models.PositiveIntegerField(default=0)
+    proximo_intento = models.DateTimeField(default=timezone.now)
+    ultimo_error = models.TextField(blank=True, null=True)
+    creado = models.DateTimeField(auto_now_add=True)
+    enviado_en = models.DateTimeField(blank=True, null=True)
+    # worker que tiene tomado el correo mientras esta "enviando"; la reserva
+    # vence en proximo_intento (ver correos._reservar)
+    reserva = models.CharField(max_length=32, blank=True, null=True, db_index=True)
+
+    class Meta:
+        verbose_name = "Correo pendiente"
+        verbose_name_plural = "Correos pendientes"
+        indexes = [
+            models.Index(fields=['estado', 'proximo_intento']),
+        ]
+
+    def __str__(self):
+        return f"{self.asunto} ({self.estado})"
+
+
+
+class EstadisticaDiaria(models.Model):
+    # cantidad de consultas por dia, perfil y nivel; se mantiene al guardar y
+    # borrar consultas (ver estadisticas.py)
+    dia = models.DateField()
+    perfil = models.CharField(max_length=100)
+    nivel = models.CharField(max_length=50)
+    cantidad = models.IntegerField(default=0)
+    actualizado = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        verbose_name = "Estadística diaria"
+        verbose_name_plural = "Estadísticas diarias"
+        constraints = [
+            models.UniqueConstraint(fields=['dia', 'perfil', 'nivel'], name='estadistica_dia_perfil_nivel'),
+        ]
+
+    def __str__(self):
+        return f"{self.dia} {self.perfil} / {self.nivel}: {self.cantidad}"
+
+
+class VersionTabla(models.Model):
+    # contador que sube con cada escritura de una tabla; sirve para ETag/Last-Modified
+    tabla = models.CharField(max_length=50, unique=True)
+    version = models.BigIntegerField(default=0)
+    modificado = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        verbose_name = "Versión de tabla"
+        verbose_name_plural = "Versiones de tablas"
+
+    def __str__(self):
+        return f"{self.tabla} v{self.version}"
+
+
+class Inscripcion(models.Model):
+    # inscripcion a cursos desde /inscribir/; se escriben por lotes desde el
+    # buffer de landing/inscripciones.py
+    # la clave la genera la request: reescribir un lote ya guardado no duplica filas
+    clave = models.UUIDField(unique=True, default=uuid.uuid4, editable=False)
+    consulta = models.ForeignKey(
+        Consulta, on_delete=models.SET_NULL, blank=True, null=True, related_name='inscripciones'
+    )
+    nombre = models.CharField(max_length=100)
+    correo = models.EmailField()
+    cursos = models.JSONField(default=list)
+    # momento del pedido, no de la escritura del lote
+    creada = models.DateTimeField(default=timezone.now, db_index=True)
+
+    class Meta:
+        verbose_name = "Inscripción"
+        verbose_name_plural = "Inscripciones"
+
+    def __str__(self):
+        return f"{self.nombre} <{self.correo}>: {len(self.cursos)} cursos"
@@ -0,0 +1,10 @@
+from django.conf import settings
+from rest_framework.pagination import CursorPagination
+
+
+class ConsultaCursorPagination(CursorPagination):
+    # cursor opaco sobre fecha_consulta (id desempata); el costo no crece con la pagina
+    ordering = ('-fecha_consulta', '-id')
+    page_size = settings.API_PAGE_SIZE
+    page_size_query_param = 'page_size'
+    max_page_size = settings.API_PAGE_SIZE_MAX
@@ -0,0 +1,112 @@
+import threading
+import time
+from functools import wraps
+
+from asgiref.sync import iscoroutinefunction
+from django.conf import settings
+from django.core.cache import caches
+from django.http import HttpResponse
+from django.middleware.csrf import get_token
+from django.utils.cache import patch_cache_control, patch_vary_headers
+
+# se renderiza en lugar del token csrf y se reemplaza en cada respuesta
+MARCADOR_CSRF = "__csrf_token_pagina_cacheada__"
+ALIAS_CACHE = 'paginas'
+
+_lock = threading.Lock()
+stats = {'hits': 0, 'misses': 0, 'salteadas': 0, 'segundos_render': 0.0}
+
+
+def _contar(nombre, segundos=0.0):
+    with _lock:
+        stats[nombre] += 1
+        stats['segundos_render'] += segundos
+
+
+def reset_stats():
+    with _lock:
+        stats.update(hits=0, misses=0, salteadas=0, segundos_render=0.0)
+
+
+def resumen():
+    with _lock:
+        datos = dict(stats)
+    servidas = datos['hits'] + datos['misses']
+    return {
+        **datos,
+        'segundos_render': round(datos['segundos_render'], 4),
+        'ratio_hits': round(datos['hits'] / servidas, 3) if servidas else 0.0,
+    }
+
+
+def contexto(request):
+    # context processor: con la pagina en cache, el token csrf queda como marcador
+    if getattr(request, '_pagina_cacheable', False):
+        return {'csrf_token': MARCADOR_CSRF}
+    return {}
+
+
+def _cacheable(request):
+    # solo visitantes anonimos pidiendo la pagina tal cual: el header cambia con
+    # la sesion y la query string puede cambiar el contenido
+    return request.method in ('GET', 'HEAD') and not request.GET
+
+
+def _clave(request):
+    # el prefijo del cache 'paginas' es la version del deploy (ver settings)
+    return f"pagina:{request.path}"
+
+
+def _respuesta(request, entrada, estado, segundos):
+    contenido, content_type = entrada
+    respuesta = HttpResponse(contenido.replace(MARCADOR_CSRF, get_token(request)), content_type=content_type)
+    # el contenido depende de la sesion (usuario y csrf): ningun cache
+    # compartido puede servirla a otro visitante
+    patch_vary_headers(respuesta, ('Cookie',))
+    patch_cache_control(respuesta, private=True)
+    respuesta['X-Cache-Pagina'] = estado
+    respuesta['Server-Timing'] = f"render;dur={segundos * 1000:.2f}"
+    return respuesta
+
+
+def _guardar(request, respuesta, inicio):
+    segundos = time.perf_counter() - inicio
+    if respuesta.status_code != 200 or respuesta.streaming or respuesta.cookies:
+        _contar('salteadas', segundos)
+        return respuesta
+    _contar('misses', segundos)
+    entrada = (respuesta.content.decode(respuesta.charset), respuesta['Content-Type'])
+    caches[ALIAS_CACHE].set(_clave(request), entrada, getattr(settings, 'PAGINAS_CACHE_TTL', 3600))
+    return _respuesta(request, entrada, 'MISS', segundos)
+
+
+def pagina_cacheada(vista):
+    # cachea el html completo de una pagina publica para visitantes anonimos
+    if iscoroutinefunction(vista):
+        @wraps(vista)
+        async def envoltura(request, *args, **kwargs):
+            if not _cacheable(request) or (await request.auser()).is_authenticated:
+                _contar('salteadas')
+                return await vista(request, *args, **kwargs)
+            inicio = time.perf_counter()
+            entrada = await caches[ALIAS_CACHE].aget(_clave(request))
+            if entrada is not None:
+                _contar('hits')
+                return _respuesta(request, entrada, 'HIT', time.perf_counter() - inicio)
+            request._pagina_cacheable = True
+            return _guardar(request, await vista(request, *args, **kwargs), inicio)
+        return envoltura
+
+    @wraps(vista)
+    def envoltura(request, *args, **kwargs):
+        if not _cacheable(request) or request.user.is_authenticated:
+            _contar('salteadas')
+            return vista(request, *args, **kwargs)
+        inicio = time.perf_counter()
+        entrada = caches[ALIAS_CACHE].get(_clave(request))
+        if entrada is not None:
+            _contar('hits')
+            return _respuesta(request, entrada, 'HIT', time.perf_counter() - inicio)
+        request._pagina_cacheable = True
+        return _guardar(request, vista(request, *args, **kwargs), inicio)
+    return envoltura
@@ -0,0 +1,23 @@
+import json
+
+from django.conf import settings
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import BaseParser
+
+
+class NDJSONParser(BaseParser):
+    # un objeto json por linea; devuelve la lista de objetos
+    media_type = 'application/x-ndjson'
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        parser_context = parser_context or {}
+        encoding = parser_context.get('encoding', settings.DEFAULT_CHARSET)
+        items = []
+        for numero, linea in enumerate(stream.read().decode(encoding).splitlines(), 1):
+            if not linea.strip():
+                continue
+            try:
+                items.append(json.loads(linea))
+            except ValueError as e:
+                raise ParseError(f"Línea {numero}: JSON inválido ({e}).")
+        return items
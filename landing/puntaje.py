@@ -0,0 +1,137 @@
+from dataclasses import dataclass, field
+
+import numpy as np
+
+from .forms import PREGUNTA1, PREGUNTA2, PREGUNTA3, PREGUNTA4, PREGUNTA5
+
+PERFILES = ["Tecnológico", "Creativo/Artístico", "Social/Humanístico", "Científico/Analítico"]
+
+# reglas de desempate
+EMPATE_TODOS = 'todos'          # "A, B" con todos los empatados (comportamiento original)
+EMPATE_PRIMERO = 'primero'      # el primero segun el orden de los perfiles
+EMPATE_PRIORIDAD = 'prioridad'  # el primero segun una lista de prioridad propia
+
+TOLERANCIA = 1e-9
+
+
+@dataclass
+class Pregunta:
+    campo: str
+    # valor de la opcion -> {perfil: peso}
+    opciones: dict = field(default_factory=dict)
+
+
+class Cuestionario:
+    # motor de puntaje: compila el cuestionario a una matriz de pesos para
+    # puntuar lotes enteros de respuestas con numpy
+
+    def __init__(self, perfiles, preguntas, desempate=EMPATE_TODOS, prioridad=None):
+        if not perfiles:
+            raise ValueError("El cuestionario necesita al menos un perfil.")
+        if desempate not in (EMPATE_TODOS, EMPATE_PRIMERO, EMPATE_PRIORIDAD):
+            raise ValueError(f"Regla de desempate desconocida: {desempate}")
+
+        self.perfiles = list(perfiles)
+        self.preguntas = list(preguntas)
+        self.desempate = desempate
+        self.prioridad = list(prioridad or self.perfiles)
+        self._compilar()
+
+    def _compilar(self):
+        n_perfiles = len(self.perfiles)
+        indice_perfil = {p: i for i, p in enumerate(self.perfiles)}
+
+        # cada pregunta ocupa un bloque de filas; la fila 0 del bloque es
+        # "sin respuesta valida" y no suma puntos
+        self.codigos = []
+        self.desplazamientos = []
+        filas = []
+        for pregunta in self.preguntas:
+            self.desplazamientos.append(len(filas))
+            self.codigos.append({valor: i + 1 for i, valor in enumerate(pregunta.opciones)})
+            filas.append(np.zeros(n_perfiles))
+            for pesos in pregunta.opciones.values():
+                fila = np.zeros(n_perfiles)
+                for perfil, peso in pesos.items():
+                    fila[indice_perfil[perfil]] += peso
+                filas.append(fila)
+        self.matriz = np.array(filas, dtype=np.float64).reshape(-1, n_perfiles)
+        self._filas = self.matriz.tolist()
+        self._desplazamientos_np = np.array(self.desplazamientos, dtype=np.intp)
+
+        # etiqueta para cada combinacion posible de ganadores (mascara de bits)
+        self.etiquetas = [self._etiqueta(m) for m in range(1 << n_perfiles)]
+        self._etiquetas_np = np.array(self.etiquetas, dtype=object)
+        self._bits = 1 << np.arange(n_perfiles, dtype=np.int64)
+
+    def _etiqueta(self, mascara):
+        ganadores = [p for i, p in enumerate(self.perfiles) if mascara & (1 << i)]
+        if not ganadores:
+            return "Indefinido"
+        if len(ganadores) == 1 or self.desempate == EMPATE_TODOS:
+            return ", ".join(ganadores)
+        if self.desempate == EMPATE_PRIMERO:
+            return ganadores[0]
+        for perfil in self.prioridad:
+            if perfil in ganadores:
+                return perfil
+        return ganadores[0]
+
+    def codificar(self, respuestas):
+        # lista de dicts -> matriz (n, preguntas) de codigos de opcion
+        codigos = np.zeros((len(respuestas), len(self.preguntas)), dtype=np.intp)
+        for j, pregunta in enumerate(self.preguntas):
+            tabla = self.codigos[j]
+            codigos[:, j] = [tabla.get(r.get(pregunta.campo), 0) for r in respuestas]
+        return codigos
+
+    def puntajes(self, codigos):
+        # una fila de puntajes por respuesta: suma de las filas de la matriz
+        codigos = np.asarray(codigos, dtype=np.intp)
+        total = np.zeros((codigos.shape[0], len(self.perfiles)), dtype=np.float64)
+        for j in range(codigos.shape[1]):
+            total += self.matriz[codigos[:, j] + self._desplazamientos_np[j]]
+        return total
+
+    def mascaras(self, codigos):
+        total = self.puntajes(codigos)
+        maximo = total.max(axis=1, keepdims=True)
+        ganadores = total >= maximo - TOLERANCIA
+        return ganadores.astype(np.int64) @ self._bits
+
+    def puntuar_codigos(self, codigos):
+        # perfiles para una matriz de codigos ya codificada
+        return self._etiquetas_np[self.mascaras(codigos)]
+
+    def puntuar_lote(self, respuestas):
+        return self.puntuar_codigos(self.codificar(respuestas)).tolist()
+
+    def perfil(self, data):
+        # camino escalar para una sola respuesta, sin overhead de numpy
+        puntajes = [0.0] * len(self.perfiles)
+        for j, pregunta in enumerate(self.preguntas):
+            codigo = self.codigos[j].get(data.get(pregunta.campo), 0)
+            if codigo:
+                fila = self._filas[self.desplazamientos[j] + codigo]
+                for i in range(len(puntajes)):
+                    puntajes[i] += fila[i]
+        maximo = max(puntajes)
+        mascara = 0
+        for i, v in enumerate(puntajes):
+            if v >= maximo - TOLERANCIA:
+                mascara |= 1 << i
+        return self.etiquetas[mascara]
+
+
+def cuestionario_por_defecto():
+    # reglas originales: cada opcion suma un punto al perfil que representa
+    preguntas = [
+        Pregunta(campo, {valor: {valor: 1} for valor, _ in opciones})
+        for campo, opciones in (
+            ('q1', PREGUNTA1), ('q2', PREGUNTA2), ('q3', PREGUNTA3), ('q4', PREGUNTA4), ('q5', PREGUNTA5)
+        )
+    ]
+    return Cuestionario(PERFILES, preguntas)
+
+
+cuestionario = cuestionario_por_defecto()
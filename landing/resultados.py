@@ -0,0 +1,91 @@
+from dataclasses import dataclass
+from functools import lru_cache
+from itertools import product
+
+import numpy as np
+
+from .puntaje import cuestionario
+from .traduccion import catalogo_traducciones
+
+DESCRIPCIONES = {
+    "Tecnológico": "Te interesa la tecnología la programación y la innovación.",
+    "Creativo/Artístico": "Te atrae la expresión artística y las ideas originales.",
+    "Social/Humanístico": "Tenés interés en ayudar a otros y en lo comunitario.",
+    "Científico/Analítico": "Te motiva investigar analizar y comprender como funcionan las cosas."
+}
+
+CURSOS = {
+    "Tecnológico": ["Introducción a Python", "Desarrollo Web", "Electrónica básica"],
+    "Creativo/Artístico": ["Diseño Gráfico", "Fotografía Digital", "Edición de video"],
+    "Social/Humanístico": ["Oratoria", "Trabajo Social", "Gestión de proyectos comunitarios"],
+    "Científico/Analítico": ["Estadística básica", "Laboratorio de ciencias", "Análisis de datos"]
+}
+
+PREGUNTAS = tuple(p.campo for p in cuestionario.preguntas)
+
+# por encima de este numero de combinaciones no se arma la tabla
+MAX_COMBINACIONES = 1 << 16
+
+
+def calcular_perfil(data):
+    # calcula el perfil vocacional basado en las respuestas
+    return cuestionario.perfil(data)
+
+
+@dataclass(frozen=True)
+class Resultado:
+    # resultado completo del test para una combinacion de respuestas
+    perfil: str
+    descripcion: str
+    cursos: tuple
+    traduccion_descripcion: str = None
+    traducciones_cursos: tuple = ()
+
+    def traducciones(self):
+        # {texto: traduccion o None} para la descripcion y cada curso
+        textos = dict(zip(self.cursos, self.traducciones_cursos))
+        return {self.descripcion: self.traduccion_descripcion, **textos}
+
+
+def armar_resultado(perfil, target_lang='en'):
+    # descripcion unida y cursos unicos en orden, con las traducciones del catalogo
+    perfiles = perfil.split(", ")
+    descripcion = " / ".join(DESCRIPCIONES.get(p, "") for p in perfiles)
+    cursos = tuple(dict.fromkeys(c for p in perfiles for c in CURSOS.get(p, [])))
+    return Resultado(
+        perfil=perfil,
+        descripcion=descripcion,
+        cursos=cursos,
+        traduccion_descripcion=catalogo_traducciones.get(descripcion, target_lang),
+        traducciones_cursos=tuple(catalogo_traducciones.get(c, target_lang) for c in cursos),
+    )
+
+
+@lru_cache(maxsize=1)
+def tabla_resultados():
+    # todas las combinaciones posibles (4^5 con el test actual) se puntuan en
+    # un solo lote y apuntan a uno de los pocos resultados distintos
+    opciones = [list(p.opciones) for p in cuestionario.preguntas]
+    if np.prod([len(o) for o in opciones]) > MAX_COMBINACIONES:
+        return {}
+
+    combinaciones = list(product(*opciones))
+    codigos = list(product(*[range(1, len(o) + 1) for o in opciones]))
+    perfiles = cuestionario.puntuar_codigos(np.array(codigos, dtype=np.intp))
+
+    por_perfil = {}
+    tabla = {}
+    for respuestas, perfil in zip(combinaciones, perfiles):
+        if perfil not in por_perfil:
+            por_perfil[perfil] = armar_resultado(perfil)
+        tabla[respuestas] = por_perfil[perfil]
+    return tabla
+
+
+def resolver_resultado(data):
+    # una sola busqueda en la tabla; respuestas fuera de las opciones se calculan
+    respuestas = tuple(data.get(q) for q in PREGUNTAS)
+    resultado = tabla_resultados().get(respuestas)
+    if resultado is None:
+        resultado = armar_resultado(calcular_perfil(data))
+    return resultado
@@ -1,5 +1,38 @@
+from django.db import transaction
+from django.utils import timezone
 from rest_framework import serializers
+from .estadisticas import sumar_consultas
 from .models import Consulta
+from .puntaje import cuestionario
+from .versiones import incrementar_version
+
+
+class ConsultaListSerializer(serializers.ListSerializer):
+    # carga masiva: valida item por item, puntua todo junto y guarda con bulk_create
+
+    def validar_items(self, items):
+        # devuelve ([(indice, datos validos)], {indice: errores}) sin cortar en el primer error
+        validos, errores = [], {}
+        for indice, item in enumerate(items):
+            try:
+                validos.append((indice, self.child.run_validation(item)))
+            except serializers.ValidationError as e:
+                errores[indice] = e.detail
+        return validos, errores
+
+    def create(self, validated_data):
+        perfiles = cuestionario.puntuar_lote(validated_data)
+        consultas = [
+            Consulta(**datos, perfil_obtenido=perfil)
+            for datos, perfil in zip(validated_data, perfiles)
+        ]
+        with transaction.atomic():
+            consultas = Consulta.objects.bulk_create(consultas)
+            # bulk_create no dispara señales
+            sumar_consultas(consultas)
+            incrementar_version()
+        return consultas
+
 
 class ConsultaSerializer(serializers.ModelSerializer):
 
@@ -19,4 +52,23 @@ class ConsultaSerializer(serializers.ModelSerializer):
             'perfil_obtenido',
             'fecha_consulta'
         )
-        read_only_fields = ('perfil_obtenido', 'fecha_consulta')
\ No newline at end of file
+        read_only_fields = ('perfil_obtenido', 'fecha_consulta')
+        list_serializer_class = ConsultaListSerializer
+
+def _fecha_iso(valor):
+    # mismo formato que DateTimeField de drf (zona local, "Z" para utc)
+    valor = timezone.localtime(valor).isoformat()
+    return valor[:-6] + 'Z' if valor.endswith('+00:00') else valor
+
+
+def serializar_filas(filas, campos):
+    # camino rapido para listados: filas de .values() a dicts sin pasar por los
+    # campos de drf; produce lo mismo que ConsultaSerializer para esos campos
+    fecha = 'fecha_consulta' in campos
+    salida = []
+    for fila in filas:
+        item = {campo: fila[campo] for campo in campos}
+        if fecha:
+            item['fecha_consulta'] = _fecha_iso(item['fecha_consulta'])
+        salida.append(item)
+    return salida
@@ -62,21 +62,36 @@ document.addEventListener('DOMContentLoaded', function() {
             alertContainer.innerHTML = '';
 
             const formData = new FormData(formPrincipal);
-            const url = formPrincipal.action || window.location.href;
             const csrfToken = formData.get('csrfmiddlewaretoken');
+            // con data-api el test va como json al endpoint liviano (/api/test/);
+            // sin el atributo se usa el envio ajax de siempre a la vista index
+            const urlApi = formPrincipal.dataset.api;
+            const campos = Object.fromEntries(formData);
+            delete campos.csrfmiddlewaretoken;
 
             let response = null;
             let data = null;
 
             try {
-                response = await fetch(url, {
-                    method: 'POST',
-                    body: formData,
-                    headers: {
-                        'X-CSRFToken': csrfToken,
-                        'X-Requested-With': 'XMLHttpRequest'
-                    }
-                });
+                if (urlApi) {
+                    response = await fetch(urlApi, {
+                        method: 'POST',
+                        body: JSON.stringify(campos),
+                        headers: {
+                            'Content-Type': 'application/json',
+                            'X-CSRFToken': csrfToken
+                        }
+                    });
+                } else {
+                    response = await fetch(formPrincipal.action || window.location.href, {
+                        method: 'POST',
+                        body: formData,
+                        headers: {
+                            'X-CSRFToken': csrfToken,
+                            'X-Requested-With': 'XMLHttpRequest'
+                        }
+                    });
+                }
 
                 data = await response.json();
 
@@ -86,7 +101,13 @@ document.addEventListener('DOMContentLoaded', function() {
                         displayFlashMessage(data.user_message, data.status_class);
                     }
 
-                    actualizarResultados(data);
+                    // la respuesta del endpoint json no repite lo que ya tiene el formulario
+                    actualizarResultados({
+                        nombre: campos.nombre,
+                        correo: campos.correo,
+                        csrf_token: csrfToken,
+                        ...data
+                    });
 
                 } else {
                     displayFlashMessage(data.user_message || 'El formulario contiene errores.', 'danger');
@@ -143,6 +164,7 @@ function actualizarResultados(data) {
             cursosHTML += `<input type="hidden" name="csrfmiddlewaretoken" value="${data.csrf_token || ''}">`;
             cursosHTML += `<input type="hidden" name="nombre" value="${data.nombre || ''}">`;
             cursosHTML += `<input type="hidden" name="correo" value="${data.correo || ''}">`;
+            cursosHTML += `<input type="hidden" name="consulta" value="${data.consulta || ''}">`;
 
             cursosHTML += '<div class="lista-cursos">';
 
@@ -1,3 +1,2232 @@
-from django.test import TestCase
+import asyncio
+import contextlib
+import csv
+import gzip
+import os
+import re
+import runpy
+import smtplib
+import io
+import json
+import tempfile
+import threading
+import time
+import warnings
+import zlib
+from collections import Counter
+from datetime import timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from itertools import product
+from urllib.parse import parse_qs, urlparse
+from unittest import mock, skipUnless
 
-# Create your tests here.
+import numpy as np
+import requests
+from django.conf import settings
+from django.db import DatabaseError, connection, connections, transaction
+from django.db.backends.signals import connection_created
+from django.db.models import Q
+from django.contrib.auth.models import User
+from django.core import mail
+from django.core.mail.backends.base import BaseEmailBackend
+from django.core.cache import cache, caches
+from django.core.handlers.asgi import ASGIHandler
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import Client, SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils.module_loading import import_string
+from django.utils import timezone
+
+from .puntaje import (
+    EMPATE_PRIMERO, EMPATE_PRIORIDAD, PERFILES, Cuestionario, Pregunta, cuestionario,
+)
+from .models import Consulta, CorreoPendiente, EstadisticaDiaria, Inscripcion, TraduccionCache
+from .serializers import ConsultaSerializer
+from .versiones import version_actual
+from . import consultas, estadisticas, inscripciones, metricas, paginas, traduccion, traspaso, views
+from .envio import validar_envio
+from .consultas import COLUMNAS_LISTADO, contar_consultas, filtros_consultas, pagina_consultas
+from .exportar import COLUMNAS_EXPORTACION, generar_exportacion
+from .forms import TestForm
+from .inscripciones import BufferInscripciones, escribir, firmar_consulta
+from .correos import encolar_correo, enviar_pendientes
+from .circuito import ABIERTO, CERRADO, SEMIABIERTO, Circuito
+from .cliente_http import ClienteHTTP
+from .traduccion import (
+    CacheTraducciones, CatalogoTraducciones, TraductorMyMemory, TraductorStub, usar_traductor, version_catalogo,
+)
+from .resultados import armar_resultado, calcular_perfil, resolver_resultado, tabla_resultados
+
+
+def calcular_perfil_original(data):
+    # implementacion anterior al motor de puntaje, usada como referencia
+    puntajes = {
+        "Tecnológico": 0, "Creativo/Artístico": 0, "Social/Humanístico": 0, "Científico/Analítico": 0
+    }
+    for i in range(1, 6):
+        respuesta = data.get(f"q{i}")
+        if respuesta in puntajes:
+            puntajes[respuesta] += 1
+
+    max_p = max(puntajes.values())
+    ganadores = [p for p, v in puntajes.items() if v == max_p]
+    return ", ".join(ganadores) if len(ganadores) > 1 else ganadores[0] if ganadores else "Indefinido"
+
+
+CAMPOS = ["q1", "q2", "q3", "q4", "q5"]
+
+
+class CuestionarioTests(SimpleTestCase):
+
+    def setUp(self):
+        self.respuestas = [dict(zip(CAMPOS, r)) for r in product(PERFILES, repeat=5)]
+        # respuestas incompletas o con valores fuera de las opciones
+        self.respuestas += [
+            {},
+            {"q1": "Tecnológico"},
+            {"q1": "Otro", "q2": "Creativo/Artístico", "q3": ""},
+            {"q1": "Social/Humanístico", "q2": "Social/Humanístico", "q5": None},
+        ]
+
+    def test_escalar_igual_al_original(self):
+        for data in self.respuestas:
+            self.assertEqual(calcular_perfil(data), calcular_perfil_original(data), data)
+
+    def test_lote_igual_al_original(self):
+        esperados = [calcular_perfil_original(d) for d in self.respuestas]
+        self.assertEqual(cuestionario.puntuar_lote(self.respuestas), esperados)
+
+    def test_tabla_cubre_todas_las_combinaciones(self):
+        tabla = tabla_resultados()
+        self.assertEqual(len(tabla), 4 ** 5)
+        for data in self.respuestas[:4 ** 5]:
+            self.assertEqual(resolver_resultado(data).perfil, calcular_perfil_original(data))
+
+    def test_pesos_y_desempate(self):
+        preguntas = [
+            Pregunta("a", {"x": {"A": 2}, "y": {"B": 1, "C": 1}}),
+            Pregunta("b", {"x": {"B": 1}, "y": {"C": 1.5}}),
+        ]
+        motor = Cuestionario(["A", "B", "C"], preguntas)
+        self.assertEqual(motor.perfil({"a": "x", "b": "y"}), "A")
+        self.assertEqual(motor.perfil({"a": "y", "b": "y"}), "C")
+        self.assertEqual(motor.perfil({"a": "y", "b": "x"}), "B")
+        self.assertEqual(motor.perfil({"a": "x", "b": "x"}), "A")
+        self.assertEqual(motor.perfil({}), "A, B, C")
+
+        primero = Cuestionario(["A", "B", "C"], preguntas, desempate=EMPATE_PRIMERO)
+        self.assertEqual(primero.perfil({}), "A")
+        prioridad = Cuestionario(["A", "B", "C"], preguntas, desempate=EMPATE_PRIORIDAD, prioridad=["C", "B"])
+        self.assertEqual(prioridad.perfil({}), "C")
+        self.assertEqual(prioridad.puntuar_lote([{}, {"a": "x"}]), ["C", "A"])
+
+    def test_un_millon_de_respuestas_en_menos_de_un_segundo(self):
+        rng = np.random.default_rng(0)
+        codigos = rng.integers(1, 5, size=(1_000_000, 5))
+
+        inicio = time.perf_counter()
+        perfiles = cuestionario.puntuar_codigos(codigos)
+        duracion = time.perf_counter() - inicio
+
+        self.assertEqual(len(perfiles), 1_000_000)
+        self.assertLess(duracion, 1.0)
+
+        # una muestra se verifica contra la implementacion original
+        opciones = [list(p.opciones) for p in cuestionario.preguntas]
+        for fila, perfil in zip(codigos[:200], perfiles[:200]):
+            data = {c: opciones[j][k - 1] for j, (c, k) in enumerate(zip(CAMPOS, fila))}
+            self.assertEqual(perfil, calcular_perfil_original(data))
+
+
+def nombre_indice(*campos):
+    # nombre generado del indice declarado en Consulta.Meta para esos campos
+    for indice in Consulta._meta.indexes:
+        if list(indice.fields) == list(campos):
+            return indice.name
+    raise AssertionError(f"No hay indice sobre {campos}")
+
+
+class PlanesDeConsultaTests(TestCase):
+    # verifica que las consultas principales usen los indices de Consulta
+
+    @classmethod
+    def setUpTestData(cls):
+        perfiles = PERFILES + ["Tecnológico, Creativo/Artístico"]
+        niveles = ["Secundario", "Terciario", "Universitario"]
+        Consulta.objects.bulk_create([
+            Consulta(
+                nombre=f"Persona {i}", edad=16 + i % 40, correo=f"persona{i}@ejemplo.com",
+                nivel=niveles[i % len(niveles)],
+                q1="Tecnológico", q2="Tecnológico", q3="Tecnológico", q4="Tecnológico", q5="Tecnológico",
+                perfil_obtenido=perfiles[i % len(perfiles)],
+            )
+            for i in range(3000)
+        ])
+        with connection.cursor() as cursor:
+            cursor.execute("ANALYZE")
+
+    def plan(self, qs):
+        if connection.vendor == 'postgresql':
+            # con la tabla de prueba chica el planificador preferiria un seq scan
+            with transaction.atomic(), connection.cursor() as cursor:
+                cursor.execute("SET LOCAL enable_seqscan = off")
+                return qs.explain()
+        return qs.explain()
+
+    def assertUsaIndice(self, qs, indice):
+        plan = self.plan(qs)
+        self.assertIn(indice, plan, plan)
+
+    def test_api_ordenada_por_fecha(self):
+        qs = Consulta.objects.order_by('-fecha_consulta')[:50]
+        self.assertUsaIndice(qs, nombre_indice('fecha_consulta'))
+
+    def test_filtro_por_perfil(self):
+        qs = Consulta.objects.filter(perfil_obtenido="Tecnológico").order_by('-id')[:50]
+        self.assertUsaIndice(qs, nombre_indice('perfil_obtenido', '-id'))
+
+    def test_filtro_por_nivel(self):
+        qs = Consulta.objects.filter(nivel="Terciario").order_by('-id')[:50]
+        self.assertUsaIndice(qs, nombre_indice('nivel', '-id'))
+
+    def test_filtro_por_rango_de_fechas(self):
+        ahora = timezone.now()
+        qs = Consulta.objects.filter(
+            fecha_consulta__gte=ahora - timedelta(days=7), fecha_consulta__lt=ahora
+        )
+        self.assertUsaIndice(qs, nombre_indice('fecha_consulta'))
+
+    @skipUnless(connection.vendor == 'postgresql', "índice funcional usado por iexact en postgres")
+    def test_correo_sin_mayusculas(self):
+        qs = Consulta.objects.filter(correo__iexact="PERSONA10@EJEMPLO.COM")
+        self.assertUsaIndice(qs, 'consulta_correo_upper_idx')
+
+    @skipUnless(connection.vendor == 'postgresql', "los índices trigram solo existen en postgres")
+    def test_busqueda_del_admin(self):
+        qs = Consulta.objects.filter(nombre__icontains="sona 12")
+        self.assertUsaIndice(qs, 'consulta_nombre_trgm_idx')
+        qs = Consulta.objects.filter(
+            Q(nombre__icontains="ejemplo") | Q(correo__icontains="ejemplo") | Q(perfil_obtenido__icontains="ejemplo")
+        )
+        plan = self.plan(qs)
+        for indice in ('consulta_nombre_trgm_idx', 'consulta_correo_trgm_idx', 'consulta_perfil_trgm_idx'):
+            self.assertIn(indice, plan, plan)
+
+
+class ListadoConsultasTests(TestCase):
+    # paginacion por clave del listado, filtros y conteo exacto o estimado
+
+    @classmethod
+    def setUpTestData(cls):
+        perfiles = ["Tecnológico", "Creativo/Artístico"]
+        niveles = ["Secundario", "Terciario", "Universitario"]
+        Consulta.objects.bulk_create([
+            Consulta(
+                nombre=f"Persona {i}", edad=20, correo=f"persona{i}@ejemplo.com",
+                nivel=niveles[i % len(niveles)],
+                q1="Tecnológico", q2="Tecnológico", q3="Tecnológico", q4="Tecnológico", q5="Tecnológico",
+                perfil_obtenido=perfiles[i % len(perfiles)],
+            )
+            for i in range(25)
+        ])
+        cls.ids = sorted(Consulta.objects.values_list('id', flat=True))
+        # las primeras diez son de hace diez dias
+        cls.hoy = timezone.localdate()
+        Consulta.objects.filter(id__in=cls.ids[:10]).update(fecha_consulta=timezone.now() - timedelta(days=10))
+        cls.staff = User.objects.create_user("staff", password="x", is_staff=True)
+
+    def setUp(self):
+        cache.clear()
+
+    def ids_esperados(self, **filtros):
+        return list(Consulta.objects.filter(**filtros).order_by('-id').values_list('id', flat=True))
+
+    def recorrer(self, filtros, tamano):
+        # avanza con antes=<ultimo id> hasta la ultima pagina y vuelve con despues=<primer id>
+        paginas = []
+        filas, hay_anterior, hay_siguiente = pagina_consultas(filtros, tamano)
+        self.assertFalse(hay_anterior)
+        paginas.append([f['id'] for f in filas])
+        while hay_siguiente:
+            filas, hay_anterior, hay_siguiente = pagina_consultas(filtros, tamano, antes=paginas[-1][-1])
+            self.assertTrue(hay_anterior)
+            paginas.append([f['id'] for f in filas])
+
+        vuelta = [paginas[-1]]
+        hay_anterior = len(paginas) > 1
+        while hay_anterior:
+            filas, hay_anterior, hay_siguiente = pagina_consultas(filtros, tamano, despues=vuelta[0][0])
+            self.assertTrue(hay_siguiente)
+            vuelta.insert(0, [f['id'] for f in filas])
+        self.assertEqual(vuelta, paginas)
+        return paginas
+
+    def test_paginas_sin_huecos_ni_repetidos(self):
+        esperados = self.ids_esperados()
+        for tamano in (1, 4, 5, 25, 30):
+            paginas = self.recorrer({}, tamano)
+            self.assertEqual([i for pagina in paginas for i in pagina], esperados, tamano)
+            self.assertTrue(all(len(pagina) == tamano for pagina in paginas[:-1]))
+            self.assertEqual(len(paginas), -(-len(esperados) // tamano))
+
+    def test_solo_las_columnas_del_listado(self):
+        filas, _, _ = pagina_consultas({}, 2)
+        self.assertEqual(set(filas[0]), set(COLUMNAS_LISTADO))
+
+    def test_combinaciones_de_filtros(self):
+        hace_diez = (self.hoy - timedelta(days=10)).isoformat()
+        casos = [
+            ({'perfil': "Tecnológico"}, {'perfil_obtenido': "Tecnológico"}),
+            ({'nivel': "Terciario"}, {'nivel': "Terciario"}),
+            ({'perfil': "Creativo/Artístico", 'nivel': "Secundario"},
+             {'perfil_obtenido': "Creativo/Artístico", 'nivel': "Secundario"}),
+            ({'desde': self.hoy.isoformat()}, {'id__in': self.ids[10:]}),
+            ({'hasta': hace_diez}, {'id__in': self.ids[:10]}),
+            ({'desde': hace_diez, 'hasta': hace_diez, 'nivel': "Universitario"},
+             {'id__in': self.ids[:10], 'nivel': "Universitario"}),
+            # fechas invalidas y valores vacios no filtran
+            ({'desde': "ayer", 'hasta': "2024-13-40", 'perfil': ""}, {}),
+        ]
+        for params, filtros_orm in casos:
+            with self.subTest(params=params):
+                filtros = filtros_consultas(params)
+                esperados = self.ids_esperados(**filtros_orm)
+                paginas = self.recorrer(filtros, 3)
+                self.assertEqual([i for pagina in paginas for i in pagina], esperados)
+                self.assertEqual(contar_consultas(filtros), (len(esperados), False))
+
+    def test_conteo_cacheado(self):
+        filtros = filtros_consultas({'nivel': "Terciario"})
+        total = contar_consultas(filtros)
+        Consulta.objects.filter(id=self.ids[1]).delete()
+        with self.assertNumQueries(0):
+            self.assertEqual(contar_consultas(filtros), total)
+        # otro filtro tiene su propia clave
+        self.assertEqual(contar_consultas({}), (24, False))
+        cache.clear()
+        self.assertEqual(contar_consultas(filtros), (total[0] - 1, False))
+
+    @override_settings(LISTADO_CONTEO_EXACTO_HASTA=100)
+    def test_estimado_solo_sin_filtros_y_por_encima_del_umbral(self):
+        with mock.patch('landing.consultas._conteo_estimado', return_value=5000) as estimado:
+            self.assertEqual(contar_consultas({}), (5000, True))
+            # con filtros siempre se cuenta
+            self.assertEqual(contar_consultas({'nivel': "Terciario"}), (8, False))
+        self.assertEqual(estimado.call_count, 1)
+        cache.clear()
+        with mock.patch('landing.consultas._conteo_estimado', return_value=100):
+            self.assertEqual(contar_consultas({}), (25, False))
+        cache.clear()
+        # fuera de postgres no hay estimacion
+        with mock.patch('landing.consultas._conteo_estimado', return_value=None):
+            self.assertEqual(contar_consultas({}), (25, False))
+
+    @skipUnless(connection.vendor == 'postgresql', "la estimación sale de pg_class")
+    def test_conteo_estimado_de_postgres(self):
+        with connection.cursor() as cursor:
+            cursor.execute("ANALYZE landing_consulta")
+        self.assertGreater(consultas._conteo_estimado(), 0)
+
+    def test_vista_conserva_filtros_en_los_enlaces(self):
+        self.client.force_login(self.staff)
+        r = self.client.get('/listado/', {'perfil': "Tecnológico", 'tamano': 4})
+        esperados = self.ids_esperados(perfil_obtenido="Tecnológico")
+        self.assertEqual([f['id'] for f in r.context['consultas']], esperados[:4])
+        self.assertEqual((r.context['total'], r.context['total_estimado']), (len(esperados), False))
+        self.assertIsNone(r.context['url_anterior'])
+        siguiente = parse_qs(urlparse(r.context['url_siguiente']).query)
+        self.assertEqual(siguiente, {'perfil': ["Tecnológico"], 'tamano': ["4"], 'antes': [str(esperados[3])]})
+
+        r = self.client.get('/listado/', {k: v[0] for k, v in siguiente.items()})
+        self.assertEqual([f['id'] for f in r.context['consultas']], esperados[4:8])
+        anterior = parse_qs(urlparse(r.context['url_anterior']).query)
+        self.assertEqual(anterior['despues'], [str(esperados[4])])
+        self.assertNotIn('antes', anterior)
+
+
+class ApiLecturaTests(TestCase):
+    # GET /api/consultas/: cursor, ?fields= y validadores de cache
+
+    @classmethod
+    def setUpTestData(cls):
+        for i in range(5):
+            Consulta.objects.create(
+                nombre=f"Persona {i}", edad=20, correo=f"persona{i}@ejemplo.com", nivel="Secundario",
+                q1="Tecnológico", q2="Tecnológico", q3="Tecnológico", q4="Tecnológico", q5="Tecnológico",
+                perfil_obtenido="Tecnológico",
+            )
+        cls.staff = User.objects.create_user('staff', password='x', is_staff=True)
+
+    def setUp(self):
+        self.client.force_login(self.staff)
+
+    def test_lectura_solo_staff(self):
+        pk = Consulta.objects.first().pk
+        self.client.logout()
+        for usuario in (None, User.objects.create_user('comun', password='x')):
+            if usuario:
+                self.client.force_login(usuario)
+            for url in ('/api/consultas/', f'/api/consultas/{pk}/'):
+                with self.subTest(usuario=usuario, url=url):
+                    self.assertIn(self.client.get(url).status_code, (401, 403))
+
+    def test_etag_por_usuario(self):
+        r = self.client.get('/api/consultas/')
+        self.assertIn('Cookie', r['Vary'])
+        self.assertIn('private', r['Cache-Control'])
+        otro = User.objects.create_user('otro', password='x', is_staff=True)
+        self.client.force_login(otro)
+        r2 = self.client.get('/api/consultas/', HTTP_IF_NONE_MATCH=r['ETag'])
+        self.assertEqual(r2.status_code, 200)
+        self.assertNotEqual(r2['ETag'], r['ETag'])
+
+    def test_paginas_por_cursor(self):
+        r = self.client.get('/api/consultas/?page_size=2')
+        self.assertEqual(r.status_code, 200)
+        ids = [c['id'] for c in r.json()['results']]
+        siguiente = r.json()['next']
+        while siguiente:
+            r = self.client.get(siguiente)
+            ids += [c['id'] for c in r.json()['results']]
+            siguiente = r.json()['next']
+        esperado = list(Consulta.objects.order_by('-fecha_consulta', '-id').values_list('id', flat=True))
+        self.assertEqual(ids, esperado)
+
+    def test_camino_rapido_igual_al_serializer(self):
+        fila = self.client.get('/api/consultas/').json()['results'][0]
+        self.assertEqual(fila, ConsultaSerializer(Consulta.objects.get(pk=fila['id'])).data)
+
+    def test_fields(self):
+        r = self.client.get('/api/consultas/?fields=id,perfil_obtenido')
+        self.assertEqual(set(r.json()['results'][0]), {'id', 'perfil_obtenido'})
+        pk = Consulta.objects.first().pk
+        r = self.client.get(f'/api/consultas/{pk}/?fields=nombre')
+        self.assertEqual(r.json(), {'nombre': Consulta.objects.get(pk=pk).nombre})
+        self.assertEqual(self.client.get('/api/consultas/?fields=id,clave').status_code, 400)
+
+    def test_etag_y_304(self):
+        r = self.client.get('/api/consultas/')
+        etag = r['ETag']
+        self.assertTrue(r.has_header('Last-Modified'))
+        # sesion, usuario y version de la tabla: la consulta no se toca
+        with self.assertNumQueries(3):
+            r = self.client.get('/api/consultas/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(r.status_code, 304)
+
+        # cualquier escritura cambia la version de la tabla
+        Consulta.objects.filter(pk=Consulta.objects.first().pk).get().save()
+        r = self.client.get('/api/consultas/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(r.status_code, 200)
+        self.assertNotEqual(r['ETag'], etag)
+
+
+class ApiPermisosTests(TestCase):
+    # /registro/ esta abierto: un usuario comun no puede escribir en la api
+
+    DATOS = {
+        'nombre': "Ana Perez", 'edad': 20, 'correo': "ana@ejemplo.com", 'nivel': "Secundario",
+        'q1': "Tecnológico", 'q2': "Tecnológico", 'q3': "Tecnológico", 'q4': "Tecnológico",
+        'q5': "Tecnológico",
+    }
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.consulta = Consulta.objects.create(**cls.DATOS, perfil_obtenido="Tecnológico")
+        cls.usuario = User.objects.create_user('comun', password='x')
+        cls.staff = User.objects.create_user('staff', password='x', is_staff=True)
+
+    def escrituras(self):
+        url = f'/api/consultas/{self.consulta.pk}/'
+        return [
+            self.client.post('/api/consultas/', self.DATOS),
+            self.client.post('/api/consultas/lote/', [self.DATOS], content_type='application/json'),
+            self.client.put(url, self.DATOS, content_type='application/json'),
+            self.client.patch(url, {'edad': 30}, content_type='application/json'),
+            self.client.delete(url),
+        ]
+
+    def test_anonimo_y_usuario_comun_no_escriben(self):
+        for usuario in (None, self.usuario):
+            if usuario:
+                self.client.force_login(usuario)
+            with self.subTest(usuario=usuario):
+                for r in self.escrituras():
+                    self.assertIn(r.status_code, (401, 403), r.request)
+        self.assertEqual(Consulta.objects.count(), 1)
+        self.consulta.refresh_from_db()
+        self.assertEqual(self.consulta.edad, 20)
+
+    def test_staff_escribe(self):
+        self.client.force_login(self.staff)
+        codigos = [r.status_code for r in self.escrituras()]
+        self.assertEqual(codigos, [201, 201, 200, 200, 204])
+
+
+class ApiLoteTests(TestCase):
+    # POST /api/consultas/lote/: json o ndjson, resultado por item y limite de tamaño
+
+    DATOS = ApiPermisosTests.DATOS
+
+    def setUp(self):
+        self.client.force_login(User.objects.create_user('staff', is_staff=True))
+
+    def enviar(self, cuerpo, content_type='application/json'):
+        if content_type == 'application/json':
+            cuerpo = json.dumps(cuerpo)
+        return self.client.post('/api/consultas/lote/', cuerpo, content_type=content_type)
+
+    def test_lista_json(self):
+        version, _ = version_actual()
+        items = [
+            self.DATOS,
+            {**self.DATOS, 'correo': "beto@ejemplo.com", 'q1': "Social/Humanístico",
+             'q2': "Social/Humanístico", 'q3': "Social/Humanístico"},
+        ]
+        r = self.enviar(items)
+        self.assertEqual(r.status_code, 201)
+        datos = r.json()
+        self.assertEqual((datos['creadas'], datos['con_errores']), (2, 0))
+        self.assertEqual([x['indice'] for x in datos['resultados']], [0, 1])
+        # el perfil lo calcula el servidor
+        self.assertEqual([x['perfil_obtenido'] for x in datos['resultados']], ["Tecnológico", "Social/Humanístico"])
+        self.assertEqual(
+            sorted(Consulta.objects.values_list('id', flat=True)), sorted(x['id'] for x in datos['resultados'])
+        )
+        # bulk_create no dispara señales: estadisticas y version se ajustan igual
+        self.assertEqual(estadisticas.resumen()['total'], 2)
+        self.assertGreater(version_actual()[0], version)
+
+    def test_ndjson(self):
+        cuerpo = "\n".join([json.dumps(self.DATOS), "", json.dumps({**self.DATOS, 'edad': 30}), ""])
+        r = self.enviar(cuerpo.encode('utf-8'), 'application/x-ndjson')
+        self.assertEqual(r.status_code, 201)
+        self.assertEqual(r.json()['creadas'], 2)
+        self.assertEqual(sorted(Consulta.objects.values_list('edad', flat=True)), [20, 30])
+
+        r = self.enviar(f"{json.dumps(self.DATOS)}\n{{roto\n".encode('utf-8'), 'application/x-ndjson')
+        self.assertEqual(r.status_code, 400)
+        self.assertIn("Línea 2", r.json()['detail'])
+        self.assertEqual(Consulta.objects.count(), 2)
+
+    def test_resultado_parcial(self):
+        r = self.enviar([{**self.DATOS, 'correo': "x"}, self.DATOS, {**self.DATOS, 'nombre': ""}])
+        self.assertEqual(r.status_code, 207)
+        datos = r.json()
+        self.assertEqual((datos['creadas'], datos['con_errores']), (1, 2))
+        primero, segundo, tercero = datos['resultados']
+        self.assertIn('correo', primero['errores'])
+        self.assertEqual(segundo['indice'], 1)
+        self.assertIn('id', segundo)
+        self.assertIn('nombre', tercero['errores'])
+        self.assertEqual(Consulta.objects.count(), 1)
+
+    def test_todo_invalido_o_cuerpo_incorrecto(self):
+        r = self.enviar([{**self.DATOS, 'edad': "muchos"}])
+        self.assertEqual(r.status_code, 400)
+        self.assertEqual((r.json()['creadas'], r.json()['con_errores']), (0, 1))
+        r = self.enviar(self.DATOS)
+        self.assertEqual(r.status_code, 400)
+        self.assertIn("lista", r.json()['error'])
+        self.assertFalse(Consulta.objects.exists())
+
+    @override_settings(CONSULTAS_LOTE_MAX=2)
+    def test_limite_del_lote(self):
+        self.assertEqual(self.enviar([self.DATOS] * 2).status_code, 201)
+        r = self.enviar([self.DATOS] * 3)
+        self.assertEqual(r.status_code, 413)
+        self.assertIn("2", r.json()['error'])
+        self.assertEqual(Consulta.objects.count(), 2)
+
+
+class CacheSoloMemoria(CacheTraducciones):
+    # sin el nivel de base de datos, para poder usarlo desde varios hilos en los tests
+
+    def _leer_db(self, claves):
+        return {}
+
+    def _guardar_db(self, filas):
+        pass
+
+
+class TraduccionLoteTests(SimpleTestCase):
+
+    def test_textos_repetidos_se_consultan_una_vez(self):
+        llamadas = []
+
+        def consultar(text, target_lang):
+            llamadas.append((text, target_lang))
+            return f"{text}@{target_lang}"
+
+        cache = CacheSoloMemoria()
+        resultados = cache.traducir([("hola", "en"), ("chau", "en"), ("hola", "en"), ("hola", "pt")], consultar)
+        self.assertEqual(sorted(llamadas), [("chau", "en"), ("hola", "en"), ("hola", "pt")])
+        self.assertEqual(resultados["hola", "pt"], "hola@pt")
+
+        cache.traducir([("hola", "en")], consultar)
+        self.assertEqual(len(llamadas), 3)
+
+    def test_pedidos_simultaneos_comparten_la_consulta(self):
+        liberar = threading.Event()
+        llamadas = []
+
+        def consultar(text, target_lang):
+            llamadas.append(text)
+            liberar.wait(5)
+            return "hello"
+
+        cache = CacheSoloMemoria()
+        resultados = []
+        hilos = [
+            threading.Thread(target=lambda: resultados.append(cache.obtener("hola", "en", consultar)))
+            for _ in range(8)
+        ]
+        for hilo in hilos:
+            hilo.start()
+        limite = time.monotonic() + 5
+        while cache.stats['coalescidas'] < 7 and time.monotonic() < limite:
+            time.sleep(0.01)
+        liberar.set()
+        for hilo in hilos:
+            hilo.join()
+
+        self.assertEqual(llamadas, ["hola"])
+        self.assertEqual(resultados, ["hello"] * 8)
+        self.assertEqual(cache._en_vuelo, {})
+
+    def test_plazo_vencido_no_se_cachea(self):
+        liberar = threading.Event()
+        cache = CacheSoloMemoria()
+        resultados = cache.traducir([("hola", "en")], lambda t, l: liberar.wait(5) and "hello", timeout=0.05)
+        self.assertEqual(resultados, {("hola", "en"): None})
+        liberar.set()
+        self.assertEqual(cache.buscar("hola", "en"), (False, None))
+
+    def test_endpoint(self):
+        with mock.patch('landing.views.traducir_lote', return_value={'en': {'hola': 'hello'}}) as traducir:
+            r = self.client.post(
+                '/api/traducir/lote/', {'textos': ['hola', 'hola'], 'idiomas': ['en']},
+                content_type='application/json',
+            )
+        self.assertEqual(r.status_code, 200)
+        self.assertEqual(r.json(), {'traducciones': {'en': {'hola': 'hello'}}, 'fallidas': 0})
+        traducir.assert_called_once_with(['hola'], ['en'])
+
+        r = self.client.post('/api/traducir/lote/', {'textos': 'hola'}, content_type='application/json')
+        self.assertEqual(r.status_code, 400)
+        r = self.client.post(
+            '/api/traducir/lote/', {'textos': ['hola'], 'idiomas': ['en/../x']}, content_type='application/json'
+        )
+        self.assertEqual(r.status_code, 400)
+
+
+class ServidorFalso:
+    # imita la api de MyMemory en localhost; `demora` y `codigo` se cambian en el
+    # test y `proximos` fuerza los codigos de los siguientes pedidos
+
+    def __init__(self):
+        self.demora = 0
+        self.codigo = 200
+        self.proximos = []
+        self.pedidos = 0
+        self.conexiones = set()
+        falso = self
+
+        class Manejador(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def do_GET(self):
+                falso.pedidos += 1
+                falso.conexiones.add(self.client_address)
+                time.sleep(falso.demora)
+                codigo = falso.proximos.pop(0) if falso.proximos else falso.codigo
+                texto = parse_qs(urlparse(self.path).query)['q'][0]
+                cuerpo = json.dumps({
+                    'responseStatus': codigo, 'responseData': {'translatedText': f"EN:{texto}"}
+                }).encode()
+                self.send_response(codigo)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(cuerpo)))
+                self.end_headers()
+                self.wfile.write(cuerpo)
+
+            def log_message(self, *args):
+                pass
+
+        class Servidor(ThreadingHTTPServer):
+            # los clientes que vencen su plazo cortan la conexion: no es un error del test
+            block_on_close = False
+
+            def handle_error(self, request, client_address):
+                pass
+
+        self.servidor = Servidor(('127.0.0.1', 0), Manejador)
+        self.url = f"http://127.0.0.1:{self.servidor.server_port}/get"
+        threading.Thread(target=self.servidor.serve_forever, args=(0.05,), daemon=True).start()
+
+    def cerrar(self):
+        self.servidor.shutdown()
+        self.servidor.server_close()
+
+
+class Contador:
+    # traductor de prueba que cuenta las llamadas; respuesta=None simula un fallo
+
+    def __init__(self, respuesta="EN:{texto}"):
+        self.respuesta = respuesta
+        self.llamadas = 0
+
+    def __call__(self, text, target_lang='en'):
+        self.llamadas += 1
+        return self.respuesta and self.respuesta.format(texto=text)
+
+
+class CacheTraduccionesTests(TestCase):
+    # vencimiento, lru en memoria y cache negativo de los dos niveles
+
+    def test_ttl_vence_en_memoria_y_en_db(self):
+        consultar = Contador()
+        cache = CacheTraducciones(ttl=0.05, gracia=0, consultar=consultar)
+        self.assertEqual(cache.obtener("hola"), "EN:hola")
+        self.assertEqual(cache.obtener("hola"), "EN:hola")
+        self.assertEqual((consultar.llamadas, cache.stats['hits_memoria']), (1, 1))
+
+        # otro worker la encuentra en la db
+        otro = CacheTraducciones(ttl=0.05, gracia=0, consultar=consultar)
+        self.assertEqual(otro.obtener("hola"), "EN:hola")
+        self.assertEqual((consultar.llamadas, otro.stats['hits_db']), (1, 1))
+
+        time.sleep(0.1)
+        self.assertEqual(cache.obtener("hola"), "EN:hola")
+        self.assertEqual(otro.obtener("hola"), "EN:hola")
+        # cache vuelve a consultar y guarda; otro ya encuentra la fila renovada
+        self.assertEqual(consultar.llamadas, 2)
+        self.assertEqual((cache.stats['misses'], otro.stats['hits_db']), (2, 2))
+        fila = TraduccionCache.objects.get(clave=traduccion.clave_traduccion("hola", "en"))
+        self.assertGreater(fila.expira, timezone.now())
+
+    def test_lru_desaloja_la_menos_usada(self):
+        consultar = Contador()
+        cache = CacheSoloMemoria(max_items=2, consultar=consultar)
+        cache.obtener("a")
+        cache.obtener("b")
+        cache.obtener("a")
+        cache.obtener("c")
+        self.assertEqual(cache.stats['desalojos'], 1)
+        self.assertEqual(len(cache._memoria), 2)
+        self.assertEqual(consultar.llamadas, 3)
+
+        cache.obtener("a")
+        cache.obtener("c")
+        self.assertEqual(consultar.llamadas, 3)
+        cache.obtener("b")
+        self.assertEqual(consultar.llamadas, 4)
+
+    def test_lo_desalojado_vuelve_de_la_db(self):
+        consultar = Contador()
+        cache = CacheTraducciones(max_items=1, consultar=consultar)
+        cache.obtener("a")
+        cache.obtener("b")
+        self.assertEqual(cache.stats['desalojos'], 1)
+        with self.assertNumQueries(1):
+            self.assertEqual(cache.obtener("a"), "EN:a")
+        self.assertEqual((consultar.llamadas, cache.stats['hits_db']), (2, 1))
+
+    def test_fallos_con_ttl_corto(self):
+        consultar = Contador(respuesta=None)
+        cache = CacheTraducciones(ttl=3600, ttl_fallos=0.05, gracia=3600, consultar=consultar)
+        self.assertIsNone(cache.obtener("hola"))
+        self.assertIsNone(cache.obtener("hola"))
+        self.assertEqual((consultar.llamadas, cache.stats['hits_negativos']), (1, 1))
+
+        # el fallo queda en la db con su ttl corto y otro worker tampoco consulta
+        fila = TraduccionCache.objects.get(clave=traduccion.clave_traduccion("hola", "en"))
+        self.assertIsNone(fila.traduccion)
+        self.assertLess(fila.expira, timezone.now() + timedelta(seconds=1))
+        otro = CacheTraducciones(ttl=3600, ttl_fallos=0.05, gracia=3600, consultar=consultar)
+        self.assertIsNone(otro.obtener("hola"))
+        self.assertEqual((consultar.llamadas, otro.stats['hits_negativos']), (1, 1))
+
+        # vencido, el fallo no se sirve durante la gracia: se vuelve a consultar
+        time.sleep(0.1)
+        consultar.respuesta = "EN:{texto}"
+        self.assertEqual(cache.obtener("hola"), "EN:hola")
+        self.assertEqual(consultar.llamadas, 2)
+        self.assertEqual(cache.stats['hits_vencidos'], 0)
+
+
+class CatalogoTraduccionesTests(TestCase):
+    # compilar_catalogo escribe el catalogo y el cache lo usa antes que la db y la api
+
+    def setUp(self):
+        self.ruta = os.path.join(tempfile.mkdtemp(), 'catalogo.json')
+        self.catalogo = CatalogoTraducciones(self.ruta)
+        parche = mock.patch('landing.management.commands.compilar_catalogo.catalogo_traducciones', self.catalogo)
+        parche.start()
+        self.addCleanup(parche.stop)
+        self.addCleanup(usar_traductor, None)
+        usar_traductor(TraductorStub())
+
+    def compilar(self, *args):
+        salida, errores = io.StringIO(), io.StringIO()
+        call_command('compilar_catalogo', *args, stdout=salida, stderr=errores)
+        return salida.getvalue(), errores.getvalue()
+
+    def test_compila_todos_los_textos(self):
+        from landing.management.commands.compilar_catalogo import textos_a_traducir
+
+        textos = textos_a_traducir()
+        self.compilar('--idioma', 'en', '--idioma', 'pt')
+        with open(self.ruta, encoding='utf-8') as f:
+            datos = json.load(f)
+        self.assertEqual(datos['version'], version_catalogo(textos, ['en', 'pt']))
+        self.assertEqual(datos['idiomas']['pt'], {t: f"[pt] {t}" for t in textos})
+        self.assertEqual(set(datos['idiomas']['en']), set(textos))
+
+        # sin cambios en los textos no se vuelve a traducir ni a escribir
+        usar_traductor(Contador())
+        salida, _ = self.compilar('--idioma', 'en', '--idioma', 'pt')
+        self.assertIn("ya está actualizado", salida)
+        with open(self.ruta, encoding='utf-8') as f:
+            self.assertEqual(json.load(f)['generado'], datos['generado'])
+
+    def test_el_cache_usa_el_catalogo(self):
+        from landing.management.commands.compilar_catalogo import textos_a_traducir
+
+        self.compilar()
+        texto = textos_a_traducir()[0]
+        consultar = Contador()
+        with mock.patch.object(traduccion.cache_traducciones, 'catalogo', CatalogoTraducciones(self.ruta)):
+            with self.assertNumQueries(0):
+                self.assertEqual(traduccion.get_translation(texto), f"[en] {texto}")
+            cache = CacheTraducciones(catalogo=CatalogoTraducciones(self.ruta), consultar=consultar)
+            self.assertEqual(cache.obtener(texto), f"[en] {texto}")
+            # lo que no esta en el catalogo (u otro idioma) sigue por el cache y la api
+            self.assertEqual(cache.obtener(texto, 'pt'), f"EN:{texto}")
+        self.assertEqual((cache.stats['hits_catalogo'], consultar.llamadas), (1, 1))
+
+    def test_catalogo_parcial_y_estricto(self):
+        from landing.management.commands.compilar_catalogo import textos_a_traducir
+
+        faltante = textos_a_traducir()[0]
+        usar_traductor(lambda text, target_lang='en': None if text == faltante else f"[{target_lang}] {text}")
+        with self.assertRaises(CommandError):
+            self.compilar('--estricto')
+        self.assertFalse(os.path.exists(self.ruta))
+
+        _, errores = self.compilar()
+        self.assertIn(f"Sin traducción (en): {faltante}", errores)
+        self.assertTrue(self.catalogo.version.endswith("-parcial"))
+        self.assertIsNone(self.catalogo.get(faltante))
+        # el proximo build lo vuelve a intentar (para entonces el fallo cacheado ya vencio)
+        TraduccionCache.objects.all().delete()
+        usar_traductor(TraductorStub())
+        self.compilar()
+        self.assertFalse(self.catalogo.version.endswith("-parcial"))
+        self.assertEqual(self.catalogo.get(faltante), f"[en] {faltante}")
+
+    def test_catalogo_ausente_o_invalido(self):
+        self.assertIsNone(self.catalogo.version)
+        self.assertIsNone(self.catalogo.get("hola"))
+        with open(self.ruta, 'w', encoding='utf-8') as f:
+            f.write("{no es json")
+        self.catalogo.recargar()
+        self.assertIsNone(self.catalogo.get("hola"))
+        self.catalogo.escribir({'en': {"hola": "hello"}}, "v1")
+        self.assertEqual((self.catalogo.version, self.catalogo.get("hola")), ("v1", "hello"))
+
+
+class CircuitoTraduccionTests(SimpleTestCase):
+
+    def setUp(self):
+        self.servidor = ServidorFalso()
+        self.addCleanup(self.servidor.cerrar)
+        salida = contextlib.redirect_stdout(io.StringIO())
+        salida.__enter__()
+        self.addCleanup(salida.__exit__, None, None, None)
+        cliente = ClienteHTTP(timeout_lectura=0.2, reintentos=0)
+        self.traductor = TraductorMyMemory(cliente, url=self.servidor.url)
+        self.circuito = Circuito(ventana=4, minimo=4, umbral=0.5, espera=0.2)
+
+    def esperar(self, condicion):
+        limite = time.monotonic() + 3
+        while not condicion() and time.monotonic() < limite:
+            time.sleep(0.01)
+        self.assertTrue(condicion())
+
+    def test_errores_abren_el_circuito_y_una_prueba_lo_cierra(self):
+        cache = CacheSoloMemoria(circuito=self.circuito, consultar=self.traductor)
+        self.servidor.codigo = 500
+        for i in range(4):
+            self.assertIsNone(cache.obtener(f"texto {i}"))
+        self.assertEqual(self.circuito.estado, ABIERTO)
+        self.assertEqual(self.circuito.stats['aperturas'], 1)
+
+        # abierto: falla sin llamar al servidor y sin cachear el fallo
+        self.assertIsNone(cache.obtener("otro"))
+        self.assertEqual(self.servidor.pedidos, 4)
+        self.assertEqual(cache.buscar("otro"), (False, None))
+
+        self.servidor.codigo = 200
+        time.sleep(0.25)
+        self.assertEqual(self.circuito.estado, SEMIABIERTO)
+        self.assertEqual(cache.obtener("otro"), "EN:otro")
+        self.assertEqual(self.circuito.estado, CERRADO)
+
+    def test_la_lentitud_abre_el_circuito(self):
+        cache = CacheSoloMemoria(circuito=self.circuito, consultar=self.traductor)
+        self.servidor.demora = 0.5
+        for i in range(4):
+            self.assertIsNone(cache.obtener(f"texto {i}"))
+        self.assertEqual(self.circuito.estado, ABIERTO)
+
+        inicio = time.perf_counter()
+        self.assertIsNone(cache.obtener("otro"))
+        self.assertLess(time.perf_counter() - inicio, 0.05)
+
+    def test_vencida_se_sirve_y_se_refresca(self):
+        cache = CacheSoloMemoria(circuito=self.circuito, consultar=self.traductor, ttl=0.05, gracia=60)
+        cache.guardar("hola", "en", "viejo")
+        time.sleep(0.06)
+
+        self.servidor.demora = 0.1
+        inicio = time.perf_counter()
+        self.assertEqual(cache.obtener("hola"), "viejo")
+        self.assertLess(time.perf_counter() - inicio, 0.05)
+        self.esperar(lambda: cache._memoria[traduccion.clave_traduccion("hola", "en")][0] == "EN:hola")
+        self.assertEqual(cache.stats['refrescos'], 1)
+
+    def test_vencida_con_el_circuito_abierto_no_refresca(self):
+        cache = CacheSoloMemoria(circuito=self.circuito, consultar=self.traductor, ttl=0.05, gracia=60)
+        cache.guardar("hola", "en", "viejo")
+        for _ in range(4):
+            self.circuito.registrar(False)
+        time.sleep(0.06)
+
+        self.assertEqual(cache.obtener("hola"), "viejo")
+        self.assertEqual(cache.stats['refrescos'], 0)
+        self.assertEqual(self.servidor.pedidos, 0)
+
+
+class ClienteHTTPTests(SimpleTestCase):
+
+    def setUp(self):
+        self.servidor = ServidorFalso()
+        self.addCleanup(self.servidor.cerrar)
+
+    def test_reutiliza_la_conexion(self):
+        cliente = ClienteHTTP(pool=2)
+        for i in range(5):
+            self.assertEqual(cliente.get(self.servidor.url, params={'q': i}).status_code, 200)
+        self.assertEqual(len(self.servidor.conexiones), 1)
+        self.assertEqual(cliente.resumen()['llamadas'], 5)
+
+    def test_reintenta_codigos_transitorios(self):
+        cliente = ClienteHTTP(reintentos=2, backoff=0.01)
+        self.servidor.proximos = [503, 502]
+        respuesta = cliente.get(self.servidor.url, params={'q': 'hola'})
+        self.assertEqual(respuesta.status_code, 200)
+        self.assertEqual(self.servidor.pedidos, 3)
+        self.assertEqual(cliente.stats['reintentos'], 2)
+        self.assertEqual(cliente.stats['errores'], 0)
+
+    def test_no_reintenta_un_plazo_de_lectura_vencido(self):
+        cliente = ClienteHTTP(timeout_lectura=0.05, reintentos=2, backoff=0.01)
+        self.servidor.demora = 0.2
+        with self.assertRaises(requests.exceptions.ReadTimeout):
+            cliente.get(self.servidor.url, params={'q': 'hola'})
+        self.assertEqual(self.servidor.pedidos, 1)
+        self.assertEqual(cliente.stats['errores'], 1)
+
+
+class BackendQueFalla(BaseEmailBackend):
+    # smtp que rechaza todos los mensajes (o la conexion, con al_abrir=True)
+
+    def __init__(self, al_abrir=False, **kwargs):
+        super().__init__(**kwargs)
+        self.al_abrir = al_abrir
+
+    def open(self):
+        if self.al_abrir:
+            raise ConnectionRefusedError("sin servidor")
+
+    def send_messages(self, email_messages):
+        raise smtplib.SMTPException("buzón rechazado")
+
+
+@override_settings(
+    EMAIL_BACKEND='django.core.mail.backends.locmem.EmailBackend',
+    CORREO_MAX_INTENTOS=3, CORREO_BACKOFF_BASE=30, CORREO_BACKOFF_MAX=45, CORREO_RESERVA=300,
+)
+class BandejaSalidaTests(TestCase):
+    # enviar_pendientes: reserva, envio fuera de la transaccion, reintentos y fallidos
+
+    def setUp(self):
+        usar_traductor(TraductorStub())
+        self.addCleanup(usar_traductor, None)
+
+    def encolar(self, cantidad=1):
+        return [
+            encolar_correo(f"Asunto {i}", [f"persona{i}@ejemplo.com"], cuerpo_html=f"<p>Hola {i}</p>")
+            for i in range(cantidad)
+        ]
+
+    def vencer(self):
+        # adelanta el reloj de los reintentos
+        CorreoPendiente.objects.update(proximo_intento=timezone.now() - timedelta(seconds=1))
+
+    def test_envia_y_registra_el_estado(self):
+        self.encolar(3)
+        self.assertEqual(enviar_pendientes(), (3, 0))
+        self.assertEqual(len(mail.outbox), 3)
+        self.assertEqual(mail.outbox[0].alternatives[0][0], "<p>Hola 0</p>")
+        for correo in CorreoPendiente.objects.all():
+            self.assertEqual(correo.estado, CorreoPendiente.ENVIADO)
+            self.assertEqual(correo.intentos, 1)
+            self.assertIsNone(correo.reserva)
+            self.assertIsNotNone(correo.enviado_en)
+        # ya enviados: no se vuelven a tomar
+        self.assertEqual(enviar_pendientes(), (0, 0))
+
+    def test_respeta_el_lote(self):
+        self.encolar(5)
+        self.assertEqual(enviar_pendientes(lote=2), (2, 0))
+        self.assertEqual(CorreoPendiente.objects.filter(estado=CorreoPendiente.PENDIENTE).count(), 3)
+
+    def test_smtp_fuera_de_la_transaccion(self):
+        # TestCase ya tiene sus savepoints: durante el envio no se agrega ninguno
+        self.encolar()
+        abiertos = len(connection.savepoint_ids)
+        estados = []
+
+        class Espia(BaseEmailBackend):
+            def send_messages(self, mensajes):
+                estados.append((len(connection.savepoint_ids), CorreoPendiente.objects.get().estado))
+                return len(mensajes)
+
+        enviar_pendientes(connection=Espia())
+        self.assertEqual(estados, [(abiertos, CorreoPendiente.ENVIANDO)])
+
+    def test_reintento_con_espera_exponencial(self):
+        correo, = self.encolar()
+        backend = BackendQueFalla()
+        antes = timezone.now()
+        self.assertEqual(enviar_pendientes(connection=backend), (0, 1))
+        correo.refresh_from_db()
+        self.assertEqual((correo.estado, correo.intentos), (CorreoPendiente.PENDIENTE, 1))
+        self.assertEqual(correo.ultimo_error, "buzón rechazado")
+        self.assertGreaterEqual(correo.proximo_intento, antes + timedelta(seconds=30))
+        self.assertIsNone(correo.reserva)
+        # todavia no toca reintentar
+        self.assertEqual(enviar_pendientes(connection=backend), (0, 0))
+
+        # segundo intento: la espera se duplica hasta el maximo (45s)
+        self.vencer()
+        antes = timezone.now()
+        self.assertEqual(enviar_pendientes(connection=backend), (0, 1))
+        correo.refresh_from_db()
+        self.assertEqual(correo.intentos, 2)
+        self.assertGreaterEqual(correo.proximo_intento, antes + timedelta(seconds=45))
+        self.assertLess(correo.proximo_intento, antes + timedelta(seconds=60))
+
+        # el reintento exitoso limpia el error
+        self.vencer()
+        self.assertEqual(enviar_pendientes(), (1, 0))
+        correo.refresh_from_db()
+        self.assertEqual((correo.estado, correo.intentos, correo.ultimo_error), (CorreoPendiente.ENVIADO, 3, None))
+
+    def test_fallido_al_agotar_los_intentos(self):
+        correo, = self.encolar()
+        for _ in range(3):
+            self.vencer()
+            self.assertEqual(enviar_pendientes(connection=BackendQueFalla()), (0, 1))
+        correo.refresh_from_db()
+        self.assertEqual((correo.estado, correo.intentos), (CorreoPendiente.FALLIDO, 3))
+        # los fallidos quedan para revisar a mano: no se vuelven a tomar
+        self.vencer()
+        self.assertEqual(enviar_pendientes(), (0, 0))
+        self.assertEqual(len(mail.outbox), 0)
+
+    def test_error_de_conexion_cuenta_para_todo_el_lote(self):
+        self.encolar(2)
+        self.assertEqual(enviar_pendientes(connection=BackendQueFalla(al_abrir=True)), (0, 2))
+        for correo in CorreoPendiente.objects.all():
+            self.assertEqual((correo.estado, correo.intentos), (CorreoPendiente.PENDIENTE, 1))
+            self.assertIn("sin servidor", correo.ultimo_error)
+
+    def test_reserva_vencida_se_retoma(self):
+        # un worker que se cayo a mitad del lote deja correos en "enviando"
+        vencido, vigente = self.encolar(2)
+        CorreoPendiente.objects.filter(id=vencido.id).update(
+            estado=CorreoPendiente.ENVIANDO, reserva="otro", proximo_intento=timezone.now() - timedelta(seconds=1),
+        )
+        CorreoPendiente.objects.filter(id=vigente.id).update(
+            estado=CorreoPendiente.ENVIANDO, reserva="otro", proximo_intento=timezone.now() + timedelta(seconds=300),
+        )
+        self.assertEqual(enviar_pendientes(), (1, 0))
+        self.assertEqual(mail.outbox[0].to, [vencido.destinatarios[0]])
+        vigente.refresh_from_db()
+        self.assertEqual((vigente.estado, vigente.reserva), (CorreoPendiente.ENVIANDO, "otro"))
+
+    def test_no_pisa_una_reserva_ajena(self):
+        # si la reserva vencio y otro worker tomo el correo, el resultado de este se descarta
+        correo, = self.encolar()
+
+        class Lento(BaseEmailBackend):
+            def send_messages(self, mensajes):
+                CorreoPendiente.objects.filter(id=correo.id).update(reserva="otro")
+                return len(mensajes)
+
+        self.assertEqual(enviar_pendientes(connection=Lento()), (1, 0))
+        correo.refresh_from_db()
+        self.assertEqual((correo.estado, correo.reserva, correo.intentos), (CorreoPendiente.ENVIANDO, "otro", 0))
+
+    def test_correos_y_consulta_en_la_misma_transaccion(self):
+        datos = {
+            'nombre': "Ana Perez", 'edad': 20, 'correo': "ana@ejemplo.com", 'nivel': "Secundario",
+            'q1': "Tecnológico", 'q2': "Tecnológico", 'q3': "Creativo/Artístico",
+            'q4': "Tecnológico", 'q5': "Social/Humanístico",
+        }
+        with mock.patch.object(views, 'encolar_correos', side_effect=DatabaseError("sin disco")):
+            r = self.client.post('/api/test/', datos, content_type='application/json')
+        self.assertEqual(r.json()['status_class'], "danger")
+        self.assertFalse(Consulta.objects.exists())
+        self.assertEqual(estadisticas.resumen()['total'], 0)
+
+        r = self.client.post('/', datos, headers={'x-requested-with': 'XMLHttpRequest'})
+        self.assertEqual(r.json()['status_class'], "success")
+        self.assertEqual(Consulta.objects.count(), 1)
+        self.assertEqual(CorreoPendiente.objects.filter(estado=CorreoPendiente.PENDIENTE).count(), 2)
+
+
+@override_settings(INSCRIPCIONES_WRITE_BEHIND=False)
+class VistasAsyncTests(TestCase):
+    # index, inscribir y /api/traducir/ son async y se sirven sin salir del event loop
+
+    def setUp(self):
+        usar_traductor(TraductorStub())
+        self.addCleanup(usar_traductor, None)
+
+    def test_middleware_async(self):
+        # un solo middleware solo-sync haria correr las vistas async en un hilo
+        for ruta in settings.MIDDLEWARE:
+            self.assertTrue(getattr(import_string(ruta), 'async_capable', False), ruta)
+
+    async def test_index_guarda_la_consulta(self):
+        datos = {
+            'nombre': "Ana Perez", 'edad': 20, 'correo': "ana@ejemplo.com", 'nivel': "Secundario",
+            'q1': "Tecnológico", 'q2': "Tecnológico", 'q3': "Creativo/Artístico",
+            'q4': "Tecnológico", 'q5': "Social/Humanístico",
+        }
+        r = await self.async_client.post('/', datos, headers={'x-requested-with': 'XMLHttpRequest'})
+        self.assertEqual(r.status_code, 200)
+        self.assertEqual(r.json()['perfil'], "Tecnológico")
+        self.assertEqual(await Consulta.objects.filter(correo="ana@ejemplo.com").acount(), 1)
+
+    async def test_inscribir_pasa_los_datos_por_la_sesion(self):
+        r = await self.async_client.post(
+            '/inscribir/', {'nombre': "Ana", 'correo': "ana@ejemplo.com", 'cursos': ["Curso A"]},
+            headers={'x-requested-with': 'XMLHttpRequest'},
+        )
+        self.assertTrue(r.json()['success'])
+        r = await self.async_client.get('/inscribir/')
+        self.assertContains(r, "Curso A")
+
+    async def test_traducir(self):
+        r = await self.async_client.get('/api/traducir/', {'texto': "hola mundo"})
+        self.assertEqual(r.json(), {'texto_original': "hola mundo", 'traduccion': "[en] hola mundo"})
+        r = await self.async_client.get('/api/traducir/')
+        self.assertEqual(r.status_code, 400)
+
+
+class ExportarTests(TestCase):
+    # exportacion en csv/ndjson (vista y comando): contenido, filtros y gzip
+
+    @classmethod
+    def setUpTestData(cls):
+        perfiles = ["Tecnológico", "Creativo/Artístico", "Social/Humanístico"]
+        niveles = ["Secundario", "Terciario"]
+        Consulta.objects.bulk_create([
+            Consulta(
+                nombre=f"Persona {i}", edad=20 + i, correo=f"persona{i}@ejemplo.com",
+                nivel=niveles[i % 2], q1="Tecnológico", q2="Tecnológico", q3="Tecnológico",
+                q4="Tecnológico", q5="Tecnológico", perfil_obtenido=perfiles[i % 3],
+                cursos_interes="Curso A, Curso B" if i % 4 == 0 else None,
+            )
+            for i in range(30)
+        ])
+        # fecha_consulta es auto_now_add: las fechas se corren despues
+        hoy = timezone.now()
+        for consulta in Consulta.objects.all():
+            Consulta.objects.filter(id=consulta.id).update(
+                fecha_consulta=hoy - timedelta(days=5 * (consulta.edad % 3))
+            )
+        cls.staff = User.objects.create_user('staff', is_staff=True)
+
+    def setUp(self):
+        self.client.force_login(self.staff)
+
+    def ids(self, **filtros):
+        return list(Consulta.objects.filter(**filtros).order_by('id').values_list('id', flat=True))
+
+    def descargar(self, **params):
+        respuesta = self.client.get('/listado/exportar/', params)
+        self.assertTrue(respuesta.streaming)
+        return respuesta, b"".join(respuesta.streaming_content)
+
+    def test_csv(self):
+        respuesta, cuerpo = self.descargar(perfil="Tecnológico")
+        self.assertEqual(respuesta['Content-Type'], 'text/csv; charset=utf-8')
+        self.assertRegex(respuesta['Content-Disposition'], r'attachment; filename="consultas-\d{8}\.csv"')
+        filas = list(csv.reader(io.StringIO(cuerpo.decode('utf-8'))))
+        self.assertEqual(tuple(filas[0]), COLUMNAS_EXPORTACION)
+        self.assertEqual([int(f[0]) for f in filas[1:]], self.ids(perfil_obtenido="Tecnológico"))
+
+        consulta = Consulta.objects.get(id=filas[1][0])
+        self.assertEqual(filas[1][1], consulta.fecha_consulta.isoformat())
+        self.assertEqual(filas[1][2:6], [consulta.nombre, str(consulta.edad), consulta.correo, consulta.nivel])
+        self.assertEqual(filas[1][-1], consulta.cursos_interes or "")
+
+    def test_ndjson_gzip_con_filtros(self):
+        hoy = timezone.localdate()
+        desde = hoy - timedelta(days=5)
+        respuesta, cuerpo = self.descargar(
+            formato="ndjson", gzip="1", nivel="Terciario", desde=desde.isoformat(), hasta=hoy.isoformat(),
+        )
+        self.assertEqual(respuesta['Content-Type'], 'application/gzip')
+        self.assertTrue(respuesta['Content-Disposition'].endswith('.ndjson.gz"'))
+        self.assertEqual(cuerpo[:2], b"\x1f\x8b")
+        lineas = gzip.decompress(cuerpo).decode('utf-8').splitlines()
+        registros = [json.loads(linea) for linea in lineas]
+        esperados = self.ids(
+            nivel="Terciario", fecha_consulta__gte=timezone.now() - timedelta(days=6),
+        )
+        self.assertTrue(esperados)
+        self.assertEqual([r['id'] for r in registros], esperados)
+        self.assertEqual(set(registros[0]), set(COLUMNAS_EXPORTACION))
+        consulta = Consulta.objects.get(id=registros[0]['id'])
+        self.assertEqual(registros[0]['fecha_consulta'], consulta.fecha_consulta.isoformat())
+        self.assertEqual(registros[0]['perfil_obtenido'], consulta.perfil_obtenido)
+
+    def test_gzip_por_bloques_es_un_solo_stream(self):
+        # con lote=4 salen varios bloques comprimidos que juntos forman un gzip valido y completo
+        bloques = list(generar_exportacion({}, 'csv', comprimir=True, lote=4))
+        self.assertGreater(len(bloques), 1)
+        descompresor = zlib.decompressobj(31)
+        texto = descompresor.decompress(b"".join(bloques)).decode('utf-8')
+        self.assertTrue(descompresor.eof)
+        self.assertEqual(descompresor.unused_data, b"")
+        self.assertEqual(len(texto.splitlines()), 31)
+
+    def test_metricas(self):
+        metricas = {}
+        datos = b"".join(generar_exportacion({'nivel': "Secundario"}, 'ndjson', lote=7, metricas=metricas))
+        self.assertEqual(metricas['filas'], 15)
+        self.assertEqual(metricas['bytes'], len(datos))
+        self.assertEqual(len(datos.splitlines()), 15)
+
+    def test_sin_resultados_y_errores(self):
+        _, cuerpo = self.descargar(perfil="Inexistente")
+        self.assertEqual(cuerpo.decode('utf-8').splitlines(), [",".join(COLUMNAS_EXPORTACION)])
+        _, cuerpo = self.descargar(formato="ndjson", perfil="Inexistente")
+        self.assertEqual(cuerpo, b"")
+        self.assertEqual(self.client.get('/listado/exportar/', {'formato': "xml"}).status_code, 400)
+        with self.assertRaises(ValueError):
+            next(generar_exportacion({}, 'xml'))
+
+        self.client.logout()
+        self.assertEqual(self.client.get('/listado/exportar/').status_code, 302)
+
+    def test_comando(self):
+        with tempfile.TemporaryDirectory() as directorio:
+            salida = os.path.join(directorio, 'consultas.ndjson.gz')
+            errores = io.StringIO()
+            call_command('exportar_consultas', formato='ndjson', gzip=True, salida=salida,
+                         perfil="Social/Humanístico", lote=3, stderr=errores)
+            with gzip.open(salida, 'rt', encoding='utf-8') as f:
+                registros = [json.loads(linea) for linea in f]
+            self.assertEqual([r['id'] for r in registros], self.ids(perfil_obtenido="Social/Humanístico"))
+            self.assertIn(f"{len(registros)} filas", errores.getvalue())
+
+            salida = os.path.join(directorio, 'consultas.csv')
+            call_command('exportar_consultas', salida=salida, nivel="Terciario", stderr=io.StringIO())
+            with open(salida, encoding='utf-8', newline='') as f:
+                filas = list(csv.reader(f))
+            self.assertEqual([int(f[0]) for f in filas[1:]], self.ids(nivel="Terciario"))
+
+
+class ExportarAsgiTests(TransactionTestCase):
+    # bajo uvicorn la exportacion tiene que salir por partes y no juntarse en memoria.
+    # TransactionTestCase: el handler asgi corre la vista en su propio hilo y conexion
+
+    def setUp(self):
+        Consulta.objects.bulk_create([
+            Consulta(
+                nombre=f"Persona {i}", edad=20, correo=f"persona{i}@ejemplo.com", nivel="Secundario",
+                q1="Tecnológico", q2="Tecnológico", q3="Tecnológico", q4="Tecnológico", q5="Tecnológico",
+                perfil_obtenido="Tecnológico",
+            )
+            for i in range(4500)
+        ])
+        cliente = Client()
+        cliente.force_login(User.objects.create_user('staff', is_staff=True))
+        self.cookie = f"{settings.SESSION_COOKIE_NAME}={cliente.cookies[settings.SESSION_COOKIE_NAME].value}"
+
+    async def pedir(self, ruta):
+        entrada = asyncio.Queue()
+        await entrada.put({'type': 'http.request', 'body': b'', 'more_body': False})
+        mensajes = []
+
+        async def enviar(mensaje):
+            mensajes.append(mensaje)
+
+        scope = {
+            'type': 'http', 'asgi': {'version': '3.0'}, 'http_version': '1.1', 'method': 'GET',
+            'scheme': 'http', 'path': ruta, 'query_string': b'', 'root_path': '',
+            'headers': [(b'host', b'testserver'), (b'cookie', self.cookie.encode())],
+            'client': ('127.0.0.1', 5000), 'server': ('testserver', 80),
+        }
+        await ASGIHandler()(scope, entrada.get, enviar)
+        return mensajes
+
+    async def test_exportacion_por_partes(self):
+        with warnings.catch_warnings(record=True) as avisos:
+            warnings.simplefilter('always')
+            mensajes = await self.pedir('/listado/exportar/')
+        # con un iterador sincronico django lo consume entero con list() y avisa
+        self.assertFalse([a for a in avisos if "synchronous iterators" in str(a.message)])
+        self.assertEqual(mensajes[0]['status'], 200)
+        cuerpos = [m for m in mensajes if m['type'] == 'http.response.body']
+        # un mensaje por bloque de 2000 filas (y el de cierre)
+        self.assertGreaterEqual(sum(1 for m in cuerpos if m.get('more_body')), 3)
+        filas = list(csv.reader(io.StringIO(b"".join(m.get('body', b"") for m in cuerpos).decode('utf-8'))))
+        self.assertEqual(filas[0][:2], ['id', 'fecha_consulta'])
+        self.assertEqual(len(filas), 4501)
+
+
+class ConexionesAsgiTests(TransactionTestCase):
+    # bajo asgi cada request corre su codigo sincronico en un hilo propio, con su
+    # propia conexion: con CONN_MAX_AGE > 0 ninguna se reutiliza y quedan abiertas
+
+    async def pedir(self, i):
+        entrada = asyncio.Queue()
+        await entrada.put({'type': 'http.request', 'body': b'', 'more_body': False})
+        mensajes = []
+
+        async def enviar(mensaje):
+            mensajes.append(mensaje)
+
+        scope = {
+            'type': 'http', 'asgi': {'version': '3.0'}, 'http_version': '1.1', 'method': 'GET',
+            'scheme': 'http', 'path': '/api/traducir/', 'query_string': f"texto=hola {i}".encode(),
+            'root_path': '', 'headers': [(b'host', b'testserver')],
+            'client': ('127.0.0.1', 5000), 'server': ('testserver', 80),
+        }
+        await ASGIHandler()(scope, entrada.get, enviar)
+        return mensajes[0]['status']
+
+    async def pedir_varios(self, cantidad):
+        return await asyncio.gather(*(self.pedir(i) for i in range(cantidad)))
+
+    def test_cada_request_cierra_su_conexion(self):
+        # con asyncio.run y no como test async: dentro de async_to_sync django
+        # correria todo en el hilo del test, en lugar de un hilo por request.
+        # sqlite en memoria nunca cierra de verdad, asi que se anotan los close()
+        usar_traductor(TraductorStub())
+        self.addCleanup(usar_traductor, None)
+        edad = ajustes_de_produccion()['DATABASES']['default']['CONN_MAX_AGE']
+        self.assertEqual(edad, 0)
+
+        creadas = []
+
+        def anotar(sender, connection, **kwargs):
+            creadas.append(connection)
+
+        connection_created.connect(anotar)
+        self.addCleanup(connection_created.disconnect, anotar)
+        with mock.patch.dict(connections.settings['default'], CONN_MAX_AGE=edad), \
+                mock.patch.object(type(connections['default']), 'close', autospec=True) as cerrar:
+            estados = asyncio.run(self.pedir_varios(10))
+        self.assertEqual(estados, [200] * 10)
+        # una conexion por request, y cada una se cierra al terminar el suyo
+        self.assertEqual(len(creadas), 10)
+        cerradas = {id(llamada.args[0]) for llamada in cerrar.call_args_list}
+        self.assertEqual([c for c in creadas if id(c) not in cerradas], [])
+
+
+@override_settings(INSCRIPCIONES_WRITE_BEHIND=False)
+class EnvioJsonTests(TestCase):
+    # /api/test/: mismo resultado y mismas reglas que el envio ajax con TestForm
+
+    DATOS = {
+        'nombre': "Ana Perez", 'edad': 20, 'correo': "ana@ejemplo.com", 'nivel': "Secundario",
+        'q1': "Tecnológico", 'q2': "Tecnológico", 'q3': "Creativo/Artístico",
+        'q4': "Tecnológico", 'q5': "Social/Humanístico",
+    }
+
+    def setUp(self):
+        usar_traductor(TraductorStub())
+        self.addCleanup(usar_traductor, None)
+
+    def enviar(self, datos):
+        return self.client.post('/api/test/', datos, content_type='application/json')
+
+    def test_mismas_reglas_que_testform(self):
+        casos = [
+            {},
+            {'nombre': "  José Núñez  "},
+            {'nombre': "Ana 2"},
+            {'nombre': "   "},
+            {'nombre': "A" * 101},
+            {'nombre': None},
+            {'edad': 15},
+            {'edad': 16},
+            {'edad': "30"},
+            {'edad': "30.0"},
+            {'edad': "treinta"},
+            {'edad': 0},
+            {'edad': 20.5},
+            {'edad': None},
+            {'correo': "x"},
+            {'correo': " ana@ejemplo.com "},
+            {'correo': ""},
+            {'nivel': "Jardín"},
+            {'nivel': ""},
+            {'q3': "Otra cosa"},
+            {'q5': 1},
+        ]
+        for cambios in casos:
+            datos = {**self.DATOS, **cambios}
+            with self.subTest(cambios=cambios):
+                form = TestForm({k: v for k, v in datos.items() if v is not None})
+                limpios, errores = validar_envio({k: v for k, v in datos.items() if v is not None})
+                self.assertEqual(errores, {k: list(v) for k, v in form.errors.items()})
+                if form.is_valid():
+                    self.assertEqual(limpios, form.cleaned_data)
+
+    def test_no_es_un_objeto(self):
+        self.assertEqual(validar_envio([1, 2])[1], {'__all__': ["Se esperaba un objeto JSON."]})
+        r = self.client.post('/api/test/', "{no es json", content_type='application/json')
+        self.assertEqual(r.status_code, 400)
+        self.assertEqual(self.client.get('/api/test/').status_code, 405)
+
+    def test_resultado_igual_al_de_index(self):
+        ajax = self.client.post('/', self.DATOS, headers={'x-requested-with': 'XMLHttpRequest'}).json()
+        r = self.enviar(self.DATOS)
+        self.assertEqual(r.status_code, 200)
+        datos = r.json()
+        self.assertEqual(set(datos), {
+            'perfil', 'descripcion', 'traduccion_descripcion', 'cursos', 'consulta', 'user_message', 'status_class',
+        })
+        for clave in ('perfil', 'descripcion', 'traduccion_descripcion', 'cursos', 'user_message', 'status_class'):
+            self.assertEqual(datos[clave], ajax[clave], clave)
+
+    def test_guarda_estadisticas_version_y_correos(self):
+        version, _ = version_actual()
+        r = self.enviar({**self.DATOS, 'nombre': " Ana Perez "})
+        consulta = Consulta.objects.get()
+        self.assertEqual(consulta.nombre, "Ana Perez")
+        self.assertEqual(consulta.perfil_obtenido, "Tecnológico")
+        self.assertEqual(version_actual()[0], version + 1)
+        self.assertEqual(estadisticas.resumen()['total'], 1)
+        self.assertEqual(
+            sorted(c.destinatarios for c in CorreoPendiente.objects.all()),
+            sorted([[settings.DEFAULT_FROM_EMAIL], ["ana@ejemplo.com"]]),
+        )
+
+        # la inscripcion posterior se vincula con la consulta
+        self.client.post(
+            '/inscribir/', {'nombre': "Ana Perez", 'correo': "ana@ejemplo.com", 'cursos': ["Oratoria"],
+                            'consulta': r.json()['consulta']},
+            headers={'x-requested-with': 'XMLHttpRequest'},
+        )
+        consulta.refresh_from_db()
+        self.assertEqual(consulta.cursos_interes, "Oratoria")
+
+    def test_errores_como_form_errors(self):
+        r = self.enviar({**self.DATOS, 'edad': 15, 'q1': ""})
+        self.assertEqual(r.status_code, 400)
+        self.assertEqual(r.json()['errors'], {
+            'edad': ["Debes tener al menos 16 años para realizar el test."],
+            'q1': ["Debes responder la Pregunta 1."],
+        })
+        self.assertFalse(Consulta.objects.exists())
+
+
+def recuento_estadisticas():
+    # {(dia, perfil, nivel): cantidad} contando Consulta directamente
+    return Counter(
+        estadisticas.clave_estadistica(*fila)
+        for fila in Consulta.objects.values_list('fecha_consulta', 'perfil_obtenido', 'nivel')
+    )
+
+
+def tabla_estadisticas():
+    return Counter({
+        (f.dia, f.perfil, f.nivel): f.cantidad
+        for f in EstadisticaDiaria.objects.exclude(cantidad=0)
+    })
+
+
+class EstadisticasTests(TestCase):
+    # EstadisticaDiaria tiene que coincidir siempre con un recuento exacto de Consulta
+
+    def setUp(self):
+        self.staff = User.objects.create_user('staff', is_staff=True)
+
+    def crear(self, perfil="Tecnológico", nivel="Secundario", **extra):
+        return Consulta.objects.create(
+            nombre="Ana", edad=20, correo="ana@ejemplo.com", nivel=nivel,
+            q1="Tecnológico", q2="Tecnológico", q3="Tecnológico", q4="Tecnológico", q5="Tecnológico",
+            perfil_obtenido=perfil, **extra,
+        )
+
+    def recuento(self):
+        return recuento_estadisticas()
+
+    def tabla(self):
+        return tabla_estadisticas()
+
+    def assertCoincide(self):
+        self.assertEqual(self.tabla(), self.recuento())
+
+    def test_alta_y_edicion_de_perfil_nivel_y_fecha(self):
+        a = self.crear()
+        self.crear(perfil="Creativo/Artístico")
+        self.assertCoincide()
+
+        a.perfil_obtenido = "Social/Humanístico"
+        a.save()
+        self.assertCoincide()
+
+        a.nivel = "Terciario"
+        a.save(update_fields=['nivel'])
+        self.assertCoincide()
+
+        a.fecha_consulta = a.fecha_consulta - timedelta(days=3)
+        a.save()
+        self.assertCoincide()
+
+        # guardar sin cambios no mueve nada
+        antes = self.tabla()
+        a.save()
+        self.assertEqual(self.tabla(), antes)
+
+    def test_instancias_viejas_o_parciales(self):
+        a = self.crear()
+        # otra instancia cambia la fila despues de que `a` la cargo
+        otra = Consulta.objects.get(pk=a.pk)
+        otra.perfil_obtenido = "Creativo/Artístico"
+        otra.save()
+        a.nivel = "Universitario"
+        a.save()
+        self.assertCoincide()
+
+        a.refresh_from_db()
+        a.perfil_obtenido = "Tecnológico"
+        a.save()
+        self.assertCoincide()
+
+        # cargada con only(): sin los campos de la estadistica
+        parcial = Consulta.objects.only('id', 'perfil_obtenido').get(pk=a.pk)
+        parcial.perfil_obtenido = "Científico/Analítico"
+        parcial.save()
+        self.assertCoincide()
+
+        # instancia armada a mano con el pk de una fila existente
+        fila = Consulta.objects.values().get(pk=a.pk)
+        Consulta(**{**fila, 'nivel': "Secundario"}).save()
+        self.assertCoincide()
+
+    def test_borrado(self):
+        a, b, c = self.crear(), self.crear(nivel="Terciario"), self.crear(perfil="Creativo/Artístico")
+        a.delete()
+        self.assertCoincide()
+        Consulta.objects.filter(pk__in=[b.pk, c.pk]).delete()
+        self.assertCoincide()
+        self.assertEqual(estadisticas.resumen()['total'], 0)
+
+    def test_vistas_de_edicion_y_api(self):
+        a = self.crear()
+        self.client.force_login(self.staff)
+        datos = {
+            'nombre': "Ana", 'edad': 20, 'correo': "ana@ejemplo.com", 'nivel': "Terciario",
+            'q1': "Creativo/Artístico", 'q2': "Creativo/Artístico", 'q3': "Creativo/Artístico",
+            'q4': "Tecnológico", 'q5': "Tecnológico",
+        }
+        # editar recalcula el perfil y cambia el nivel
+        self.client.post(f'/editar/{a.pk}/', datos)
+        self.assertEqual(Consulta.objects.get(pk=a.pk).perfil_obtenido, "Creativo/Artístico")
+        self.assertCoincide()
+
+        r = self.client.put(f'/api/consultas/{a.pk}/', {**datos, 'perfil_obtenido': "Social/Humanístico"},
+                            content_type='application/json')
+        self.assertEqual(r.status_code, 200)
+        self.assertCoincide()
+        self.assertEqual(self.client.delete(f'/api/consultas/{a.pk}/').status_code, 204)
+        self.assertCoincide()
+
+    def test_reconstruir_coincide_con_el_recuento(self):
+        perfiles = ["Tecnológico", "Creativo/Artístico", "Social/Humanístico"]
+        Consulta.objects.bulk_create([
+            Consulta(
+                nombre="Ana", edad=20, correo="ana@ejemplo.com", nivel=["Secundario", "Terciario"][i % 2],
+                q1="Tecnológico", q2="Tecnológico", q3="Tecnológico", q4="Tecnológico", q5="Tecnológico",
+                perfil_obtenido=perfiles[i % 3],
+            )
+            for i in range(40)
+        ])
+        ids = list(Consulta.objects.values_list('id', flat=True))
+        for dias in range(4):
+            Consulta.objects.filter(id__in=ids[dias::4]).update(fecha_consulta=timezone.now() - timedelta(days=dias))
+        # bulk_create y update no pasan por las señales: la tabla queda desfasada
+        EstadisticaDiaria.objects.create(dia=timezone.localdate(), perfil="Viejo", nivel="X", cantidad=7)
+        self.assertNotEqual(self.tabla(), self.recuento())
+
+        salida = io.StringIO()
+        call_command('reconstruir_estadisticas', stdout=salida)
+        self.assertCoincide()
+        # una fila por dia, perfil y nivel con consultas (la de "Viejo" desaparece)
+        self.assertEqual(EstadisticaDiaria.objects.count(), len(self.recuento()))
+        self.assertIn(f"Estadísticas reconstruidas: {len(self.recuento())} filas", salida.getvalue())
+        self.assertEqual(estadisticas.resumen()['total'], 40)
+
+
+class RescoreTests(TestCase):
+    # rescore_consultas: dry-run, lotes con checkpoint para retomar y ajuste de estadisticas
+
+    @classmethod
+    def setUpTestData(cls):
+        consultas = []
+        for i in range(10):
+            respuestas = {
+                p.campo: list(p.opciones)[(i + n) % len(p.opciones)]
+                for n, p in enumerate(cuestionario.preguntas)
+            }
+            correcto = cuestionario.puntuar_lote([respuestas])[0]
+            consultas.append(Consulta(
+                nombre="Ana", edad=20, correo="ana@ejemplo.com", nivel="Secundario", **respuestas,
+                # las pares quedaron con un perfil viejo
+                perfil_obtenido="Viejo" if i % 2 == 0 else correcto,
+            ))
+        Consulta.objects.bulk_create(consultas)
+        estadisticas.reconstruir()
+        campos = [p.campo for p in cuestionario.preguntas]
+        filas = list(Consulta.objects.order_by('id').values_list('id', *campos))
+        perfiles = cuestionario.puntuar_lote([dict(zip(campos, fila[1:])) for fila in filas])
+        cls.esperados = {fila[0]: perfil for fila, perfil in zip(filas, perfiles)}
+
+    def setUp(self):
+        self.directorio = tempfile.mkdtemp()
+        self.checkpoint = os.path.join(self.directorio, 'checkpoint')
+
+    def rescore(self, **options):
+        salida = io.StringIO()
+        call_command('rescore_consultas', checkpoint=self.checkpoint, stdout=salida, **options)
+        return salida.getvalue()
+
+    def perfiles(self):
+        return dict(Consulta.objects.values_list('id', 'perfil_obtenido'))
+
+    def test_dry_run_no_escribe(self):
+        antes, tabla, version = self.perfiles(), tabla_estadisticas(), version_actual()
+        salida = self.rescore(dry_run=True, lote=3, mostrar=2)
+        self.assertEqual(self.perfiles(), antes)
+        self.assertEqual(tabla_estadisticas(), tabla)
+        self.assertEqual(version_actual(), version)
+        self.assertFalse(os.path.exists(self.checkpoint))
+        primero = min(self.esperados)
+        self.assertIn(f"#{primero}: 'Viejo' -> {self.esperados[primero]!r}", salida)
+        self.assertEqual(salida.count("'Viejo' ->"), 2)
+        self.assertIn("5 a cambiar (dry-run)", salida)
+
+    def test_actualiza_por_lotes_con_estadisticas(self):
+        version, _ = version_actual()
+        salida = self.rescore(lote=3)
+        self.assertEqual(self.perfiles(), self.esperados)
+        # bulk_update no dispara señales: los deltas dejan la tabla como un recuento
+        self.assertEqual(tabla_estadisticas(), recuento_estadisticas())
+        self.assertNotIn("Viejo", {perfil for _, perfil, _ in tabla_estadisticas()})
+        # una linea de progreso por lote de 3 y una version por lote con cambios (el ultimo no tiene)
+        self.assertEqual(salida.count("filas leídas"), 4)
+        self.assertEqual(version_actual()[0], version + 3)
+        self.assertIn("10 filas", salida)
+        self.assertFalse(os.path.exists(self.checkpoint))
+
+        # una segunda pasada no encuentra nada que cambiar
+        self.assertIn("0 actualizadas", self.rescore(lote=3))
+
+    def test_retoma_desde_el_checkpoint(self):
+        from landing.management.commands.rescore_consultas import Command
+
+        escribir = Command._escribir_checkpoint
+        llamadas = []
+
+        def caer_en_el_segundo(comando, ruta, ultimo_id):
+            # el proceso muere despues de confirmar el segundo lote y antes de anotarlo
+            llamadas.append(ultimo_id)
+            if len(llamadas) == 2:
+                raise KeyboardInterrupt
+            escribir(comando, ruta, ultimo_id)
+
+        with mock.patch.object(Command, '_escribir_checkpoint', caer_en_el_segundo):
+            with self.assertRaises(KeyboardInterrupt):
+                self.rescore(lote=3)
+        ids = sorted(self.esperados)
+        with open(self.checkpoint) as f:
+            self.assertEqual(int(f.read()), ids[2])
+
+        salida = self.rescore(lote=3)
+        self.assertIn(f"Retomando después del id {ids[2]}.", salida)
+        self.assertIn("7 filas", salida)
+        # el lote repetido no vuelve a mover las estadisticas
+        self.assertEqual(self.perfiles(), self.esperados)
+        self.assertEqual(tabla_estadisticas(), recuento_estadisticas())
+
+    def test_desde_id_reiniciar_y_checkpoint_invalido(self):
+        ids = sorted(self.esperados)
+        self.rescore(desde_id=ids[4])
+        perfiles = self.perfiles()
+        self.assertEqual([perfiles[i] for i in ids[:5]].count("Viejo"), 3)
+        self.assertNotIn("Viejo", [perfiles[i] for i in ids[5:]])
+
+        with open(self.checkpoint, 'w') as f:
+            f.write(str(ids[-1]))
+        self.assertIn("0 actualizadas", self.rescore())
+        with open(self.checkpoint, 'w') as f:
+            f.write(str(ids[-1]))
+        self.assertIn("3 actualizadas", self.rescore(reiniciar=True))
+        self.assertEqual(self.perfiles(), self.esperados)
+
+        with open(self.checkpoint, 'w') as f:
+            f.write("basura")
+        with self.assertRaises(CommandError):
+            self.rescore()
+
+
+def ajustes_de_produccion():
+    # mi_sitio/settings.py evaluado como en render (RENDER=true)
+    with mock.patch.dict(os.environ, {'RENDER': 'true'}):
+        return runpy.run_path(os.path.join(settings.BASE_DIR, 'mi_sitio', 'settings.py'))
+
+
+# los tests de paginas y de rendimiento corren con los caches que se despliegan
+CACHES_PRODUCCION = ajustes_de_produccion()['CACHES']
+
+
+@override_settings(CACHES=CACHES_PRODUCCION)
+class PaginasCacheadasTests(TestCase):
+
+    def setUp(self):
+        caches['paginas'].clear()
+        paginas.reset_stats()
+
+    def token(self, respuesta):
+        return re.search(r'name="csrfmiddlewaretoken" value="([^"]+)"', respuesta.content.decode()).group(1)
+
+    def test_anonimos_comparten_la_pagina(self):
+        for url in ('/', '/sobre-nosotros/', '/contacto/'):
+            self.assertEqual(self.client.get(url)['X-Cache-Pagina'], 'MISS')
+            respuesta = self.client.get(url)
+            self.assertEqual(respuesta['X-Cache-Pagina'], 'HIT')
+            self.assertIn('Cookie', respuesta['Vary'])
+        self.assertEqual(paginas.resumen()['ratio_hits'], 0.5)
+
+    def test_token_csrf_propio_en_la_pagina_cacheada(self):
+        self.client.get('/contacto/')
+        visitante = Client(enforce_csrf_checks=True)
+        respuesta = visitante.get('/contacto/')
+        self.assertEqual(respuesta['X-Cache-Pagina'], 'HIT')
+        self.assertNotIn(paginas.MARCADOR_CSRF, respuesta.content.decode())
+        respuesta = visitante.post('/contacto/', {
+            'nombre': "Ana Perez", 'correo': "ana@ejemplo.com", 'mensaje': "Quisiera más información.",
+            'csrfmiddlewaretoken': self.token(respuesta),
+        })
+        self.assertEqual(respuesta.status_code, 200)
+
+    def test_sin_queries_con_el_cache_de_produccion(self):
+        # ni el MISS ni el HIT tocan la db; las paginas sin cache tampoco
+        for url in ('/', '/sobre-nosotros/', '/contacto/'):
+            for estado in ('MISS', 'HIT'):
+                with self.assertNumQueries(0):
+                    respuesta = self.client.get(url)
+                self.assertEqual(respuesta['X-Cache-Pagina'], estado)
+        with self.assertNumQueries(0):
+            self.assertEqual(self.client.get('/registro/').status_code, 200)
+
+    def test_usuarios_logueados_no_usan_la_cache(self):
+        self.client.get('/sobre-nosotros/')
+        self.client.force_login(User.objects.create_user('ana', password='x'))
+        respuesta = self.client.get('/sobre-nosotros/')
+        self.assertNotIn('X-Cache-Pagina', respuesta)
+        self.assertContains(respuesta, "Hola, ana")
+
+
+@override_settings(INSCRIPCIONES_WRITE_BEHIND=False)
+class TraspasoInscripcionTests(TestCase):
+    # el POST ajax de /inscribir/ deja los datos en una cookie firmada para el GET siguiente
+
+    def inscribir(self, cursos):
+        return self.client.post(
+            '/inscribir/', {'nombre': "Ana", 'correo': "ana@ejemplo.com", 'cursos': cursos},
+            headers={'x-requested-with': 'XMLHttpRequest'},
+        )
+
+    def test_sin_sesion_en_la_db(self):
+        with CaptureQueriesContext(connection) as capturadas:
+            self.inscribir(["Curso A"])
+            respuesta = self.client.get('/inscribir/')
+        self.assertContains(respuesta, "Curso A")
+        self.assertFalse([q for q in capturadas.captured_queries if 'django_session' in q['sql']])
+
+        # se usa una sola vez
+        self.assertEqual(respuesta.cookies[traspaso.NOMBRE_COOKIE].value, '')
+        self.assertNotContains(self.client.get('/inscribir/'), "Curso A")
+
+    @override_settings(INSCRIPCION_COOKIE_MAX=200)
+    def test_contenido_grande_va_al_cache(self):
+        cursos = [f"Curso {i}" for i in range(100)]
+        respuesta = self.inscribir(cursos)
+        self.assertLess(len(respuesta.cookies[traspaso.NOMBRE_COOKIE].value), 200)
+        self.assertContains(self.client.get('/inscribir/'), "Curso 99")
+
+    def test_cookie_alterada(self):
+        self.inscribir(["Curso A"])
+        cookie = self.client.cookies[traspaso.NOMBRE_COOKIE]
+        cookie.set(cookie.key, cookie.value[:-2] + "xx", cookie.value[:-2] + "xx")
+        self.assertNotContains(self.client.get('/inscribir/'), "Curso A")
+
+
+class BufferInscripcionesTests(TestCase):
+    # el hilo del buffer no corre en estos tests (lote e intervalo grandes):
+    # se vacia a mano para escribir con la conexion del test
+
+    def setUp(self):
+        self.directorio = tempfile.mkdtemp()
+        self.consulta = Consulta.objects.create(
+            nombre="Ana", edad=20, correo="ana@ejemplo.com", nivel="Secundario",
+            q1="Tecnológico", q2="Tecnológico", q3="Tecnológico", q4="Tecnológico", q5="Tecnológico",
+            perfil_obtenido="Tecnológico",
+        )
+
+    def buffer(self, **kwargs):
+        kwargs.setdefault('lote', 1000)
+        kwargs.setdefault('intervalo', 3600)
+        buffer = BufferInscripciones(directorio=self.directorio, fsync=False, **kwargs)
+        self.addCleanup(buffer.cerrar)
+        return buffer
+
+    def caer(self, buffer):
+        # el proceso muere sin vaciar: el lock se libera y el diario queda
+        with buffer._cond:
+            buffer._cerrado = True
+            buffer._cond.notify_all()
+        buffer._lock.close()
+        buffer._lock = None
+
+    def test_escribe_por_lotes_y_completa_la_consulta(self):
+        buffer = self.buffer()
+        self.assertTrue(buffer.agregar("Ana", "ana@ejemplo.com", ["Curso A"], self.consulta.id))
+        self.assertTrue(buffer.agregar("Ana", "ana@ejemplo.com", ["Curso B", "Curso C"], self.consulta.id))
+        self.assertTrue(buffer.agregar("Beto", "beto@ejemplo.com", ["Curso A"]))
+        self.assertEqual(Inscripcion.objects.count(), 0)
+
+        self.assertEqual(buffer.vaciar(), 3)
+        self.assertEqual(self.consulta.inscripciones.count(), 2)
+        self.consulta.refresh_from_db()
+        self.assertEqual(self.consulta.cursos_interes, "Curso B, Curso C")
+        self.assertEqual(buffer.resumen()['pendientes'], 0)
+
+    def test_recupera_el_diario_de_un_proceso_caido(self):
+        caido = self.buffer()
+        caido.agregar("Ana", "ana@ejemplo.com", ["Curso A"], self.consulta.id)
+        caido.agregar("Beto", "beto@ejemplo.com", ["Curso B"])
+        self.caer(caido)
+        registros = list(caido._pendientes)
+
+        nuevo = self.buffer()
+        nuevo.agregar("Carla", "carla@ejemplo.com", ["Curso C"])
+        self.assertEqual(nuevo.stats['recuperadas'], 2)
+        self.assertEqual(nuevo.vaciar(), 3)
+        self.assertEqual(Inscripcion.objects.count(), 3)
+
+        # reescribir un lote ya guardado no duplica filas
+        escribir(registros)
+        self.assertEqual(Inscripcion.objects.count(), 3)
+
+    def test_recupera_al_iniciar(self):
+        # un proceso nuevo retoma el diario al cargar la aplicacion, sin esperar
+        # a que llegue otra inscripcion
+        caido = self.buffer()
+        caido.agregar("Ana", "ana@ejemplo.com", ["Curso A"], self.consulta.id)
+        self.caer(caido)
+
+        nuevo = self.buffer()
+        with mock.patch('landing.inscripciones.buffer_inscripciones', nuevo):
+            inscripciones.iniciar()
+        self.assertEqual(nuevo.resumen()['pendientes'], 1)
+        self.assertEqual(nuevo.vaciar(), 1)
+        self.assertEqual(self.consulta.inscripciones.get().cursos, ["Curso A"])
+
+    def test_fsync_sin_el_lock(self):
+        buffer = BufferInscripciones(directorio=self.directorio, lote=1000, intervalo=3600, fsync=True)
+        self.addCleanup(buffer.cerrar)
+        con_lock = []
+        fsync = os.fsync
+
+        def espia(fd):
+            con_lock.append(buffer._cond._is_owned())
+            fsync(fd)
+
+        with mock.patch('landing.inscripciones.os.fsync', espia):
+            buffer.agregar("Ana", "ana@ejemplo.com", ["Curso A"])
+            buffer.agregar("Beto", "beto@ejemplo.com", ["Curso B"])
+        self.assertEqual(con_lock, [False, False])
+        self.assertEqual(buffer.vaciar(), 2)
+
+    def test_buffer_lleno_escribe_en_el_momento(self):
+        buffer = self.buffer(maximo=0)
+        self.assertFalse(buffer.agregar("Ana", "ana@ejemplo.com", ["Curso A"]))
+        self.assertEqual(Inscripcion.objects.count(), 1)
+        self.assertEqual(buffer.stats['sincronicas'], 1)
+
+    @override_settings(INSCRIPCIONES_WRITE_BEHIND=False)
+    def test_inscribir_vincula_la_consulta(self):
+        respuesta = self.client.post('/inscribir/', {
+            'nombre': "Ana", 'correo': "ana@ejemplo.com", 'cursos': ["Curso A"],
+            'consulta': firmar_consulta(self.consulta.id),
+        }, headers={'x-requested-with': 'XMLHttpRequest'})
+        self.assertTrue(respuesta.json()['success'])
+        self.assertEqual(self.consulta.inscripciones.get().cursos, ["Curso A"])
+
+        # un id sin firma no vincula nada
+        self.client.post('/inscribir/', {
+            'nombre': "Ana", 'correo': "ana@ejemplo.com", 'cursos': ["Curso B"],
+            'consulta': str(self.consulta.id),
+        }, headers={'x-requested-with': 'XMLHttpRequest'})
+        self.assertIsNone(Inscripcion.objects.get(cursos=["Curso B"]).consulta_id)
+
+
+class MetricasTests(TestCase):
+
+    def setUp(self):
+        metricas.reset()
+        usar_traductor(TraductorStub())
+        self.addCleanup(usar_traductor, None)
+
+    def muestra(self, nombre, **labels):
+        buscadas = {(k, str(v)) for k, v in labels.items()}
+        return sum(
+            valor for _, n, l, valor in metricas.muestras()
+            if n == nombre and buscadas <= set(l)
+        )
+
+    def test_cuenta_queries_y_tamano_por_vista(self):
+        with CaptureQueriesContext(connection) as capturadas:
+            respuesta = self.client.post('/contacto/', {
+                'nombre': "Ana Perez", 'correo': "ana@ejemplo.com", 'mensaje': "Quisiera más información.",
+            })
+        self.assertEqual(self.muestra('landing_vista_respuestas_total', vista='contacto', codigo=200), 1)
+        self.assertEqual(self.muestra('landing_vista_queries_sum', vista='contacto'), len(capturadas))
+        self.assertEqual(self.muestra('landing_vista_respuesta_bytes_sum', vista='contacto'), len(respuesta.content))
+        self.assertEqual(self.muestra('landing_externo_segundos_count', servicio='correo'), 1)
+
+    async def test_tiempo_externo_en_vistas_async(self):
+        await self.async_client.get('/api/traducir/', {'texto': "hola"})
+        self.assertEqual(self.muestra('landing_externo_segundos_count', servicio='traduccion'), 1)
+        self.assertGreater(
+            self.muestra('landing_vista_externo_segundos_total', vista='traducir', servicio='traduccion'), 0
+        )
+
+    @override_settings(METRICAS_LENTA_MS=0)
+    def test_request_lenta_deja_una_linea_json(self):
+        with self.assertLogs('landing.metricas', 'WARNING') as logs:
+            self.client.get('/sobre-nosotros/')
+        linea = json.loads(logs.records[0].getMessage())
+        self.assertEqual((linea['evento'], linea['vista'], linea['codigo']), ('request_lenta', 'sobre_nosotros', 200))
+
+    @override_settings(METRICAS_TOKEN='secreto', METRICAS_DIRECTORIO=None)
+    def test_endpoint_solo_staff_o_token(self):
+        self.assertEqual(self.client.get('/metrics/').status_code, 403)
+        respuesta = self.client.get('/metrics/', headers={'authorization': 'Bearer secreto'})
+        self.assertEqual(respuesta.status_code, 200)
+        self.assertIn("# TYPE landing_vista_segundos histogram", respuesta.content.decode())
+
+        self.client.force_login(User.objects.create_user('admin', password='x', is_staff=True))
+        texto = self.client.get('/metrics/').content.decode()
+        self.assertIn('landing_vista_segundos_bucket{metodo="GET",vista="metricas",le="+Inf"} 2', texto)
+
+    def test_suma_los_workers(self):
+        directorio = tempfile.mkdtemp()
+        # un worker que ya termino: su contador cuenta, su gauge no
+        with open(f"{directorio}/999999999.json", 'w') as f:
+            json.dump({'pid': 999999999, 'muestras': [
+                ['landing_vista_respuestas_total', 'landing_vista_respuestas_total',
+                 [['codigo', '200'], ['metodo', 'GET'], ['vista', 'index']], 3],
+                ['landing_inscripciones_pendientes', 'landing_inscripciones_pendientes', [], 7],
+            ]}, f)
+        metricas.contar('landing_vista_respuestas_total', vista='index', metodo='GET', codigo=200)
+        with self.settings(METRICAS_DIRECTORIO=directorio):
+            texto = metricas.exposicion()
+        self.assertIn('landing_vista_respuestas_total{codigo="200",metodo="GET",vista="index"} 4', texto)
+        self.assertIn('landing_inscripciones_pendientes 0', texto)
+
+
+class TraductorContador(TraductorStub):
+    # traductor local que cuenta las llamadas "salientes"
+
+    def __init__(self):
+        super().__init__()
+        self.llamadas = 0
+        self._lock_llamadas = threading.Lock()
+
+    def __call__(self, text, target_lang):
+        with self._lock_llamadas:
+            self.llamadas += 1
+        return super().__call__(text, target_lang)
+
+
+# con RENDIMIENTO_FILAS y RENDIMIENTO_FACTOR se ajustan el volumen de datos y
+# los presupuestos de latencia (por ejemplo en una maquina lenta)
+FILAS_RENDIMIENTO = int(os.environ.get('RENDIMIENTO_FILAS', 2000))
+FACTOR_LATENCIA = float(os.environ.get('RENDIMIENTO_FACTOR', 1))
+AJAX = {'x-requested-with': 'XMLHttpRequest'}
+
+
+@override_settings(
+    CACHES=CACHES_PRODUCCION,
+    EMAIL_BACKEND='django.core.mail.backends.locmem.EmailBackend',
+    INSCRIPCIONES_WRITE_BEHIND=False,
+    METRICAS_DIRECTORIO=None,
+    METRICAS_LENTA_MS=60 * 1000,
+)
+class RendimientoVistasTests(TestCase):
+    # cantidad exacta de queries, llamadas al traductor y presupuesto de latencia
+    # de cada url de landing/urls.py, con un volumen de datos realista. Un N+1
+    # o una llamada externa de mas hacen fallar el test de esa url
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        # sin catalogo: todas las traducciones del test pasan por el traductor
+        traduccion.catalogo_traducciones._datos = {'version': None, 'idiomas': {}}
+        tabla_resultados.cache_clear()
+
+    @classmethod
+    def tearDownClass(cls):
+        traduccion.catalogo_traducciones.recargar()
+        tabla_resultados.cache_clear()
+        super().tearDownClass()
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.staff = User.objects.create_user('staff', password='x', is_staff=True)
+        cls.usuario = User.objects.create_user('usuario', password='x')
+
+        perfiles = list(PERFILES)
+        niveles = ["Primario", "Secundario", "Terciario", "Universitario", "Doctorado"]
+        nombres = ["Ana Perez", "Bruno Diaz", "Carla Gomez", "Diego Lopez", "Elena Ruiz", "Facundo Sosa"]
+        Consulta.objects.bulk_create(
+            [
+                Consulta(
+                    nombre=nombres[i % len(nombres)], edad=16 + i % 40, correo=f"persona{i}@ejemplo.com",
+                    nivel=niveles[i % len(niveles)],
+                    q1=perfiles[i % 4], q2=perfiles[(i // 4) % 4], q3=perfiles[(i // 16) % 4],
+                    q4=perfiles[(i // 64) % 4], q5=perfiles[(i // 256) % 4],
+                    perfil_obtenido=perfiles[i % 4],
+                )
+                for i in range(FILAS_RENDIMIENTO)
+            ],
+            batch_size=500,
+        )
+        # las consultas se reparten en los ultimos 30 dias
+        ids = list(Consulta.objects.order_by('id').values_list('id', flat=True))
+        ahora = timezone.now()
+        for dia in range(30):
+            Consulta.objects.filter(id__in=ids[dia::30]).update(fecha_consulta=ahora - timedelta(days=dia))
+        estadisticas.reconstruir()
+        cls.consulta = Consulta.objects.order_by('id').first()
+
+    def setUp(self):
+        for alias in settings.CACHES:
+            caches[alias].clear()
+        traduccion.cache_traducciones.limpiar_memoria()
+        self.traductor = TraductorContador()
+        usar_traductor(self.traductor)
+        self.addCleanup(usar_traductor, None)
+
+    def medir(self, metodo, url, datos=None, *, queries, llamadas=0, presupuesto_ms=300, estado=200,
+              usuario=None, **kwargs):
+        if usuario is not None:
+            self.client.force_login(usuario)
+        if isinstance(queries, dict):
+            queries = queries.get(connection.vendor, queries['default'])
+        self.traductor.llamadas = 0
+        http_antes = traduccion.cliente_http.stats['llamadas']
+
+        inicio = time.perf_counter()
+        if datos is not None:
+            kwargs['data'] = datos
+        with self.assertNumQueries(queries):
+            respuesta = getattr(self.client, metodo)(url, **kwargs)
+            if respuesta.streaming:
+                # la exportacion consulta la db mientras genera el contenido
+                b"".join(respuesta.streaming_content)
+        duracion_ms = (time.perf_counter() - inicio) * 1000
+
+        self.assertEqual(respuesta.status_code, estado)
+        self.assertEqual(self.traductor.llamadas, llamadas, "llamadas al traductor")
+        self.assertEqual(traduccion.cliente_http.stats['llamadas'], http_antes, "llamadas http")
+        # las vistas solo encolan correos: ninguna abre una conexion smtp
+        self.assertEqual(len(mail.outbox), 0, "correos enviados")
+        self.assertLess(
+            duracion_ms, presupuesto_ms * FACTOR_LATENCIA,
+            f"{metodo.upper()} {url}: {duracion_ms:.0f} ms (presupuesto {presupuesto_ms} ms)",
+        )
+        return respuesta
+
+    def datos_test(self, **cambios):
+        return {
+            'nombre': "Ana Perez", 'edad': 20, 'correo': "ana@ejemplo.com", 'nivel': "Secundario",
+            'q1': "Tecnológico", 'q2': "Tecnológico", 'q3': "Creativo/Artístico",
+            'q4': "Tecnológico", 'q5': "Social/Humanístico", **cambios,
+        }
+
+    # --- paginas publicas ---
+
+    def test_index(self):
+        self.medir('get', '/', queries=0)
+
+    def test_index_post(self):
+        textos = len(armar_resultado("Tecnológico").traducciones())
+        # una lectura y una escritura del cache de traducciones para todo el
+        # resultado, mas la consulta y sus correos
+        self.medir('post', '/', self.datos_test(), queries=16, llamadas=textos, presupuesto_ms=1000, headers=AJAX)
+        # el mismo resultado ya esta traducido en memoria
+        self.medir('post', '/', self.datos_test(), queries=8, headers=AJAX)
+        self.assertEqual(CorreoPendiente.objects.count(), 4)
+
+    def test_index_post_invalido(self):
+        self.medir('post', '/', self.datos_test(correo="x"), queries=0, estado=400, headers=AJAX)
+
+    def test_enviar_test_json(self):
+        textos = len(armar_resultado("Tecnológico").traducciones())
+        self.medir('post', '/api/test/', self.datos_test(), content_type='application/json',
+                   queries=16, llamadas=textos, presupuesto_ms=1000)
+        # la consulta (con las señales de estadistica y version) y un INSERT para
+        # los dos correos en una sola transaccion (los SAVEPOINT son por la del test)
+        self.medir('post', '/api/test/', self.datos_test(), content_type='application/json', queries=8)
+        self.medir('post', '/api/test/', self.datos_test(edad=15), content_type='application/json',
+                   queries=0, estado=400)
+        self.assertEqual(CorreoPendiente.objects.count(), 4)
+
+    def test_inscribir(self):
+        datos = {'nombre': "Ana", 'correo': "ana@ejemplo.com", 'cursos': ["Curso A", "Curso B"]}
+        # la inscripcion y un INSERT para los dos correos
+        self.medir('post', '/inscribir/', datos, queries=4, headers=AJAX)
+        self.medir('get', '/inscribir/', queries=0)
+
+    def test_sobre_nosotros(self):
+        self.medir('get', '/sobre-nosotros/', queries=0)
+
+    def test_contacto(self):
+        self.medir('get', '/contacto/', queries=0)
+        self.medir('post', '/contacto/', {
+            'nombre': "Ana Perez", 'correo': "ana@ejemplo.com", 'mensaje': "Quisiera más información.",
+        }, queries=1)
+
+    def test_registro(self):
+        self.medir('get', '/registro/', queries=0)
+
+    # --- usuarios logueados ---
+
+    def test_home_y_acceso(self):
+        self.medir('get', '/home/', queries=2, estado=302, usuario=self.staff)
+        self.medir('get', '/home/', queries=2, estado=302, usuario=self.usuario)
+        self.medir('get', '/acceso/', queries=2)
+
+    def test_dashboard(self):
+        self.medir('get', '/dashboard/', queries=5, usuario=self.staff)
+        self.medir('get', '/dashboard/estadisticas/', queries=6)
+
+    def test_listado(self):
+        respuesta = self.medir('get', '/listado/', queries={'default': 4, 'postgresql': 5}, usuario=self.staff)
+        self.assertEqual(len(respuesta.context['consultas']), settings.LISTADO_PAGE_SIZE)
+        self.medir('get', '/listado/', {'perfil': "Tecnológico", 'antes': 1000}, queries=4)
+
+    def test_exportar(self):
+        self.medir('get', '/listado/exportar/', queries=3, presupuesto_ms=1000, usuario=self.staff)
+
+    def test_editar_y_eliminar(self):
+        url = f'/editar/{self.consulta.id}/'
+        self.medir('get', url, queries=3, usuario=self.staff)
+        datos = {f: getattr(self.consulta, f) for f in ('nombre', 'edad', 'correo', 'nivel', *CAMPOS)}
+        # el guardado lee la fila por pk para ajustar las estadisticas
+        self.medir('post', url, datos, queries=9, estado=302)
+        self.medir('post', f'/eliminar/{self.consulta.id}/', queries=9, estado=302)
+
+    def test_metricas(self):
+        self.medir('get', '/metrics/', queries=2, usuario=self.staff)
+
+    # --- api ---
+
+    def test_api_traducir(self):
+        self.medir('get', '/api/traducir/', {'texto': "hola"}, queries=2, llamadas=1)
+        self.medir('post', '/api/traducir/lote/', {'textos': ["uno", "dos", "hola"], 'idiomas': ["en", "fr"]},
+                   content_type='application/json', queries=2, llamadas=5)
+        self.medir('get', '/api/traducir/estado/', queries=2, usuario=self.staff)
+
+    def test_api_consultas_lectura(self):
+        self.medir('get', '/api/consultas/', queries=0, estado=403)
+        # sesion y usuario + version y pagina
+        respuesta = self.medir('get', '/api/consultas/', queries=4, usuario=self.staff)
+        self.assertEqual(len(respuesta.json()['results']), settings.API_PAGE_SIZE)
+        self.medir('get', '/api/consultas/', {'fields': "id,nombre", 'page_size': 1000}, queries=4)
+        self.medir('get', f'/api/consultas/{self.consulta.id}/', queries=4)
+        self.medir('get', '/api/consultas/', queries=3, estado=304, headers={'if-none-match': respuesta['ETag']})
+
+    def test_api_consultas_escritura(self):
+        datos = self.datos_test(perfil_obtenido="Tecnológico")
+        self.medir('post', '/api/consultas/', datos, queries=13, estado=201, usuario=self.staff)
+        self.medir('post', '/api/consultas/lote/', [datos] * 50, content_type='application/json',
+                   queries=9, estado=201)
+        url = f'/api/consultas/{self.consulta.id}/'
+        self.medir('put', url, datos, content_type='application/json', queries=10)
+        self.medir('delete', url, queries=9, estado=204)
+
+
+class MicrobenchmarkTests(SimpleTestCase):
+
+    def test_cuerpos_de_correo(self):
+        _, cuerpo_u, asunto_a, cuerpo_a = views.cuerpos_confirmacion(
+            "Ana", "ana@example.com", "Tecnológico", "Descripción", ["Desarrollo Web", "Oratoria"]
+        )
+        self.assertIn("<li>Desarrollo Web</li><li>Oratoria</li>", cuerpo_u)
+        self.assertEqual(asunto_a, "Nueva evaluación | Tecnológico - Ana")
+        self.assertIn("ana@example.com", cuerpo_a)
+        asunto_u, cuerpo_u, _, _ = views.cuerpos_inscripcion("Ana", "ana@example.com", ["Oratoria"])
+        self.assertEqual(asunto_u, "Inscripción confirmada | Ana")
+        self.assertIn("<li>Oratoria</li>", cuerpo_u)
+
+    def test_comando_guarda_estadisticas_y_memoria(self):
+        with tempfile.TemporaryDirectory() as directorio:
+            salida = os.path.join(directorio, "micro.json")
+            historial = os.path.join(directorio, "micro.jsonl")
+            opciones = dict(repeticiones=3, numero=2, calentamiento=1, memoria=3, stdout=io.StringIO())
+            call_command('benchmark_micro', salida=salida, historial=historial, **opciones)
+            salida_texto = io.StringIO()
+            call_command('benchmark_micro', etapas="calcular_perfil", salida=salida, historial=historial,
+                         comparar=salida, **dict(opciones, stdout=salida_texto))
+
+            with open(historial, encoding='utf-8') as f:
+                corridas = [json.loads(linea) for linea in f]
+        self.assertEqual(len(corridas), 2)
+        etapas = corridas[0]['etapas']
+        self.assertIn('form_valido', etapas)
+        self.assertIn('correo_inscripcion', etapas)
+        for etapa in etapas.values():
+            self.assertEqual(etapa['repeticiones'], 3)
+            self.assertLessEqual(etapa['us']['min'], etapa['us']['mediana'])
+            self.assertGreater(etapa['memoria']['pico_bytes'], 0)
+        self.assertEqual(list(corridas[1]['etapas']), ['calcular_perfil'])
+        self.assertIn("vs ", salida_texto.getvalue())
@@ -0,0 +1,572 @@
+import asyncio
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, wait
+from datetime import timedelta
+
+import requests
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import DatabaseError, connection
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from .circuito import Circuito, CircuitoAbierto
+from .cliente_http import cliente_http
+from .metricas import medir_externo
+
+API_URL = "https://api.mymemory.translated.net/get"
+
+
+class TraductorMyMemory:
+    # backend real: api externa de MyMemory por el cliente http compartido
+
+    def __init__(self, cliente=None, url=API_URL):
+        self.cliente = cliente or cliente_http
+        self.url = url
+
+    def __call__(self, text, target_lang='en'):
+        params = {
+            'q': text,
+            'langpair': f'es|{target_lang}'
+        }
+        try:
+            response = self.cliente.get(self.url, params=params)
+            response.raise_for_status()
+            data = response.json()
+
+            if data.get('responseStatus') == 200 and 'translatedText' in data.get('responseData', {}):
+                return data['responseData']['translatedText']
+            else:
+                print(f"Error en API MyMemory: {data.get('responseDetails', 'Error desconocido')}")
+                return None
+        except requests.exceptions.RequestException as e:
+            print(f"Error de conexión con la API de traducción: {e}")
+            return None
+
+
+class TraductorStub:
+    # backend local para tests y benchmarks: no sale a la red
+
+    def __init__(self, demora=0.0, formato="[{idioma}] {texto}"):
+        self.demora = demora
+        self.formato = formato
+
+    def __call__(self, text, target_lang='en'):
+        if self.demora:
+            time.sleep(self.demora)
+        return self.formato.format(idioma=target_lang, texto=text)
+
+
+_traductor = None
+
+
+def traductor_actual():
+    # backend configurado en TRADUCCION_BACKEND (ruta de importacion de una clase)
+    global _traductor
+    if _traductor is None:
+        _traductor = import_string(getattr(settings, 'TRADUCCION_BACKEND', 'landing.traduccion.TraductorMyMemory'))()
+    return _traductor
+
+
+def usar_traductor(traductor):
+    # reemplaza el backend del proceso (None vuelve a leer TRADUCCION_BACKEND)
+    global _traductor
+    _traductor = traductor
+
+
+def clave_traduccion(text, target_lang):
+    # clave fija de 64 caracteres para (texto, idioma)
+    return hashlib.sha256(f"{target_lang}\x00{text}".encode("utf-8")).hexdigest()
+
+
+def version_catalogo(textos, idiomas):
+    # huella de los textos fuente: cambia si cambian DESCRIPCIONES o CURSOS
+    contenido = "\x00".join(sorted(idiomas)) + "\x01" + "\x00".join(sorted(textos))
+    return hashlib.sha256(contenido.encode("utf-8")).hexdigest()[:12]
+
+
+class CatalogoTraducciones:
+    # traducciones precompiladas en el deploy (manage.py compilar_catalogo)
+
+    def __init__(self, ruta):
+        self.ruta = ruta
+        self._datos = None
+        self._lock = threading.Lock()
+
+    def _cargar(self):
+        if self._datos is None:
+            with self._lock:
+                if self._datos is None:
+                    try:
+                        with open(self.ruta, encoding="utf-8") as f:
+                            self._datos = json.load(f)
+                    except FileNotFoundError:
+                        self._datos = {'version': None, 'idiomas': {}}
+                    except (OSError, ValueError) as e:
+                        print(f"Error al leer el catálogo de traducciones: {e}")
+                        self._datos = {'version': None, 'idiomas': {}}
+        return self._datos
+
+    @property
+    def version(self):
+        return self._cargar()['version']
+
+    def get(self, text, target_lang='en'):
+        return self._cargar()['idiomas'].get(target_lang, {}).get(text)
+
+    def recargar(self):
+        with self._lock:
+            self._datos = None
+
+    def escribir(self, idiomas, version):
+        # idiomas: {idioma: {texto: traduccion}}
+        datos = {
+            'version': version,
+            'generado': timezone.now().isoformat(),
+            'idiomas': idiomas,
+        }
+        tmp = f"{self.ruta}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(datos, f, ensure_ascii=False, indent=2, sort_keys=True)
+        os.replace(tmp, self.ruta)
+        self.recargar()
+
+
+class CacheTraducciones:
+    # cache de dos niveles: lru en memoria del proceso + tabla TraduccionCache
+    # el catalogo precompilado, si existe, se consulta antes que ambos.
+    # una traduccion vencida se sigue sirviendo durante `gracia` segundos
+    # mientras se refresca en segundo plano (stale-while-revalidate)
+
+    def __init__(self, max_items=512, ttl=2592000, ttl_fallos=60, purgar_cada=200, catalogo=None,
+                 gracia=604800, circuito=None, consultar=None):
+        self.catalogo = catalogo
+        self.max_items = max_items
+        self.ttl = ttl
+        self.ttl_fallos = ttl_fallos
+        self.purgar_cada = purgar_cada
+        self.gracia = gracia
+        self.circuito = circuito
+        # None: el backend configurado del proceso (traductor_actual)
+        self.consultar = consultar
+
+        self._memoria = OrderedDict()  # clave -> (traduccion, expira_en)
+        self._en_vuelo = {}  # clave -> [futuro, hilos esperando]
+        self._refrescando = set()
+        self._lock = threading.Lock()
+        self._escrituras = 0
+        self.reset_stats()
+
+    def reset_stats(self):
+        self.stats = {
+            'hits_catalogo': 0,
+            'hits_memoria': 0,
+            'hits_db': 0,
+            'hits_negativos': 0,
+            'hits_vencidos': 0,
+            'misses': 0,
+            'desalojos': 0,
+            'coalescidas': 0,
+            'refrescos': 0,
+            'rechazadas_circuito': 0,
+        }
+
+    def _contar(self, nombre):
+        with self._lock:
+            self.stats[nombre] += 1
+
+    def _leer_memoria(self, clave):
+        # devuelve (encontrado, traduccion, vencida); los fallos cacheados no se sirven vencidos
+        with self._lock:
+            entrada = self._memoria.get(clave)
+            if entrada is None:
+                return False, None, False
+            traduccion, expira_en = entrada
+            restante = expira_en - time.monotonic()
+            if restante <= 0 and (traduccion is None or restante <= -self.gracia):
+                del self._memoria[clave]
+                return False, None, False
+            self._memoria.move_to_end(clave)
+            return True, traduccion, restante <= 0
+
+    def _guardar_memoria(self, clave, traduccion, ttl):
+        with self._lock:
+            self._memoria[clave] = (traduccion, time.monotonic() + ttl)
+            self._memoria.move_to_end(clave)
+            while len(self._memoria) > self.max_items:
+                self._memoria.popitem(last=False)
+                self.stats['desalojos'] += 1
+
+    def _leer_db(self, claves):
+        # una sola query para todas las claves; devuelve {clave: (traduccion, restante)}
+        # con restante <= 0 si esta vencida pero dentro de la gracia
+        from .models import TraduccionCache
+
+        try:
+            filas = list(TraduccionCache.objects
+                         .filter(clave__in=claves, expira__gt=timezone.now() - timedelta(seconds=self.gracia))
+                         .values_list('clave', 'traduccion', 'expira'))
+        except DatabaseError as e:
+            print(f"Error al leer el cache de traducciones: {e}")
+            return {}
+        ahora = timezone.now()
+        encontradas = {}
+        for clave, traduccion, expira in filas:
+            restante = (expira - ahora).total_seconds()
+            # los fallos cacheados no se sirven vencidos
+            if restante > 0 or traduccion is not None:
+                encontradas[clave] = (traduccion, restante)
+        return encontradas
+
+    def _guardar_db(self, filas):
+        # filas: [(clave, texto, idioma, traduccion, ttl)]; todas en un solo
+        # INSERT ... ON CONFLICT DO UPDATE en lugar de un update_or_create por texto
+        from .models import TraduccionCache
+
+        ahora = timezone.now()
+        try:
+            TraduccionCache.objects.bulk_create(
+                [
+                    TraduccionCache(clave=clave, texto=text, idioma=target_lang, traduccion=traduccion,
+                                    expira=ahora + timedelta(seconds=ttl))
+                    for clave, text, target_lang, traduccion, ttl in filas
+                ],
+                update_conflicts=True,
+                unique_fields=['clave'],
+                update_fields=['texto', 'idioma', 'traduccion', 'expira', 'actualizado'],
+            )
+            antes = self._escrituras
+            self._escrituras += len(filas)
+            if self.purgar_cada and self._escrituras // self.purgar_cada > antes // self.purgar_cada:
+                self.purgar()
+        except DatabaseError as e:
+            print(f"Error al guardar en el cache de traducciones: {e}")
+
+    def purgar(self):
+        # elimina las filas vencidas que ya no se pueden servir mientras se refrescan
+        from .models import TraduccionCache
+
+        limite = timezone.now() - timedelta(seconds=self.gracia)
+        borradas, _ = TraduccionCache.objects.filter(expira__lte=limite).delete()
+        return borradas
+
+    def limpiar_memoria(self):
+        with self._lock:
+            self._memoria.clear()
+
+    def buscar(self, text, target_lang='en', consultar=None):
+        # devuelve (encontrado, traduccion) sin esperar a la api externa
+        par = (text, target_lang)
+        encontrados = self.buscar_varias([par], consultar)
+        return (True, encontrados[par]) if par in encontrados else (False, None)
+
+    def buscar_varias(self, pares, consultar=None):
+        # como buscar() para varios pares con una sola lectura de la db; devuelve
+        # {(texto, idioma): traduccion} solo con los encontrados (None es un fallo
+        # cacheado). Si solo hay una traduccion vencida se devuelve esa y se
+        # refresca en segundo plano
+        encontrados = {}
+        faltantes = {}  # clave -> (par, traduccion vencida en memoria o None)
+        for par in pares:
+            text, target_lang = par
+            if self.catalogo is not None:
+                traduccion = self.catalogo.get(text, target_lang)
+                if traduccion is not None:
+                    self._contar('hits_catalogo')
+                    encontrados[par] = traduccion
+                    continue
+
+            clave = clave_traduccion(text, target_lang)
+            encontrado, traduccion, vencida = self._leer_memoria(clave)
+            if encontrado and not vencida:
+                self._contar('hits_memoria' if traduccion is not None else 'hits_negativos')
+                encontrados[par] = traduccion
+                continue
+            faltantes[clave] = (par, traduccion if encontrado else None)
+
+        if not faltantes:
+            return encontrados
+
+        # otro worker pudo haberlas refrescado en la db
+        en_db = self._leer_db(list(faltantes))
+        for clave, (par, anterior) in faltantes.items():
+            if clave in en_db:
+                traduccion, restante = en_db[clave]
+                if restante > 0:
+                    self._contar('hits_db' if traduccion is not None else 'hits_negativos')
+                    self._guardar_memoria(clave, traduccion, restante)
+                    encontrados[par] = traduccion
+                    continue
+                if anterior is None:
+                    self._guardar_memoria(clave, traduccion, restante)
+                    anterior = traduccion
+
+            if anterior is not None:
+                self._contar('hits_vencidos')
+                self._refrescar(clave, *par, consultar or self.consultar or traductor_actual())
+                encontrados[par] = anterior
+
+        return encontrados
+
+    def _llamar(self, consultar, text, target_lang):
+        # corre en el pool; pasa por el circuito si hay uno
+        if self.circuito is None:
+            return consultar(text, target_lang)
+        return self.circuito.llamar(consultar, text, target_lang)
+
+    def _refrescar(self, clave, text, target_lang, consultar):
+        # un refresco por clave a la vez; con el circuito abierto se sigue sirviendo la vencida
+        if self.circuito is not None and self.circuito.abierto():
+            return
+        with self._lock:
+            if clave in self._refrescando:
+                return
+            self._refrescando.add(clave)
+            self.stats['refrescos'] += 1
+        _pool.submit(self._tarea_refresco, clave, text, target_lang, consultar)
+
+    def _tarea_refresco(self, clave, text, target_lang, consultar):
+        try:
+            traduccion = self._llamar(consultar, text, target_lang)
+            # si falla se conserva la vencida en lugar de cachear el fallo
+            if traduccion is not None:
+                self.guardar(text, target_lang, traduccion)
+        except CircuitoAbierto:
+            pass
+        except Exception as e:
+            print(f"Error al refrescar la traducción de '{text}': {e}")
+        finally:
+            with self._lock:
+                self._refrescando.discard(clave)
+            # los hilos del pool no pasan por el ciclo de request de django
+            connection.close()
+
+    def guardar(self, text, target_lang, traduccion):
+        self.guardar_varias({(text, target_lang): traduccion})
+
+    def guardar_varias(self, traducciones):
+        # traducciones: {(texto, idioma): traduccion}; los fallos (None) se
+        # guardan con un ttl corto. Una sola escritura a la db para todas
+        filas = []
+        for (text, target_lang), traduccion in traducciones.items():
+            ttl = self.ttl if traduccion is not None else self.ttl_fallos
+            clave = clave_traduccion(text, target_lang)
+            self._guardar_memoria(clave, traduccion, ttl)
+            filas.append((clave, text, target_lang, traduccion, ttl))
+        if filas:
+            self._guardar_db(filas)
+
+    def _consulta_compartida(self, text, target_lang, consultar):
+        # una sola consulta externa por (texto, idioma) aunque la pidan varios
+        # hilos a la vez; devuelve (futuro, propio) y solo el dueño guarda el resultado
+        clave = clave_traduccion(text, target_lang)
+        with self._lock:
+            entrada = self._en_vuelo.get(clave)
+            if entrada is not None:
+                entrada[1] += 1
+                self.stats['coalescidas'] += 1
+                return entrada[0], False
+            futuro = _pool.submit(self._llamar, consultar, text, target_lang)
+            self._en_vuelo[clave] = [futuro, 1]
+            return futuro, True
+
+    def _soltar(self, clave, futuro):
+        with self._lock:
+            entrada = self._en_vuelo.get(clave)
+            if entrada is not None and entrada[0] is futuro:
+                del self._en_vuelo[clave]
+
+    def _abandonar(self, clave, futuro):
+        # el plazo vencio: se cancela solo si nadie mas espera esa consulta
+        with self._lock:
+            entrada = self._en_vuelo.get(clave)
+            if entrada is None or entrada[0] is not futuro:
+                return
+            entrada[1] -= 1
+            if entrada[1] > 0 or not futuro.cancel():
+                return
+            del self._en_vuelo[clave]
+
+    def _preparar(self, pares, consultar):
+        # lee el cache; devuelve (resultados, pendientes). con el circuito
+        # abierto los pendientes fallan enseguida sin ocupar el pool ni cachear
+        pares = list(dict.fromkeys(pares))
+        resultados = self.buscar_varias(pares, consultar)
+        pendientes = [par for par in pares if par not in resultados]
+        if pendientes:
+            with self._lock:
+                self.stats['misses'] += len(pendientes)
+
+        if pendientes and self.circuito is not None and self.circuito.abierto():
+            with self._lock:
+                self.stats['rechazadas_circuito'] += len(pendientes)
+            for par in pendientes:
+                resultados[par] = None
+            pendientes = []
+        return resultados, pendientes
+
+    def _lanzar(self, pendientes, consultar):
+        futuros = {}
+        for par in pendientes:
+            futuro, propio = self._consulta_compartida(*par, consultar)
+            futuros[futuro] = (par, propio)
+        return futuros
+
+    def _recoger(self, futuros, terminados, vencidos, resultados):
+        a_guardar = {}
+        propios = []
+        for futuro in terminados:
+            (text, target_lang), propio = futuros[futuro]
+            cachear = True
+            try:
+                traduccion = futuro.result()
+            except CircuitoAbierto:
+                traduccion, cachear = None, False
+                self._contar('rechazadas_circuito')
+            except Exception as e:
+                print(f"Error al traducir '{text}': {e}")
+                traduccion = None
+            if propio:
+                # solo se guarda en este hilo para no abrir conexiones a la db en el pool
+                if cachear:
+                    a_guardar[text, target_lang] = traduccion
+                propios.append((clave_traduccion(text, target_lang), futuro))
+            resultados[text, target_lang] = traduccion
+
+        # todo el lote en una escritura; las consultas en vuelo se sueltan
+        # despues para que un pedido nuevo ya las encuentre en el cache
+        self.guardar_varias(a_guardar)
+        for clave, futuro in propios:
+            self._soltar(clave, futuro)
+
+        for futuro in vencidos:
+            # sin respuesta dentro del plazo: no se cachea, se devuelve None
+            par, propio = futuros[futuro]
+            clave = clave_traduccion(*par)
+            self._abandonar(clave, futuro)
+            if propio:
+                futuro.add_done_callback(lambda f, clave=clave: self._soltar(clave, f))
+            resultados[par] = None
+
+    def traducir(self, pares, consultar=None, timeout=None):
+        # pares: (texto, idioma); devuelve {(texto, idioma): traduccion o None}.
+        # el cache se lee en este hilo y los misses se consultan en el pool
+        # (limite global de concurrencia) con un unico plazo para todo el lote
+        consultar = consultar or self.consultar or traductor_actual()
+        resultados, pendientes = self._preparar(pares, consultar)
+        if pendientes:
+            futuros = self._lanzar(pendientes, consultar)
+            terminados, vencidos = wait(futuros, timeout=timeout)
+            self._recoger(futuros, terminados, vencidos, resultados)
+        return resultados
+
+    async def atraducir(self, pares, consultar=None, timeout=None):
+        # igual que traducir() para vistas async: el cache (db) se lee en un
+        # hilo y la espera de la api se hace en el event loop sin ocupar uno.
+        # No hay cliente http async (httpx/aiohttp no estan en requirements):
+        # las llamadas siguen saliendo por ClienteHTTP (requests, keep-alive,
+        # reintentos y circuito) en el pool acotado, y aca solo se esperan sus futuros
+        consultar = consultar or self.consultar or traductor_actual()
+        resultados, pendientes = await sync_to_async(self._preparar)(list(pares), consultar)
+        if pendientes:
+            futuros = self._lanzar(pendientes, consultar)
+            envoltorios = {asyncio.wrap_future(f): f for f in futuros}
+            hechos, _ = await asyncio.wait(envoltorios, timeout=timeout)
+            terminados = {envoltorios[e] for e in hechos}
+            vencidos = set(futuros) - terminados
+            await sync_to_async(self._recoger)(futuros, terminados, vencidos, resultados)
+        return resultados
+
+    def obtener(self, text, target_lang='en', consultar=None):
+        return self.traducir([(text, target_lang)], consultar)[text, target_lang]
+
+    def obtener_lote(self, textos, target_lang='en', consultar=None, timeout=None):
+        # traduce varios textos a un mismo idioma; devuelve {texto: traduccion o None}
+        resultados = self.traducir(((text, target_lang) for text in textos), consultar, timeout)
+        return {text: traduccion for (text, _), traduccion in resultados.items()}
+
+
+# hilos para las llamadas a la api de traduccion (sync y async); el tamaño es el
+# limite global de pedidos simultaneos al proveedor
+_pool = ThreadPoolExecutor(
+    max_workers=getattr(settings, 'TRADUCCION_MAX_CONCURRENCIA', 8),
+    thread_name_prefix='traduccion',
+)
+
+catalogo_traducciones = CatalogoTraducciones(
+    getattr(settings, 'TRADUCCION_CATALOGO', os.path.join(settings.BASE_DIR, 'catalogo_traducciones.json'))
+)
+
+circuito_traduccion = Circuito(
+    ventana=getattr(settings, 'TRADUCCION_CIRCUITO_VENTANA', 20),
+    minimo=getattr(settings, 'TRADUCCION_CIRCUITO_MINIMO', 5),
+    umbral=getattr(settings, 'TRADUCCION_CIRCUITO_UMBRAL', 0.5),
+    espera=getattr(settings, 'TRADUCCION_CIRCUITO_ESPERA', 30),
+)
+
+cache_traducciones = CacheTraducciones(
+    catalogo=catalogo_traducciones,
+    circuito=circuito_traduccion,
+    max_items=getattr(settings, 'TRADUCCION_CACHE_MAX_ITEMS', 512),
+    ttl=getattr(settings, 'TRADUCCION_CACHE_TTL', 60 * 60 * 24 * 30),
+    ttl_fallos=getattr(settings, 'TRADUCCION_CACHE_TTL_FALLOS', 60),
+    gracia=getattr(settings, 'TRADUCCION_CACHE_GRACIA', 60 * 60 * 24 * 7),
+)
+
+
+@medir_externo('traduccion')
+def get_translation(text, target_lang='en'):
+    # traduccion con cache; solo consulta la api ante un miss
+    return cache_traducciones.obtener(text, target_lang)
+
+
+@medir_externo('traduccion')
+def get_translations(textos, target_lang='en'):
+    # traduce un lote de textos en paralelo; devuelve {texto: traduccion o None}
+    return cache_traducciones.obtener_lote(
+        textos, target_lang, timeout=getattr(settings, 'TRADUCCION_LOTE_TIMEOUT', 6)
+    )
+
+
+@medir_externo('traduccion')
+async def aget_translation(text, target_lang='en'):
+    # version async de get_translation para las vistas async
+    resultados = await cache_traducciones.atraducir([(text, target_lang)])
+    return resultados[text, target_lang]
+
+
+@medir_externo('traduccion')
+async def aget_translations(textos, target_lang='en'):
+    # version async de get_translations
+    resultados = await cache_traducciones.atraducir(
+        ((text, target_lang) for text in textos),
+        timeout=getattr(settings, 'TRADUCCION_LOTE_TIMEOUT', 6),
+    )
+    return {text: traduccion for (text, _), traduccion in resultados.items()}
+
+
+@medir_externo('traduccion')
+def traducir_lote(textos, idiomas):
+    # varios textos a varios idiomas con un unico plazo; {idioma: {texto: traduccion o None}}
+    resultados = cache_traducciones.traducir(
+        ((text, idioma) for idioma in idiomas for text in textos),
+        timeout=getattr(settings, 'TRADUCCION_LOTE_TIMEOUT', 6),
+    )
+    salida = {idioma: {} for idioma in idiomas}
+    for (text, idioma), traduccion in resultados.items():
+        salida[idioma][text] = traduccion
+    return salida
+
+
+def estado_traduccion():
+    # para monitoreo: estado del circuito y contadores del cache
+    return {
+        'circuito': circuito_traduccion.resumen(),
+        'cache': dict(cache_traducciones.stats),
+        'http': cliente_http.resumen(),
+    }
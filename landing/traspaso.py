@@ -0,0 +1,63 @@
+import secrets
+
+from django.conf import settings
+from django.core import signing
+from django.core.cache import cache
+
+# datos de la inscripcion entre el POST ajax y el GET de /inscribir/.
+# modo 'cookie': cookie firmada (sin db); si no entra en una cookie se guarda
+# en el cache y la cookie lleva solo la clave. modo 'sesion': como antes.
+NOMBRE_COOKIE = 'inscripcion'
+SALT = 'landing.traspaso.inscripcion'
+CLAVE_SESION = 'inscripcion_data'
+
+
+def _ttl():
+    return getattr(settings, 'INSCRIPCION_TRASPASO_TTL', 300)
+
+
+def _modo():
+    return getattr(settings, 'INSCRIPCION_TRASPASO', 'cookie')
+
+
+async def guardar(request, respuesta, datos):
+    # la cookie queda limitada a la url que la va a leer (la misma del POST)
+    if _modo() == 'sesion':
+        await request.session.aset(CLAVE_SESION, datos)
+        return
+
+    token = signing.dumps({'d': datos}, salt=SALT, compress=True)
+    if len(token) > getattr(settings, 'INSCRIPCION_COOKIE_MAX', 3000):
+        clave = secrets.token_urlsafe(18)
+        await cache.aset(f"traspaso:{clave}", datos, _ttl())
+        token = signing.dumps({'c': clave}, salt=SALT)
+    respuesta.set_cookie(
+        NOMBRE_COOKIE, token, max_age=_ttl(), path=request.path,
+        secure=request.is_secure(), httponly=True, samesite='Lax',
+    )
+
+
+async def recuperar(request):
+    # devuelve los datos una sola vez (o None si no hay, vencieron o no son validos)
+    if _modo() == 'sesion':
+        return await request.session.apop(CLAVE_SESION, None)
+
+    token = request.COOKIES.get(NOMBRE_COOKIE)
+    if not token:
+        return None
+    try:
+        contenido = signing.loads(token, salt=SALT, max_age=_ttl())
+    except signing.BadSignature:
+        return None
+    if 'c' in contenido:
+        clave = f"traspaso:{contenido['c']}"
+        datos = await cache.aget(clave)
+        await cache.adelete(clave)
+        return datos
+    return contenido.get('d')
+
+
+def descartar(request, respuesta):
+    # borra la cookie ya leida
+    if NOMBRE_COOKIE in request.COOKIES:
+        respuesta.delete_cookie(NOMBRE_COOKIE, path=request.path, samesite='Lax')
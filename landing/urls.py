@@ -1,6 +1,10 @@
-from django.urls import path
+from django.urls import include, path
+from rest_framework.routers import DefaultRouter
 from . import views
 
+router = DefaultRouter()
+router.register(r'consultas', views.ConsultaViewSet, basename='consulta')
+
 urlpatterns = [
     path('', views.index, name='index'),
     path('inscribir/', views.inscribir, name='inscribir'),
@@ -9,9 +13,19 @@ urlpatterns = [
     path('registro/', views.registro, name='registro'),
     path('home/', views.login_redirect_view, name='login_redirect_view'),
     path('dashboard/', views.dashboard, name='dashboard'),
+    path('dashboard/estadisticas/', views.estadisticas_dashboard, name='estadisticas_dashboard'),
     path('listado/', views.listado_consultas, name='listado_consultas'),
+    path('listado/exportar/', views.exportar_consultas, name='exportar_consultas'),
     path('editar/<int:consulta_id>/', views.editar_consulta, name='editar_consulta'),
     path('eliminar/<int:consulta_id>/', views.eliminar_consulta, name='eliminar_consulta'),
     path('acceso/', views.no_admin_landing, name='no_admin_landing'),
+    path('metrics/', views.metricas_prometheus, name='metricas'),
 ]
 
+urlpatterns += [
+    path('api/test/', views.enviar_test, name='enviar_test'),
+    path('api/traducir/', views.TraduccionAPIView.as_view(), name='traducir'),
+    path('api/traducir/lote/', views.TraduccionLoteAPIView.as_view(), name='traducir_lote'),
+    path('api/traducir/estado/', views.EstadoTraduccionAPIView.as_view(), name='estado_traduccion'),
+    path('api/', include(router.urls)),
+]
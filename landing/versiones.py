@@ -0,0 +1,35 @@
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+from .models import Consulta, VersionTabla
+
+TABLA_CONSULTAS = 'consulta'
+
+
+def incrementar_version(tabla=TABLA_CONSULTAS):
+    # llamar despues de cualquier escritura que no dispare señales (bulk_create, bulk_update, update)
+    ahora = timezone.now()
+    filtro = VersionTabla.objects.filter(tabla=tabla)
+    if filtro.update(version=F('version') + 1, modificado=ahora):
+        return
+    try:
+        with transaction.atomic():
+            VersionTabla.objects.create(tabla=tabla, version=1, modificado=ahora)
+    except IntegrityError:
+        filtro.update(version=F('version') + 1, modificado=ahora)
+
+
+def version_actual(tabla=TABLA_CONSULTAS):
+    # devuelve (version, modificado); (0, None) si la tabla nunca se escribio
+    fila = VersionTabla.objects.filter(tabla=tabla).values_list('version', 'modificado').first()
+    return fila or (0, None)
+
+
+@receiver(post_save, sender=Consulta)
+@receiver(post_delete, sender=Consulta)
+def _consulta_modificada(sender, raw=False, **kwargs):
+    if not raw:
+        incrementar_version(TABLA_CONSULTAS)
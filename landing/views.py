@@ -1,80 +1,54 @@
+import hashlib
 import json
-import requests
+import re
+from urllib.parse import urlencode
 import smtplib
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
-from django.core.mail import EmailMultiAlternatives, get_connection, send_mail
-from django.utils.html import strip_tags
+from asgiref.sync import sync_to_async
 from django.shortcuts import render, redirect, get_object_or_404
-from django.http import JsonResponse
+from django.http import HttpResponse, JsonResponse, StreamingHttpResponse
+from django.views.decorators.cache import cache_control
+from django.views import View
+from django.views.decorators.http import condition, require_POST
 from django.middleware.csrf import get_token
 from django.conf import settings
+from django.core.handlers.asgi import ASGIRequest
+from django.db import transaction
+from django.utils import timezone
+from django.utils.cache import get_conditional_response, patch_cache_control, patch_vary_headers
+from django.utils.http import http_date
 from django.contrib.auth.decorators import login_required
 from django.contrib.auth.forms import UserCreationForm
 from django.contrib.admin.views.decorators import staff_member_required
 from django.contrib.auth.decorators import user_passes_test
 from rest_framework import viewsets, views, status
-from rest_framework.permissions import IsAuthenticated, AllowAny
+from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
+from rest_framework.parsers import JSONParser
+from rest_framework.permissions import IsAdminUser, AllowAny
 from rest_framework.response import Response
 
-from .serializers import ConsultaSerializer
-from .forms import TestForm, ContactoForm
+from . import estadisticas, metricas, traspaso
+from .consultas import contar_consultas, filtros_consultas, pagina_consultas
+from .correos import encolar_correo, encolar_correos
+from .envio import guardar_envio, validar_envio
+from .exportar import FORMATOS, aiterar, generar_exportacion
+from .paginacion import ConsultaCursorPagination
+from .paginas import pagina_cacheada
+from .parsers import NDJSONParser
+from .serializers import ConsultaSerializer, serializar_filas
+from .forms import NIVELES, TestForm, ContactoForm
+from .inscripciones import consulta_firmada, firmar_consulta, registrar_inscripcion
+from .metricas import medir_externo
 from .models import Consulta
-
-DESCRIPCIONES = {
-    "Tecnológico": "Te interesa la tecnología la programación y la innovación.",
-    "Creativo/Artístico": "Te atrae la expresión artística y las ideas originales.",
-    "Social/Humanístico": "Tenés interés en ayudar a otros y en lo comunitario.",
-    "Científico/Analítico": "Te motiva investigar analizar y comprender como funcionan las cosas."
-}
-
-CURSOS = {
-    "Tecnológico": ["Introducción a Python", "Desarrollo Web", "Electrónica básica"],
-    "Creativo/Artístico": ["Diseño Gráfico", "Fotografía Digital", "Edición de video"],
-    "Social/Humanístico": ["Oratoria", "Trabajo Social", "Gestión de proyectos comunitarios"],
-    "Científico/Analítico": ["Estadística básica", "Laboratorio de ciencias", "Análisis de datos"]
-}
-
-
-def calcular_perfil(data):
-    # calcula el perfil vocacional basado en las respuestas
-    puntajes = {
-        "Tecnológico": 0, "Creativo/Artístico": 0, "Social/Humanístico": 0, "Científico/Analítico": 0
-    }
-    for i in range(1, 6):
-        respuesta = data.get(f"q{i}")
-        if respuesta in puntajes:
-            puntajes[respuesta] += 1
-
-    max_p = max(puntajes.values())
-    ganadores = [p for p, v in puntajes.items() if v == max_p]
-
-    # devuelve los ganadores o el perfil unico
-    return ", ".join(ganadores) if len(ganadores) > 1 else ganadores[0] if ganadores else "Indefinido"
-
-
-def get_translation(text, target_lang='en'):
-    # api externa para traducir texto
-    API_URL = "https://api.mymemory.translated.net/get"
-    params = {
-        'q': text,
-        'langpair': f'es|{target_lang}'
-    }
-    try:
-        response = requests.get(API_URL, params=params, timeout=5)
-        response.raise_for_status()
-        data = response.json()
-
-        if data.get('responseStatus') == 200 and 'translatedText' in data.get('responseData', {}):
-            return data['responseData']['translatedText']
-        else:
-            print(f"Error en API MyMemory: {data.get('responseDetails', 'Error desconocido')}")
-            return None
-    except requests.exceptions.RequestException as e:
-        print(f"Error de conexión con la API de traducción: {e}")
-        return None
+from .puntaje import PERFILES
+from .resultados import CURSOS, DESCRIPCIONES, calcular_perfil, resolver_resultado
+from .traduccion import aget_translation, aget_translations, estado_traduccion, traducir_lote
+from .versiones import version_actual
 
 
+@medir_externo('correo')
 def send_contacto_email(nombre, correo, mensaje):
     # envia el correo al administrador con el mensaje de contacto
 
@@ -91,28 +65,16 @@ def send_contacto_email(nombre, correo, mensaje):
     )
 
     try:
-        send_mail(
-            asunto,
-            cuerpo_mensaje,
-            settings.DEFAULT_FROM_EMAIL,
-            [settings.DEFAULT_FROM_EMAIL],
-            fail_silently=False,
-        )
-        print(f"Correo de contacto enviado exitosamente desde {correo}.")
+        encolar_correo(asunto, [settings.DEFAULT_FROM_EMAIL], cuerpo=cuerpo_mensaje)
+        print(f"Correo de contacto de {correo} encolado.")
         return True
     except Exception as e:
-        print(f"ERROR AL ENVIAR CORREO DE CONTACTO: {e}")
+        print(f"ERROR AL ENCOLAR CORREO DE CONTACTO: {e}")
         return False
 
 
-def send_confirmation_email(nombre, correo, perfil, descripcion, cursos):
-    # envia correos de confirmacion (usuario y admin) con los resultados del test
-
-    # si es produccion, omite el envio
-    if settings.IS_PROD_ENV:
-        print("⚠️ Envío de correos de confirmación omitido en Producción (Render).")
-        return True
-
+def cuerpos_confirmacion(nombre, correo, perfil, descripcion, cursos):
+    # asuntos y html de los correos del resultado del test (usuario y admin)
     lista_cursos_html = "".join(f"<li>{c}</li>" for c in cursos)
 
     # cuerpo del correo al usuario
@@ -156,41 +118,49 @@ def send_confirmation_email(nombre, correo, perfil, descripcion, cursos):
     </html>
     """
 
-    try:
-        connection = get_connection()
-
-        # mensaje para el usuario
-        msg_user = EmailMultiAlternatives(
-            asunto_usuario,
-            strip_tags(cuerpo_html_usuario),
-            settings.DEFAULT_FROM_EMAIL,
-            [correo],
-            connection=connection
-        )
-        msg_user.attach_alternative(cuerpo_html_usuario, "text/html")
-
-        # mensaje para el administrador
-        msg_admin = EmailMultiAlternatives(
-            asunto_admin,
-            strip_tags(cuerpo_html_admin),
-            settings.DEFAULT_FROM_EMAIL,
-            [settings.DEFAULT_FROM_EMAIL],
-            connection=connection
-        )
-        msg_admin.attach_alternative(cuerpo_html_admin, "text/html")
+    return asunto_usuario, cuerpo_html_usuario, asunto_admin, cuerpo_html_admin
 
-        # envio de los dos mensajes
-        connection.send_messages([msg_user, msg_admin])
 
+@medir_externo('correo')
+def send_confirmation_email(nombre, correo, perfil, descripcion, cursos):
+    # encola los correos de confirmacion (usuario y admin) con los resultados del test.
+    # Se llama dentro de la transaccion que guarda la consulta: un error de la db
+    # se propaga para que no quede la consulta sin sus correos ni al reves
+
+    # si es produccion, omite el envio
+    if settings.IS_PROD_ENV:
+        print("⚠️ Envío de correos de confirmación omitido en Producción (Render).")
         return True
 
-    except Exception as e:
-        print(f"ERROR AL ENVIAR EMAIL VOCARI (Django): {e}")
-        return False
+    asunto_usuario, cuerpo_html_usuario, asunto_admin, cuerpo_html_admin = cuerpos_confirmacion(
+        nombre, correo, perfil, descripcion, cursos
+    )
+
+    # los dos mensajes entran juntos a la bandeja de salida (un solo INSERT)
+    encolar_correos([
+        (asunto_usuario, [correo], cuerpo_html_usuario),
+        (asunto_admin, [settings.DEFAULT_FROM_EMAIL], cuerpo_html_admin),
+    ])
+    return True
+
+
+def _mensaje_resultado(db_status, email_sent):
+    # (mensaje, clase del alert) segun como salieron el guardado y el correo
+    if not db_status:
+        return "Test completado. Hubo un error al guardar tu consulta en el sistema. Contacta a soporte.", "danger"
+    if not email_sent:
+        return "Test completado pero no pudimos enviar el correo con tus resultados. Revisa tu dirección y contáctanos.", "warning"
+    return "¡Test completado! Tus resultados y guía personalizada han sido enviados a tu correo.", "success"
+
+
+# render toca la sesion y el usuario (db): en las vistas async se corre en un hilo
+arender = sync_to_async(render)
 
 
-def index(request):
-    # vista principal: muestra el test, procesa ajax y guarda resultados
+@pagina_cacheada
+async def index(request):
+    # vista principal: muestra el test, procesa ajax y guarda resultados.
+    # es async: mientras espera la traduccion o la db no ocupa el worker
 
     perfil = None
     descripcion = None
@@ -208,58 +178,28 @@ def index(request):
             nombre_val = data["nombre"]
             correo_val = data["correo"]
 
-            # calculo de perfil y descripcion
-            perfil = calcular_perfil(data)
-            descripcion = " / ".join(DESCRIPCIONES.get(p, "") for p in perfil.split(", "))
-
-            # cursos, traducciones y lista unica
-            seen = set()
-            cursos_con_traduccion = []
-            cursos_unicos = []
-
-            traduccion_descripcion = get_translation(descripcion)
-
-            for p in perfil.split(", "):
-                for c in CURSOS.get(p, []):
-                    if c not in seen:
-                        seen.add(c)
-                        cursos_unicos.append(c)
-
-                        traduccion_curso = get_translation(c)
-
-                        cursos_con_traduccion.append({
-                            'nombre': c,
-                            'traduccion': traduccion_curso
-                        })
+            # perfil, descripcion, cursos y traducciones salen de la tabla precalculada
+            resultado = resolver_resultado(data)
+            perfil = resultado.perfil
+            descripcion = resultado.descripcion
+            cursos_unicos = list(resultado.cursos)
+
+            # solo se traduce en vivo lo que no estaba en el catalogo
+            traducciones = resultado.traducciones()
+            faltantes = [t for t, tr in traducciones.items() if tr is None]
+            if faltantes:
+                traducciones.update(await aget_translations(faltantes))
+            traduccion_descripcion = traducciones.get(descripcion)
+            cursos_con_traduccion = [
+                {'nombre': c, 'traduccion': traducciones.get(c)} for c in cursos_unicos
+            ]
+
+            # persistencia de datos y correos en una sola transaccion
+            consulta_token, db_status, email_sent = await sync_to_async(_guardar_y_notificar)(
+                data, resultado
+            )
 
-            # persistencia de datos
-            try:
-                Consulta.objects.create(
-                    nombre=data['nombre'],
-                    edad=data['edad'],
-                    correo=data['correo'],
-                    nivel=data['nivel'],
-                    q1=data['q1'], q2=data['q2'], q3=data['q3'], q4=data['q4'], q5=data['q5'],
-                    perfil_obtenido=perfil,
-                )
-                db_status = True
-            except Exception as e:
-                print(f"Error al guardar la consulta en la base de datos: {e}")
-                db_status = False
-
-            # envio de correo y mensaje de respuesta
-            email_sent = send_confirmation_email(nombre_val, correo_val, perfil, descripcion, cursos_unicos)
-
-            if db_status:
-                if email_sent:
-                    user_message = "¡Test completado! Tus resultados y guía personalizada han sido enviados a tu correo."
-                    status_class = "success"
-                else:
-                    user_message = "Test completado pero no pudimos enviar el correo con tus resultados. Revisa tu dirección y contáctanos."
-                    status_class = "warning"
-            else:
-                user_message = "Test completado. Hubo un error al guardar tu consulta en el sistema. Contacta a soporte."
-                status_class = "danger"
+            user_message, status_class = _mensaje_resultado(db_status, email_sent)
 
             if is_ajax:
                 return JsonResponse({
@@ -270,19 +210,21 @@ def index(request):
                     'cursos': cursos_con_traduccion,
                     'nombre': nombre_val,
                     'correo': correo_val,
+                    'consulta': consulta_token,
                     'csrf_token': get_token(request),
                     'user_message': user_message,
                     'status_class': status_class
                 })
 
             # respuesta normal (no ajax)
-            return render(request, "landing/index.html", {
+            return await arender(request, "landing/index.html", {
                 "form": form,
                 "perfil": perfil,
                 "descripcion": descripcion,
                 "cursos": cursos_con_traduccion,
                 "nombre": nombre_val,
-                "correo": correo_val
+                "correo": correo_val,
+                "consulta": consulta_token,
             })
 
 
@@ -296,12 +238,12 @@ def index(request):
 
             else:
                 form = TestForm(request.POST)
-                return render(request, "landing/index.html", {"form": form})
+                return await arender(request, "landing/index.html", {"form": form})
 
     else:
         form = TestForm()
 
-    return render(request, "landing/index.html", {
+    return await arender(request, "landing/index.html", {
         "form": form,
         "perfil": perfil,
         "descripcion": descripcion,
@@ -311,7 +253,106 @@ def index(request):
     })
 
 
-def inscribir(request):
+def _guardar_y_notificar(limpios, resultado):
+    # todo lo que toca la db en un solo salto a un hilo: la consulta y sus
+    # correos se confirman juntos en la misma transaccion (o no queda ninguno)
+    try:
+        with transaction.atomic():
+            consulta = guardar_envio(limpios, resultado.perfil)
+            email_sent = send_confirmation_email(
+                limpios['nombre'], limpios['correo'], resultado.perfil, resultado.descripcion, resultado.cursos
+            )
+    except Exception as e:
+        print(f"Error al guardar la consulta en la base de datos: {e}")
+        return None, False, False
+    consulta_token = firmar_consulta(consulta.pk)
+    return consulta_token, True, email_sent
+
+
+@require_POST
+async def enviar_test(request):
+    # envio del test en json (lo usa scripts.js): valida con el esquema
+    # precompilado de landing/envio.py en lugar de TestForm, guarda la consulta
+    # y sus correos en una transaccion y responde solo lo que muestra la pagina
+    try:
+        datos = json.loads(request.body)
+    except ValueError:
+        return JsonResponse({'user_message': 'El cuerpo del pedido debe ser JSON válido.'}, status=400)
+
+    limpios, errores = validar_envio(datos)
+    if errores:
+        return JsonResponse({
+            'errors': errores,
+            'user_message': 'Por favor, revisa los errores en el formulario.'
+        }, status=400)
+
+    resultado = resolver_resultado(limpios)
+    traducciones = resultado.traducciones()
+    faltantes = [t for t, tr in traducciones.items() if tr is None]
+    if faltantes:
+        traducciones.update(await aget_translations(faltantes))
+
+    consulta_token, db_status, email_sent = await sync_to_async(_guardar_y_notificar)(limpios, resultado)
+    user_message, status_class = _mensaje_resultado(db_status, email_sent)
+    return JsonResponse({
+        'perfil': resultado.perfil,
+        'descripcion': resultado.descripcion,
+        'traduccion_descripcion': traducciones.get(resultado.descripcion),
+        'cursos': [{'nombre': c, 'traduccion': traducciones.get(c)} for c in resultado.cursos],
+        'consulta': consulta_token,
+        'user_message': user_message,
+        'status_class': status_class,
+    })
+
+
+def cuerpos_inscripcion(nombre, correo, cursos):
+    # asuntos y html de los correos de la inscripcion (usuario y admin)
+    lista_html = "".join(f"<li>{c}</li>" for c in cursos)
+    asunto_u = f"Inscripción confirmada | {nombre}"
+    cuerpo_u = f"""
+    <html>
+    <body style="font-family:Arial;background:#f4f4f4;padding:20px;">
+      <div style="max-width:600px;margin:auto;background:white;padding:20px;border-radius:10px;">
+
+        <h2>Hola {nombre},</h2>
+        <p>Tu inscripción fue recibida correctamente.</p>
+
+        <h3>Cursos seleccionados:</h3>
+        <ul>{lista_html}</ul>
+
+        <p>Nos contactaremos contigo pronto.<br>
+        <strong>Equipo Vocari Project</strong></p>
+      </div>
+    </body>
+    </html>
+    """
+
+    asunto_a = f"Inscripción recibida | {nombre}"
+    cuerpo_a = f"""
+    <html>
+    <body style="font-family:Arial;">
+        <h2>Nueva inscripción</h2>
+        <p><strong>Nombre:</strong> {nombre}</p>
+        <p><strong>Correo:</strong> {correo}</p>
+        <h3>Cursos:</h3>
+        <ul>{lista_html}</ul>
+    </body>
+    </html>
+    """
+
+    return asunto_u, cuerpo_u, asunto_a, cuerpo_a
+
+
+@medir_externo('correo')
+def _encolar_inscripcion(correo, asunto_u, cuerpo_u, asunto_a, cuerpo_a):
+    # mensaje para el usuario y para el administrador en un solo INSERT
+    encolar_correos([
+        (asunto_u, [correo], cuerpo_u),
+        (asunto_a, [settings.DEFAULT_FROM_EMAIL], cuerpo_a),
+    ])
+
+
+async def inscribir(request):
     # procesa la inscripcion a cursos, envia correos y redirige
     is_ajax = request.headers.get('x-requested-with') == 'XMLHttpRequest'
 
@@ -319,73 +360,43 @@ def inscribir(request):
         cursos_seleccionados = request.POST.getlist("cursos")
         nombre = request.POST.get("nombre")
         correo = request.POST.get("correo")
+        consulta_id = consulta_firmada(request.POST.get("consulta"))
+
+        # la inscripcion va al buffer de escritura (landing/inscripciones.py);
+        # solo se escribe en el momento si el buffer no esta disponible
+        inscripcion_guardada = True
+        if cursos_seleccionados:
+            try:
+                await sync_to_async(registrar_inscripcion)(nombre, correo, cursos_seleccionados, consulta_id)
+            except Exception as e:
+                print(f"❌ Error al registrar la inscripción: {e}")
+                inscripcion_guardada = False
 
         # preparacion de los cuerpos de email (usuario y admin)
-        lista_html = "".join(f"<li>{c}</li>" for c in cursos_seleccionados)
-        asunto_u = f"Inscripción confirmada | {nombre}"
-        cuerpo_u = f"""
-        <html>
-        <body style="font-family:Arial;background:#f4f4f4;padding:20px;">
-          <div style="max-width:600px;margin:auto;background:white;padding:20px;border-radius:10px;">
-
-            <h2>Hola {nombre},</h2>
-            <p>Tu inscripción fue recibida correctamente.</p>
-
-            <h3>Cursos seleccionados:</h3>
-            <ul>{lista_html}</ul>
-
-            <p>Nos contactaremos contigo pronto.<br>
-            <strong>Equipo Vocari Project</strong></p>
-          </div>
-        </body>
-        </html>
-        """
-
-        asunto_a = f"Inscripción recibida | {nombre}"
-        cuerpo_a = f"""
-        <html>
-        <body style="font-family:Arial;">
-            <h2>Nueva inscripción</h2>
-            <p><strong>Nombre:</strong> {nombre}</p>
-            <p><strong>Correo:</strong> {correo}</p>
-            <h3>Cursos:</h3>
-            <ul>{lista_html}</ul>
-        </body>
-        </html>
-        """
+        asunto_u, cuerpo_u, asunto_a, cuerpo_a = cuerpos_inscripcion(nombre, correo, cursos_seleccionados)
 
         email_sent = False
 
         # si no es produccion, intenta el envio
         if not settings.IS_PROD_ENV:
             try:
-                connection = get_connection()
-
-                # mensaje para el usuario
-                msg_user = EmailMultiAlternatives(
-                    asunto_u, strip_tags(cuerpo_u), settings.DEFAULT_FROM_EMAIL, [correo], connection=connection
-                )
-                msg_user.attach_alternative(cuerpo_u, "text/html")
+                await sync_to_async(_encolar_inscripcion)(correo, asunto_u, cuerpo_u, asunto_a, cuerpo_a)
 
-                # mensaje para el administrador
-                msg_admin = EmailMultiAlternatives(
-                    asunto_a, strip_tags(cuerpo_a), settings.DEFAULT_FROM_EMAIL, [settings.DEFAULT_FROM_EMAIL], connection=connection
-                )
-                msg_admin.attach_alternative(cuerpo_a, "text/html")
-
-                connection.send_messages([msg_user, msg_admin])
-
-                print("✅ Correos de inscripción enviados (usuario y admin).")
+                print("✅ Correos de inscripción encolados (usuario y admin).")
                 email_sent = True
 
             except Exception as e:
-                print(f"❌ Error al enviar correos de inscripción: {e}")
+                print(f"❌ Error al encolar correos de inscripción: {e}")
         else:
             # si es produccion, asume el exito
             print("⚠️ Envío de correos de inscripción omitido en Producción (Render).")
             email_sent = True
 
-        if email_sent:
+        if not inscripcion_guardada:
+            user_message = "No pudimos registrar tu inscripción. Intentá de nuevo en unos minutos."
+            success_status = False
+            http_status = 400
+        elif email_sent:
             user_message = f"¡Inscripción recibida con éxito! Serás redirigido."
             success_status = True
             http_status = 200
@@ -394,30 +405,31 @@ def inscribir(request):
             success_status = False
             http_status = 400
 
-        # si es ajax: devuelve json y guarda datos en sesion para la redireccion
+        # si es ajax: devuelve json y deja los datos para la redireccion
+        # (cookie firmada por defecto, ver landing/traspaso.py)
         if is_ajax:
-            # guarda los datos en la sesion temporalmente
-            request.session['inscripcion_data'] = {
-                'nombre': nombre,
-                'correo': correo,
-                'cursos': cursos_seleccionados,
-                'user_message': user_message,
-                'success_status': success_status
-            }
             # devuelve la url de destino
-            return JsonResponse({
+            respuesta = JsonResponse({
                 "success": success_status,
                 "user_message": user_message,
                 "redirect_url": request.path # /inscribir/
             }, status=http_status)
+            await traspaso.guardar(request, respuesta, {
+                'nombre': nombre,
+                'correo': correo,
+                'cursos': cursos_seleccionados,
+                'user_message': user_message,
+                'success_status': success_status
+            })
+            return respuesta
 
         # si no es ajax (redireccion normal)
-    # intenta obtener los datos guardados en la sesion
-    inscripcion_data = request.session.pop('inscripcion_data', None)
+    # intenta obtener los datos que dejo el POST
+    inscripcion_data = await traspaso.recuperar(request)
 
     if inscripcion_data:
-        # renderiza el template html usando los datos de la sesion
-        return render(request, "landing/inscribir.html", {
+        # renderiza el template html usando los datos recuperados
+        respuesta = await arender(request, "landing/inscribir.html", {
             "cursos": inscripcion_data['cursos'],
             "nombre": inscripcion_data['nombre'],
             "correo": inscripcion_data['correo'],
@@ -426,7 +438,9 @@ def inscribir(request):
         })
     else:
         # muestra el template vacío
-        return render(request, "landing/inscribir.html", {})
+        respuesta = await arender(request, "landing/inscribir.html", {})
+    traspaso.descartar(request, respuesta)
+    return respuesta
 
 
 def registro(request):
@@ -460,10 +474,12 @@ def no_admin_landing(request):
         return redirect('index')
 
 
+@pagina_cacheada
 def sobre_nosotros(request):
     return render(request, 'landing/sobre_nosotros.html', {})
 
 
+@pagina_cacheada
 def contacto(request):
     success_message = None
 
@@ -491,18 +507,86 @@ def contacto(request):
     })
 
 
+def _entero(valor, defecto=None):
+    try:
+        return int(valor)
+    except (TypeError, ValueError):
+        return defecto
+
+
 @staff_member_required(login_url='login')
 def listado_consultas(request):
-    # muestra un listado de todas las consultas guardadas
+    # muestra el listado de consultas paginado por id, solo con las columnas de la tabla
     try:
-        consultas = Consulta.objects.all().order_by('-id')
-        return render(request, "landing/listado_consultas.html", {"consultas": consultas})
+        filtros = filtros_consultas(request.GET)
+        tamano = min(
+            _entero(request.GET.get('tamano'), settings.LISTADO_PAGE_SIZE) or settings.LISTADO_PAGE_SIZE,
+            settings.LISTADO_PAGE_SIZE_MAX
+        )
+        consultas, hay_anterior, hay_siguiente = pagina_consultas(
+            filtros, tamano,
+            antes=_entero(request.GET.get('antes')),
+            despues=_entero(request.GET.get('despues')),
+        )
+        total, total_estimado = contar_consultas(filtros)
+
+        # los enlaces conservan los filtros y cambian solo el cursor
+        def url_cursor(nombre, valor):
+            params = request.GET.copy()
+            params.pop('antes', None)
+            params.pop('despues', None)
+            params[nombre] = valor
+            return f"?{params.urlencode()}"
+
+        return render(request, "landing/listado_consultas.html", {
+            "consultas": consultas,
+            "total": total,
+            "total_estimado": total_estimado,
+            "url_anterior": url_cursor('despues', consultas[0]['id']) if hay_anterior and consultas else None,
+            "url_siguiente": url_cursor('antes', consultas[-1]['id']) if hay_siguiente and consultas else None,
+            "filtros": request.GET,
+            "url_filtros": urlencode({
+                k: v for k, v in request.GET.items() if k in ('perfil', 'nivel', 'desde', 'hasta') and v
+            }),
+            "perfiles": PERFILES,
+            "niveles": [n for n, _ in NIVELES],
+        })
     except Exception as e:
         print(f"Error al listar consultas: {e}")
         return render(request, "landing/listado_consultas.html",
                       {"error_message": "Hubo un error al cargar el listado."})
 
 
+@staff_member_required(login_url='login')
+def exportar_consultas(request):
+    # descarga de consultas en csv o ndjson generada por bloques (memoria constante)
+    formato = request.GET.get('formato', 'csv')
+    if formato not in FORMATOS:
+        return JsonResponse({'error': f"Formato inválido. Opciones: {', '.join(FORMATOS)}."}, status=400)
+    comprimir = request.GET.get('gzip') in ('1', 'true')
+    filtros = filtros_consultas(request.GET)
+    metricas = {}
+
+    def contenido():
+        yield from generar_exportacion(filtros, formato, comprimir, metricas=metricas)
+        print(
+            f"Exportación {formato}: {metricas['filas']} filas, {metricas['bytes']} bytes en "
+            f"{metricas['segundos']:.2f}s ({metricas['filas'] / max(metricas['segundos'], 1e-6):.0f} filas/s)"
+        )
+
+    content_type = 'text/csv; charset=utf-8' if formato == 'csv' else 'application/x-ndjson; charset=utf-8'
+    nombre = f"consultas-{timezone.localdate():%Y%m%d}.{formato}"
+    if comprimir:
+        content_type = 'application/gzip'
+        nombre += '.gz'
+
+    # con asgi (uvicorn) el iterador tiene que ser async para que salga por partes
+    bloques = aiterar(contenido()) if isinstance(request, ASGIRequest) else contenido()
+    response = StreamingHttpResponse(bloques, content_type=content_type)
+    response['Content-Disposition'] = f'attachment; filename="{nombre}"'
+    return response
+
+
 @staff_member_required(login_url='login')
 def editar_consulta(request, consulta_id):
     # permite editar una consulta existente y recalcular el perfil
@@ -514,7 +598,7 @@ def editar_consulta(request, consulta_id):
 
         if form.is_valid():
             data = form.cleaned_data
-            perfil_actualizado = calcular_perfil(data)
+            perfil_actualizado = resolver_resultado(data).perfil
             consulta.perfil_obtenido = perfil_actualizado
             form.save()
 
@@ -553,58 +637,235 @@ def eliminar_consulta(request, consulta_id):
 
 @staff_member_required(login_url='login')
 def dashboard(request):
-    return render(request, "landing/dashboard.html")
+    # totales y graficos salen de la tabla EstadisticaDiaria, no de Consulta
+    return render(request, "landing/dashboard.html", {"estadisticas": estadisticas.resumen()})
 
 
-class TraduccionAPIView(views.APIView):
-    # api para obtener traducciones
-    permission_classes = [AllowAny]
+def _ultima_estadistica(request):
+    return estadisticas.ultima_actualizacion()
 
-    def get(self, request, *args, **kwargs):
+
+@staff_member_required(login_url='login')
+@cache_control(private=True, max_age=60)
+@condition(last_modified_func=_ultima_estadistica)
+def estadisticas_dashboard(request):
+    # mismos agregados que el dashboard en json; responde 304 si no hubo cambios
+    dias = min(_entero(request.GET.get('dias'), 30) or 30, 366)
+    return JsonResponse(estadisticas.resumen(dias=dias))
+
+
+def metricas_prometheus(request):
+    # metricas de todos los workers en formato prometheus; solo staff o token
+    if not (metricas.token_valido(request) or request.user.is_staff):
+        return HttpResponse("No autorizado.", status=403, content_type="text/plain")
+    return HttpResponse(metricas.exposicion(), content_type="text/plain; version=0.0.4; charset=utf-8")
+
+
+class TraduccionAPIView(View):
+    # api para obtener traducciones; vista django async (drf no tiene vistas
+    # async) para que la espera de la api externa no ocupe el worker
+
+    async def get(self, request, *args, **kwargs):
         # maneja las peticiones get para la traduccion
-        texto_a_traducir = request.query_params.get('texto', None)
+        texto_a_traducir = request.GET.get('texto', None)
 
         if not texto_a_traducir:
-            return Response(
+            return JsonResponse(
                 {"error": "El parámetro 'texto' es obligatorio para la traducción."},
                 status=status.HTTP_400_BAD_REQUEST
             )
-        traduccion = get_translation(texto_a_traducir, target_lang='en')
+        traduccion = await aget_translation(texto_a_traducir, target_lang='en')
 
         if traduccion is None:
-            return Response(
+            return JsonResponse(
                 {"error": "No se pudo obtener la traducción de la API externa."},
                 status=status.HTTP_503_SERVICE_UNAVAILABLE
             )
 
-        return Response({
+        return JsonResponse({
             "texto_original": texto_a_traducir,
             "traduccion": traduccion
         })
 
 
+class TraduccionLoteAPIView(views.APIView):
+    # varios textos a varios idiomas en un solo pedido; los textos repetidos se
+    # traducen una vez y los que no estan en cache se consultan en paralelo
+    permission_classes = [AllowAny]
+    idioma_valido = re.compile(r'^[a-z]{2,3}(-[A-Za-z]{2})?$')
+
+    def post(self, request, *args, **kwargs):
+        textos = request.data.get('textos') if isinstance(request.data, dict) else None
+        idiomas = request.data.get('idiomas', ['en']) if isinstance(request.data, dict) else None
+
+        if not isinstance(textos, list) or not textos or not all(isinstance(t, str) and t.strip() for t in textos):
+            return Response(
+                {"error": "El campo 'textos' debe ser una lista de textos no vacíos."},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        if not isinstance(idiomas, list) or not idiomas or not all(
+            isinstance(i, str) and self.idioma_valido.match(i) for i in idiomas
+        ):
+            return Response(
+                {"error": "El campo 'idiomas' debe ser una lista de códigos de idioma (por ejemplo 'en')."},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        textos = list(dict.fromkeys(textos))
+        idiomas = list(dict.fromkeys(idiomas))
+        if (len(textos) > settings.TRADUCCION_LOTE_MAX_TEXTOS
+                or len(idiomas) > settings.TRADUCCION_LOTE_MAX_IDIOMAS):
+            return Response(
+                {"error": f"Máximo {settings.TRADUCCION_LOTE_MAX_TEXTOS} textos distintos y "
+                          f"{settings.TRADUCCION_LOTE_MAX_IDIOMAS} idiomas por pedido."},
+                status=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE
+            )
+        if any(len(t) > settings.TRADUCCION_TEXTO_MAX_LARGO for t in textos):
+            return Response(
+                {"error": f"Cada texto puede tener hasta {settings.TRADUCCION_TEXTO_MAX_LARGO} caracteres."},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        traducciones = traducir_lote(textos, idiomas)
+        fallidas = sum(t is None for por_idioma in traducciones.values() for t in por_idioma.values())
+        codigo = status.HTTP_200_OK
+        if fallidas == len(textos) * len(idiomas):
+            codigo = status.HTTP_503_SERVICE_UNAVAILABLE
+        return Response({"traducciones": traducciones, "fallidas": fallidas}, status=codigo)
+
+
+class EstadoTraduccionAPIView(views.APIView):
+    # monitoreo: estado del circuit breaker de MyMemory y contadores del cache
+    permission_classes = [IsAdminUser]
+
+    def get(self, request, *args, **kwargs):
+        return Response(estado_traduccion())
+
+
 class ConsultaViewSet(viewsets.ModelViewSet):
     # api crud para el modelo consulta
     queryset = Consulta.objects.all().order_by('-fecha_consulta')
     serializer_class = ConsultaSerializer
+    pagination_class = ConsultaCursorPagination
 
     def get_permissions(self):
-        # permisos: solo admin para crear/editar/borrar
-        if self.action in ['list', 'retrieve']:
-            permission_classes = [AllowAny]
-        else:
-            permission_classes = [IsAuthenticated]
-
-        return [permission() for permission in permission_classes]
+        # permisos: solo admin, tambien para leer (nombre, correo y edad son datos
+        # personales); cualquiera puede registrarse en /registro/, asi que estar
+        # logueado no alcanza
+        return [IsAdminUser()]
+
+    def campos_pedidos(self):
+        # ?fields=id,nombre limita la respuesta; sin el parametro van todos
+        disponibles = ConsultaSerializer.Meta.fields
+        valor = self.request.query_params.get('fields')
+        if not valor:
+            return disponibles
+        pedidos = {campo.strip() for campo in valor.split(',') if campo.strip()}
+        desconocidos = pedidos.difference(disponibles)
+        if desconocidos:
+            raise ValidationError({"fields": f"Campos desconocidos: {', '.join(sorted(desconocidos))}."})
+        return tuple(campo for campo in disponibles if campo in pedidos)
+
+    def get_serializer(self, *args, **kwargs):
+        serializer = super().get_serializer(*args, **kwargs)
+        if self.action == 'retrieve':
+            campos = self.campos_pedidos()
+            for nombre in list(serializer.fields):
+                if nombre not in campos:
+                    serializer.fields.pop(nombre)
+        return serializer
+
+    def validadores_lectura(self, request):
+        # etag fuerte y last-modified a partir de la version de la tabla: si no hubo
+        # escrituras desde la ultima lectura se responde 304 sin tocar consulta
+        # el usuario entra en la firma: un etag no sirve para validar la copia de otro
+        version, modificado = version_actual()
+        firma = f"{version}|{request.user.pk}|{request.accepted_renderer.format}|{request.get_full_path()}"
+        etag = '"%s"' % hashlib.sha1(firma.encode('utf-8')).hexdigest()
+        ultima = int(modificado.timestamp()) if modificado else None
+        no_modificado = get_conditional_response(request._request, etag=etag, last_modified=ultima)
+        return etag, ultima, no_modificado
+
+    def _con_validadores(self, response, etag, ultima):
+        if response.status_code in (status.HTTP_200_OK, status.HTTP_304_NOT_MODIFIED):
+            response['ETag'] = etag
+            if ultima is not None:
+                response['Last-Modified'] = http_date(ultima)
+        # la respuesta depende de quien pide: nada de caches compartidos
+        patch_vary_headers(response, ('Cookie', 'Authorization'))
+        patch_cache_control(response, private=True)
+        return response
+
+    def list(self, request, *args, **kwargs):
+        campos = self.campos_pedidos()
+        etag, ultima, no_modificado = self.validadores_lectura(request)
+        if no_modificado is not None:
+            return self._con_validadores(no_modificado, etag, ultima)
+
+        # values() + serializar_filas en lugar de instanciar modelos y serializers
+        columnas = set(campos).union(('id', 'fecha_consulta'))
+        filas = self.filter_queryset(self.get_queryset()).values(*columnas)
+        pagina = self.paginate_queryset(filas)
+        response = self.get_paginated_response(serializar_filas(pagina, campos))
+        return self._con_validadores(response, etag, ultima)
+
+    def retrieve(self, request, *args, **kwargs):
+        self.campos_pedidos()
+        etag, ultima, no_modificado = self.validadores_lectura(request)
+        if no_modificado is not None:
+            return self._con_validadores(no_modificado, etag, ultima)
+        response = super().retrieve(request, *args, **kwargs)
+        return self._con_validadores(response, etag, ultima)
 
     def perform_create(self, serializer):
         # calcula el perfil antes de crear
         data = serializer.validated_data
-        perfil_calculado = calcular_perfil(data)
+        perfil_calculado = resolver_resultado(data).perfil
         serializer.save(perfil_obtenido=perfil_calculado)
 
     def perform_update(self, serializer):
         # calcula el perfil antes de actualizar
         data = serializer.validated_data
-        perfil_calculado = calcular_perfil(data)
-        serializer.save(perfil_obtenido=perfil_calculado)
\ No newline at end of file
+        perfil_calculado = resolver_resultado(data).perfil
+        serializer.save(perfil_obtenido=perfil_calculado)
+
+    @action(detail=False, methods=['post'], url_path='lote',
+            parser_classes=[JSONParser, NDJSONParser])
+    def lote(self, request):
+        # alta masiva: lista json o ndjson; devuelve el resultado de cada item
+        items = request.data
+        if not isinstance(items, list):
+            return Response(
+                {"error": "Se espera una lista JSON o un cuerpo NDJSON con un objeto por línea."},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        maximo = settings.CONSULTAS_LOTE_MAX
+        if len(items) > maximo:
+            return Response(
+                {"error": f"El lote supera el máximo de {maximo} consultas."},
+                status=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE
+            )
+
+        serializer = self.get_serializer(many=True)
+        validos, errores = serializer.validar_items(items)
+        consultas = serializer.create([datos for _, datos in validos]) if validos else []
+
+        resultados = [None] * len(items)
+        for (indice, _), consulta in zip(validos, consultas):
+            resultados[indice] = {
+                "indice": indice, "id": consulta.id, "perfil_obtenido": consulta.perfil_obtenido
+            }
+        for indice, detalle in errores.items():
+            resultados[indice] = {"indice": indice, "errores": detalle}
+
+        if not errores:
+            codigo = status.HTTP_201_CREATED
+        elif validos:
+            codigo = status.HTTP_207_MULTI_STATUS
+        else:
+            codigo = status.HTTP_400_BAD_REQUEST
+        return Response({
+            "creadas": len(consultas),
+            "con_errores": len(errores),
+            "resultados": resultados,
+        }, status=codigo)
@@ -0,0 +1,11 @@
+import os
+from django.core.asgi import get_asgi_application
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'mi_sitio.settings')
+
+application = get_asgi_application()
+
+# retoma las inscripciones que quedaron en el diario si el proceso anterior se cayo
+from landing import inscripciones  # noqa: E402
+
+inscripciones.iniciar()
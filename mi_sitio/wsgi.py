@@ -4,3 +4,8 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'mi_sitio.settings')
 
 application = get_wsgi_application()
+
+# retoma las inscripciones que quedaron en el diario si el proceso anterior se cayo
+from landing import inscripciones  # noqa: E402
+
+inscripciones.iniciar()